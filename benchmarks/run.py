@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""Run the bring benchmark scenarios against local stand-in services.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run                      # run all scenarios
+    python -m benchmarks.run -s cold_cli_startup  # run a single scenario
+    python -m benchmarks.run --compare <commit>   # compare with the results of an earlier commit
+
+Results are written to 'benchmarks/results/<git commit>.json'.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from benchmarks.servers import (
+    ArtefactHost,
+    FakeGitHub,
+    FakeGitLab,
+    SyntheticData,
+    create_bare_git_repos,
+)
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+BRING_CLI = [sys.executable, "-m", "bring.interfaces.cli.cli"]
+
+PKG_TEMPLATE = """info:
+  slug: synthetic benchmark package '{name}'
+source:
+  type: github_release
+  user_name: {user}
+  repo_name: {name}
+  url_regex: '{url_regex}'
+"""
+
+GIT_PKG_TEMPLATE = """info:
+  slug: synthetic git benchmark package '{name}'
+source:
+  type: git_files
+  url: '{url}'
+  files:
+    - file_0.txt
+    - file_1.txt
+"""
+
+
+def git_commit() -> str:
+
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        )
+        result = commit.decode("utf-8").strip()
+        dirty = subprocess.run(
+            ["git", "diff", "--quiet", "HEAD", "--", "src"], cwd=REPO_ROOT
+        )
+        if dirty.returncode != 0:
+            result = result + "-dirty"
+        return result
+    except Exception:
+        return "unknown"
+
+
+class BenchEnvironment(object):
+    """Temporary bring environment (isolated caches and config) that talks to the local stand-in servers."""
+
+    def __init__(self, num_repos: int, releases_per_repo: int):
+
+        self.base_dir: str = tempfile.mkdtemp(prefix="bring_bench_")
+
+        self.artefacts = ArtefactHost().start()
+        self.data = SyntheticData(
+            num_repos=num_repos,
+            releases_per_repo=releases_per_repo,
+            artefact_base_url=self.artefacts.base_url,
+        )
+        self.github = FakeGitHub(self.data).start()
+        self.gitlab = FakeGitLab(self.data).start()
+
+    @property
+    def url_regex(self) -> str:
+
+        base = self.artefacts.base_url.replace(".", "\\.")
+        return (
+            base
+            + "/.*/releases/download/v*(?P<version>.*)/.*-v*(?P=version)-(?P<arch>[^-]*)-(?P<os>[^.]*)\\..*$"
+        )
+
+    def reset_caches(self) -> None:
+
+        shutil.rmtree(os.path.join(self.base_dir, "cache"), ignore_errors=True)
+
+    def env(self) -> Dict[str, str]:
+
+        env = dict(os.environ)
+        env.update(
+            {
+                "XDG_CACHE_HOME": os.path.join(self.base_dir, "cache"),
+                "XDG_DATA_HOME": os.path.join(self.base_dir, "data"),
+                "XDG_CONFIG_HOME": os.path.join(self.base_dir, "config"),
+                "BRING_GITHUB_API_URL": self.github.base_url,
+                "BRING_GITLAB_URL": self.gitlab.base_url,
+                "BRING_METRICS_FILE": os.path.join(self.base_dir, "metrics.json"),
+            }
+        )
+        src = os.path.join(REPO_ROOT, "src")
+        env["PYTHONPATH"] = os.pathsep.join(
+            [src] + [p for p in [env.get("PYTHONPATH", None)] if p]
+        )
+        return env
+
+    def create_index(self, name: str, num_pkgs: int) -> str:
+
+        index_dir = os.path.join(self.base_dir, "indexes", name)
+        os.makedirs(index_dir, exist_ok=True)
+        for i in range(num_pkgs):
+            pkg_name = self.data.repos()[i]
+            with open(os.path.join(index_dir, f"{pkg_name}.pkg.br"), "w") as f:
+                f.write(
+                    PKG_TEMPLATE.format(
+                        name=pkg_name, user=self.data.user, url_regex=self.url_regex
+                    )
+                )
+        return index_dir
+
+    def create_git_index(self, name: str, num_pkgs: int) -> str:
+
+        repos = create_bare_git_repos(
+            os.path.join(self.base_dir, "git"), num_repos=num_pkgs
+        )
+        index_dir = os.path.join(self.base_dir, "indexes", name)
+        os.makedirs(index_dir, exist_ok=True)
+        for repo in repos:
+            pkg_name = os.path.basename(repo)[0:-4]
+            with open(os.path.join(index_dir, f"{pkg_name}.pkg.br"), "w") as f:
+                f.write(GIT_PKG_TEMPLATE.format(name=pkg_name, url=f"file://{repo}"))
+        return index_dir
+
+    def run_bring(self, *args: str) -> Dict[str, Any]:
+
+        requests_before = (
+            self.github.request_count
+            + self.gitlab.request_count
+            + self.artefacts.request_count
+        )
+        start = time.perf_counter()
+        proc = subprocess.run(
+            BRING_CLI + list(args),
+            env=self.env(),
+            cwd=self.base_dir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        duration = time.perf_counter() - start
+        requests = (
+            self.github.request_count
+            + self.gitlab.request_count
+            + self.artefacts.request_count
+            - requests_before
+        )
+
+        result: Dict[str, Any] = {
+            "duration": duration,
+            "exit_code": proc.returncode,
+            "requests": requests,
+        }
+        if proc.returncode != 0:
+            result["output"] = proc.stdout.decode("utf-8", errors="replace")[-2000:]
+        return result
+
+    def close(self) -> None:
+
+        for server in [self.github, self.gitlab, self.artefacts]:
+            server.stop()
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+
+def summarize(runs: List[Mapping[str, Any]]) -> Dict[str, Any]:
+
+    durations = [r["duration"] for r in runs]
+    result: Dict[str, Any] = {
+        "runs": len(runs),
+        "median": statistics.median(durations),
+        "min": min(durations),
+        "max": max(durations),
+        "requests": runs[-1]["requests"],
+        "failed": len([r for r in runs if r["exit_code"] != 0]),
+    }
+    failed = [r for r in runs if r["exit_code"] != 0]
+    if failed:
+        result["last_error"] = failed[-1].get("output", "")
+    return result
+
+
+def scenario_cold_cli_startup(env: BenchEnvironment, repeat: int) -> Dict[str, Any]:
+
+    runs = [env.run_bring("--help") for _ in range(repeat)]
+    return summarize(runs)
+
+
+def scenario_refresh_index(env: BenchEnvironment, repeat: int) -> Dict[str, Any]:
+    """Export a 1000-package index with empty metadata caches (all metadata has to be fetched)."""
+
+    index_dir = env.create_index("refresh", num_pkgs=min(1000, env.data.num_repos))
+    runs = []
+    for _ in range(repeat):
+        env.reset_caches()
+        runs.append(env.run_bring("export-index", "--force", index_dir))
+    return summarize(runs)
+
+
+def scenario_export_index(env: BenchEnvironment, repeat: int) -> Dict[str, Any]:
+    """Export a 1000-package index with warm metadata caches."""
+
+    index_dir = env.create_index("export", num_pkgs=min(1000, env.data.num_repos))
+    env.reset_caches()
+    env.run_bring("export-index", "--force", index_dir)
+    runs = [env.run_bring("export-index", "--force", index_dir) for _ in range(repeat)]
+    return summarize(runs)
+
+
+def scenario_export_git_index(env: BenchEnvironment, repeat: int) -> Dict[str, Any]:
+    """Export an index of packages hosted in local bare git repositories."""
+
+    index_dir = env.create_git_index("git", num_pkgs=10)
+    runs = []
+    for _ in range(repeat):
+        env.reset_caches()
+        runs.append(env.run_bring("export-index", "--force", index_dir))
+    return summarize(runs)
+
+
+def scenario_install_assembly(env: BenchEnvironment, repeat: int) -> Dict[str, Any]:
+    """Install a 50-package assembly (metadata, downloads, extraction, merging)."""
+
+    num_pkgs = min(50, env.data.num_repos)
+    index_dir = env.create_index("assembly", num_pkgs=num_pkgs)
+    env.run_bring("export-index", "--force", index_dir)
+
+    assembly_file = os.path.join(env.base_dir, "assembly.json")
+    pkgs = [
+        {"pkg": {"name": env.data.repos()[i], "index": index_dir}}
+        for i in range(num_pkgs)
+    ]
+    with open(assembly_file, "w") as f:
+        json.dump({"pkgs": pkgs}, f)
+
+    runs = []
+    for i in range(repeat):
+        env.reset_caches()
+        target = os.path.join(env.base_dir, f"target_{i}")
+        runs.append(env.run_bring("install", "--target", target, assembly_file))
+    return summarize(runs)
+
+
+SCENARIOS: Dict[str, Callable[[BenchEnvironment, int], Dict[str, Any]]] = {
+    "cold_cli_startup": scenario_cold_cli_startup,
+    "refresh_index": scenario_refresh_index,
+    "export_index": scenario_export_index,
+    "export_git_index": scenario_export_git_index,
+    "install_assembly": scenario_install_assembly,
+}
+
+
+def compare(current: Mapping[str, Any], previous: Mapping[str, Any]) -> None:
+
+    print()
+    print(f"comparing with: {previous['commit']}")
+    for name, result in current["scenarios"].items():
+        prev = previous["scenarios"].get(name, None)
+        if prev is None or not prev.get("median", None):
+            print(f"  {name}: no previous result")
+            continue
+        change = (result["median"] - prev["median"]) / prev["median"] * 100
+        print(
+            f"  {name}: {prev['median']:.3f}s -> {result['median']:.3f}s ({change:+.1f}%)"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+    parser = argparse.ArgumentParser(description="Run bring benchmarks.")
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS.keys()),
+        help="scenario(s) to run (default: all)",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    parser.add_argument("--repos", type=int, default=1000)
+    parser.add_argument("--releases", type=int, default=5)
+    parser.add_argument("-o", "--output", help="results file")
+    parser.add_argument("--compare", metavar="COMMIT", help="compare with results")
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenario or list(SCENARIOS.keys())
+    commit = git_commit()
+
+    env = BenchEnvironment(num_repos=args.repos, releases_per_repo=args.releases)
+    results: Dict[str, Any] = {}
+    try:
+        for name in scenarios:
+            print(f"running scenario: {name}...")
+            result = SCENARIOS[name](env, args.repeat)
+            results[name] = result
+            print(
+                f"  median: {result['median']:.3f}s, requests: {result['requests']}, failed runs: {result['failed']}"
+            )
+    finally:
+        env.close()
+
+    report = {
+        "commit": commit,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "repeat": args.repeat,
+            "repos": args.repos,
+            "releases": args.releases,
+        },
+        "scenarios": results,
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{commit}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to: {output}")
+
+    if args.compare:
+        with open(os.path.join(RESULTS_DIR, f"{args.compare}.json")) as f:
+            previous = json.load(f)
+        compare(report, previous)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
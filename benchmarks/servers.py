@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""Local stand-ins for the remote services bring talks to.
+
+All servers only use the Python standard library, bind to 127.0.0.1 on a random free port, and serve synthetic,
+deterministic data, so benchmark results don't depend on network conditions or on the state of remote services.
+"""
+import gzip
+import io
+import json
+import os
+import re
+import subprocess
+import tarfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+ARCHS = ["x86_64", "aarch64"]
+OSES = ["linux", "darwin"]
+
+
+def repo_name(index: int) -> str:
+
+    return f"tool{index:04d}"
+
+
+class SyntheticData(object):
+    """Deterministic, synthetic repositories and releases."""
+
+    def __init__(
+        self,
+        user: str = "bench",
+        num_repos: int = 1000,
+        releases_per_repo: int = 5,
+        artefact_base_url: str = "http://127.0.0.1",
+    ):
+
+        self.user: str = user
+        self.num_repos: int = num_repos
+        self.releases_per_repo: int = releases_per_repo
+        self.artefact_base_url: str = artefact_base_url
+
+    def repos(self) -> List[str]:
+
+        return [repo_name(i) for i in range(self.num_repos)]
+
+    def versions(self, repo: str) -> List[str]:
+
+        return [f"1.{i}.0" for i in reversed(range(self.releases_per_repo))]
+
+    def artefact_path(self, repo: str, version: str, arch: str, os_name: str) -> str:
+
+        return f"/{self.user}/{repo}/releases/download/v{version}/{repo}-v{version}-{arch}-{os_name}.tar.gz"
+
+    def release(self, repo: str, version: str) -> Dict[str, Any]:
+
+        assets = []
+        for arch in ARCHS:
+            for os_name in OSES:
+                path = self.artefact_path(repo, version, arch, os_name)
+                assets.append(
+                    {
+                        "name": os.path.basename(path),
+                        "browser_download_url": f"{self.artefact_base_url}{path}",
+                    }
+                )
+        return {
+            "name": f"v{version}",
+            "tag_name": f"v{version}",
+            "prerelease": False,
+            "created_at": "2020-06-01T00:00:00Z",
+            "assets": assets,
+        }
+
+    def repo(self, repo: str, base_url: str) -> Dict[str, Any]:
+
+        return {
+            "name": repo,
+            "description": f"synthetic repository '{repo}'",
+            "homepage": f"https://example.com/{repo}",
+            "html_url": f"https://example.com/{self.user}/{repo}",
+            "clone_url": f"https://example.com/{self.user}/{repo}.git",
+            "issues_url": f"{base_url}/repos/{self.user}/{repo}/issues{{/number}}",
+            "language": "Go",
+        }
+
+
+class BenchServer(object):
+    """Base class: runs a ThreadingHTTPServer in a background thread, and counts requests."""
+
+    def __init__(self):
+
+        self.request_count: int = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+
+        if self._server is None:
+            raise Exception("Server not started.")
+        host, port = self._server.server_address[0:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self) -> None:
+
+        with self._lock:
+            self.request_count = self.request_count + 1
+
+    def handle(
+        self, handler: BaseHTTPRequestHandler, head: bool = False
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+
+        raise NotImplementedError()
+
+    def start(self) -> "BenchServer":
+
+        bench_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, head: bool):
+                bench_server.count_request()
+                status, headers, body = bench_server.handle(self, head=head)
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                self._respond(head=False)
+
+            def do_HEAD(self):
+                self._respond(head=True)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def json_response(
+    data: Any, headers: Optional[Mapping[str, str]] = None, status: int = 200
+) -> Tuple[int, Mapping[str, str], bytes]:
+
+    _headers = {"Content-Type": "application/json; charset=utf-8"}
+    if headers:
+        _headers.update(headers)
+    return (status, _headers, json.dumps(data).encode("utf-8"))
+
+
+def paginate(
+    base_url: str, path: str, query: Mapping[str, List[str]], items: List[Any]
+) -> Tuple[List[Any], Dict[str, str]]:
+    """Return the requested page of items, and the 'Link' header pointing to the next/last pages."""
+
+    per_page = int(query.get("per_page", ["30"])[0])
+    page = int(query.get("page", ["1"])[0])
+    last_page = max(1, (len(items) + per_page - 1) // per_page)
+
+    start = (page - 1) * per_page
+    page_items = items[start : start + per_page]
+
+    links = []
+
+    def link(p: int, rel: str):
+        q = {"per_page": str(per_page), "page": str(p)}
+        links.append(f'<{base_url}{path}?{urlencode(q)}>; rel="{rel}"')
+
+    if page < last_page:
+        link(page + 1, "next")
+        link(last_page, "last")
+    if page > 1:
+        link(page - 1, "prev")
+        link(1, "first")
+
+    headers = {}
+    if links:
+        headers["Link"] = ", ".join(links)
+    return page_items, headers
+
+
+class FakeGitHub(BenchServer):
+    """Serves the parts of the GitHub REST API bring uses: releases, tags, branches, repo and user repo listings.
+
+    Responses carry rate-limit headers, list responses are paginated with 'Link' headers (like the real API).
+    """
+
+    def __init__(self, data: SyntheticData, rate_limit: int = 100000):
+
+        self.data: SyntheticData = data
+        self.rate_limit: int = rate_limit
+        self.reset_time: int = int(time.time()) + 3600
+        super().__init__()
+
+    def rate_limit_headers(self) -> Dict[str, str]:
+
+        remaining = max(0, self.rate_limit - self.request_count)
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(self.reset_time),
+        }
+
+    def handle(
+        self, handler: BaseHTTPRequestHandler, head: bool = False
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+
+        url = urlparse(handler.path)
+        path = url.path
+        query = parse_qs(url.query)
+        headers = self.rate_limit_headers()
+
+        if path == "/rate_limit":
+            rate = {
+                "limit": self.rate_limit,
+                "remaining": int(headers["X-RateLimit-Remaining"]),
+                "reset": self.reset_time,
+            }
+            data = dict(rate)
+            data["rate"] = rate
+            return json_response(data, headers=headers)
+
+        m = re.match(r"^/users/([^/]+)/repos$", path)
+        if m:
+            items = [self.data.repo(r, self.base_url) for r in self.data.repos()]
+            page, link_headers = paginate(self.base_url, path, query, items)
+            headers.update(link_headers)
+            return json_response(page, headers=headers)
+
+        m = re.match(r"^/repos/([^/]+)/([^/]+)(/[a-z]+)?$", path)
+        if not m or m.group(1) != self.data.user:
+            return json_response({"message": "Not Found"}, headers=headers, status=404)
+
+        repo = m.group(2)
+        sub = m.group(3)
+        versions = self.data.versions(repo)
+
+        if sub is None:
+            return json_response(self.data.repo(repo, self.base_url), headers=headers)
+        elif sub == "/releases":
+            items = [self.data.release(repo, v) for v in versions]
+        elif sub == "/tags":
+            items = [
+                {"name": f"v{v}", "commit": {"sha": f"{i:040x}"}}
+                for i, v in enumerate(versions)
+            ]
+        elif sub == "/branches":
+            items = [{"name": "master", "commit": {"sha": "0" * 40}}]
+        else:
+            return json_response({"message": "Not Found"}, headers=headers, status=404)
+
+        page, link_headers = paginate(self.base_url, path, query, items)
+        headers.update(link_headers)
+        return json_response(page, headers=headers)
+
+
+class FakeGitLab(BenchServer):
+    """Serves the user/group project listings of the GitLab v4 API, with rate-limit headers and pagination."""
+
+    def __init__(self, data: SyntheticData, rate_limit: int = 100000):
+
+        self.data: SyntheticData = data
+        self.rate_limit: int = rate_limit
+        super().__init__()
+
+    def handle(
+        self, handler: BaseHTTPRequestHandler, head: bool = False
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+
+        url = urlparse(handler.path)
+        path = url.path
+        query = parse_qs(url.query)
+        headers = {
+            "RateLimit-Limit": str(self.rate_limit),
+            "RateLimit-Remaining": str(max(0, self.rate_limit - self.request_count)),
+            "RateLimit-Reset": str(int(time.time()) + 60),
+        }
+
+        m = re.match(r"^/api/v4/(users|groups)/([^/]+)/projects$", path)
+        if not m or m.group(2) != self.data.user:
+            return json_response({"message": "Not Found"}, headers=headers, status=404)
+
+        items = []
+        for index, r in enumerate(self.data.repos()):
+            items.append(
+                {
+                    "id": index,
+                    "name": r,
+                    "description": f"synthetic project '{r}'",
+                    "web_url": f"https://example.com/{self.data.user}/{r}",
+                    "http_url_to_repo": f"https://example.com/{self.data.user}/{r}.git",
+                    "tag_list": ["benchmark"],
+                }
+            )
+        page, link_headers = paginate(self.base_url, path, query, items)
+        headers.update(link_headers)
+        return json_response(page, headers=headers)
+
+
+def create_archive(name: str, num_files: int = 1, file_size: int = 4096) -> bytes:
+    """Create a (deterministic) .tar.gz archive with a root folder, containing one executable and some extra files."""
+
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w", format=tarfile.GNU_FORMAT) as tar:
+        for i in range(num_files):
+            if i == 0:
+                file_name = f"{name}/{name.split('-')[0]}"
+                mode = 0o755
+            else:
+                file_name = f"{name}/doc/file_{i}.txt"
+                mode = 0o644
+            content = (f"{file_name}\n" * (file_size // (len(file_name) + 1) + 1))[
+                0:file_size
+            ].encode("utf-8")
+            info = tarfile.TarInfo(file_name)
+            info.size = len(content)
+            info.mode = mode
+            info.mtime = 1590969600
+            tar.addfile(info, io.BytesIO(content))
+
+    return gzip.compress(buf.getvalue(), mtime=0)
+
+
+class ArtefactHost(BenchServer):
+    """Serves generated release archives for every path that looks like a release download url."""
+
+    def __init__(self, files_per_archive: int = 20, file_size: int = 4096):
+
+        self.files_per_archive: int = files_per_archive
+        self.file_size: int = file_size
+        self._cache: Dict[str, bytes] = {}
+        super().__init__()
+
+    def handle(
+        self, handler: BaseHTTPRequestHandler, head: bool = False
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+
+        path = urlparse(handler.path).path
+        if not path.endswith(".tar.gz"):
+            return (404, {}, b"")
+
+        content = self._cache.get(path, None)
+        if content is None:
+            name = os.path.basename(path)[0:-7]
+            content = create_archive(
+                name, num_files=self.files_per_archive, file_size=self.file_size
+            )
+            self._cache[path] = content
+
+        if head:
+            return (200, {"Content-Type": "application/gzip"}, b"")
+        return (200, {"Content-Type": "application/gzip"}, content)
+
+
+def create_bare_git_repos(
+    base_dir: str, num_repos: int = 10, num_tags: int = 5, files_per_repo: int = 10
+) -> List[str]:
+    """Create local bare git repositories with a few tagged commits each, return their paths."""
+
+    env = dict(os.environ)
+    env.update(
+        {
+            "GIT_AUTHOR_NAME": "bench",
+            "GIT_AUTHOR_EMAIL": "bench@example.com",
+            "GIT_COMMITTER_NAME": "bench",
+            "GIT_COMMITTER_EMAIL": "bench@example.com",
+            "GIT_AUTHOR_DATE": "2020-06-01T00:00:00",
+            "GIT_COMMITTER_DATE": "2020-06-01T00:00:00",
+        }
+    )
+
+    def git(*args: str, cwd: str):
+        subprocess.run(
+            ["git"] + list(args),
+            cwd=cwd,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    result = []
+    for i in range(num_repos):
+        name = repo_name(i)
+        work_dir = os.path.join(base_dir, "work", name)
+        bare_dir = os.path.join(base_dir, "bare", f"{name}.git")
+        os.makedirs(work_dir, exist_ok=True)
+        git("init", "-q", cwd=work_dir)
+        for t in range(num_tags):
+            for f in range(files_per_repo):
+                with open(os.path.join(work_dir, f"file_{f}.txt"), "w") as fh:
+                    fh.write(f"{name} {t} {f}\n")
+            git("add", "-A", cwd=work_dir)
+            git("commit", "-q", "-m", f"release {t}", cwd=work_dir)
+            git("tag", f"v1.{t}.0", cwd=work_dir)
+        os.makedirs(os.path.dirname(bare_dir), exist_ok=True)
+        git("clone", "-q", "--bare", work_dir, bare_dir, cwd=base_dir)
+        result.append(bare_dir)
+
+    return result
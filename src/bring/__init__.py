@@ -7,6 +7,7 @@ from typing import Iterable, Mapping, Type, Union
 
 from pkg_resources import DistributionNotFound, get_distribution
 
+from bring._startup import startup_phase
 from bring.defaults import BRING_TEMP_CACHE
 from frkl.common.filesystem import ensure_folder
 from frkl.project_meta.app_environment import AppEnvironment
@@ -50,8 +51,6 @@ ensure_folder(BRING_TEMP_CACHE)
 
 def set_globals():
 
-    import bring.interfaces.cli  # noqa
-
     global BRING
 
     from frkl.types.typistry import Typistry
@@ -89,4 +88,5 @@ def set_globals():
         BRING.register_singleton(freckles)
 
 
-set_globals()
+with startup_phase("set_globals"):
+    set_globals()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Helpers to measure how long bring takes to start up.
+
+Startup phases (like 'set_globals', or creating the cli command group) are recorded with 'startup_phase'. If the
+'BRING_STARTUP_PROFILE_FILE' environment variable is set, the recorded phases are written to that file (as json)
+when the process exits. 'profile_startup' uses that to profile a bring sub-process, together with Python's
+'-X importtime' output.
+
+This module is imported very early, so it must only depend on the standard library.
+"""
+import atexit
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+
+BRING_STARTUP_PROFILE_ENV_VAR = "BRING_STARTUP_PROFILE_FILE"
+
+# python arguments that run the same code as the 'bring' console script
+BRING_CLI_PYTHON_ARGS = ["-c", "import bring_client; bring_client.cli()"]
+
+STARTUP_PHASES: List[Dict[str, Any]] = []
+
+_PHASE_DEPTH = 0
+
+
+@contextmanager
+def startup_phase(name: str) -> Iterator[None]:
+
+    global _PHASE_DEPTH
+
+    phase: Dict[str, Any] = {"name": name, "depth": _PHASE_DEPTH}
+    STARTUP_PHASES.append(phase)
+    _PHASE_DEPTH = _PHASE_DEPTH + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase["duration"] = time.perf_counter() - start
+        _PHASE_DEPTH = _PHASE_DEPTH - 1
+
+
+def _write_startup_phases() -> None:
+
+    path = os.environ.get(BRING_STARTUP_PROFILE_ENV_VAR, None)
+    if not path:
+        return
+    try:
+        with open(path, "w") as f:
+            json.dump(STARTUP_PHASES, f)
+    except Exception:
+        pass
+
+
+if os.environ.get(BRING_STARTUP_PROFILE_ENV_VAR, None):
+    atexit.register(_write_startup_phases)
+
+
+class ImportNode(object):
+    def __init__(self, name: str, self_us: int, cumulative_us: int):
+
+        self.name: str = name
+        self.self_us: int = self_us
+        self.cumulative_us: int = cumulative_us
+        self.children: List[ImportNode] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+
+        return {
+            "name": self.name,
+            "self_us": self.self_us,
+            "cumulative_us": self.cumulative_us,
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+def parse_importtime(output: str) -> List[ImportNode]:
+    """Parse the output of 'python -X importtime' into a tree of imports.
+
+    Python prints every import after the imports it triggered, indented by two spaces per nesting level.
+    """
+
+    pending: Dict[int, List[ImportNode]] = {}
+
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        tokens = line[len("import time:") :].split("|")
+        if len(tokens) != 3:
+            continue
+        try:
+            self_us = int(tokens[0].strip())
+            cumulative_us = int(tokens[1].strip())
+        except ValueError:
+            # header line
+            continue
+
+        raw_name = tokens[2][1:] if tokens[2].startswith(" ") else tokens[2]
+        level = (len(raw_name) - len(raw_name.lstrip(" "))) // 2
+
+        node = ImportNode(raw_name.strip(), self_us, cumulative_us)
+        node.children = pending.pop(level + 1, [])
+        pending.setdefault(level, []).append(node)
+
+    return pending.get(0, [])
+
+
+def profile_startup(
+    args: Optional[List[str]] = None, python: Optional[str] = None
+) -> Mapping[str, Any]:
+    """Run bring in a sub-process, and record import times, startup phases and the total time it took."""
+
+    if args is None:
+        args = ["--help"]
+    if python is None:
+        python = sys.executable
+
+    fd, phases_file = tempfile.mkstemp(prefix="bring_startup_", suffix=".json")
+    os.close(fd)
+
+    env = dict(os.environ)
+    env[BRING_STARTUP_PROFILE_ENV_VAR] = phases_file
+
+    try:
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [python, "-X", "importtime"] + BRING_CLI_PYTHON_ARGS + args,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        total = time.perf_counter() - start
+
+        phases: List[Mapping[str, Any]] = []
+        try:
+            with open(phases_file, "r") as f:
+                phases = json.load(f)
+        except Exception:
+            pass
+    finally:
+        os.unlink(phases_file)
+
+    return {
+        "total": total,
+        "exit_code": proc.returncode,
+        "imports": parse_importtime(proc.stderr.decode("utf-8", errors="replace")),
+        "phases": phases,
+    }
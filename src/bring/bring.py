@@ -12,9 +12,11 @@ from bring.pkg import PkgTing
 from bring.pkg_index.config import IndexConfig
 from bring.pkg_index.factory import IndexFactory
 from bring.pkg_index.index import BringIndexTing
-from bring.pkg_types import get_pkg_type_plugin_factory
+from bring.pkg_index.lookup import PkgIndexLookup, calculate_index_fingerprint
 from bring.utils import parse_pkg_string
+from bring.utils.concurrency import run_limited
 from bring.utils.defaults import calculate_defaults
+from bring.utils.metrics import init_metrics, measure_phase
 from freckles.core.freckles import Freckles
 from frkl.args.hive import ArgHive
 from frkl.common.async_utils import wrap_async_task
@@ -45,6 +47,7 @@ class Bring(SimpleTing):
     def __init__(self, name: str, meta: TingMeta, bring_config: BringConfig = None):
 
         ensure_folder(BRING_WORKSPACE_FOLDER)
+        init_metrics()
 
         self._tingistry_obj: Tingistry = meta.tingistry
 
@@ -52,8 +55,6 @@ class Bring(SimpleTing):
 
         super().__init__(name=name, meta=meta)
 
-        get_pkg_type_plugin_factory(self.arg_hive)
-
         # self._transmogritory = Transmogritory(self._tingistry_obj)
         self._transmogritory = self._tingistry_obj.get_ting(
             "bring.transmogritory", raise_exception=False
@@ -79,6 +80,8 @@ class Bring(SimpleTing):
         register_bring_frecklet_types(bring=self, freckles=self._freckles)
 
         self._indexes: Dict[str, Optional[BringIndexTing]] = {}
+        self._pkg_lookup: PkgIndexLookup = PkgIndexLookup()
+        self._alias_pkg_maps: Dict[Tuple[str, ...], Mapping[str, PkgTing]] = {}
 
     def add_app_event(self, event: Union[Event, Any]):
 
@@ -116,6 +119,7 @@ class Bring(SimpleTing):
 
         self._indexes = {}
         self._defaults = None
+        self._alias_pkg_maps = {}
         self._index_factory.invalidate()
 
         # if self._bring_config is not None:
@@ -193,7 +197,7 @@ class Bring(SimpleTing):
         async with create_task_group() as tg:
 
             for ii in index_items:
-                await tg.spawn(add, ii, allow_existing)
+                await tg.spawn(run_limited, "network", add, ii, allow_existing)
 
         # make sure we preserve the order of the items
         result = {}
@@ -253,6 +257,8 @@ class Bring(SimpleTing):
             )
 
         self._indexes[index.id] = index
+        # the cached maps don't contain the new index (or a different instance of it)
+        self._alias_pkg_maps = {}
 
         return index
 
@@ -323,7 +329,11 @@ class Bring(SimpleTing):
             if tsk:
                 await tasks.add_tasklet(tsk)
 
-        await self.run_async_task(tasks)
+        with measure_phase("update"):
+            await self.run_async_task(tasks)
+
+        for index_name in index_names:
+            self.invalidate_index(index_name)
 
         # await tasks.run_async()
 
@@ -383,8 +393,70 @@ class Bring(SimpleTing):
 
         return pkg_map
 
+    def invalidate_index(self, index_id: str) -> None:
+        """Invalidate all cached, package related data of an index."""
+
+        self._pkg_lookup.invalidate_index(index_id)
+        # the map for 'all indexes' is cached under the empty key
+        self._alias_pkg_maps = {
+            k: v for k, v in self._alias_pkg_maps.items() if k and index_id not in k
+        }
+
+    async def get_index_aliases(self) -> Mapping[str, str]:
+        """Return all names that can be used instead of an index id (alias -> index id)."""
+
+        index_configs = await self._index_factory.get_index_configs()
+        aliases = {k: v["id"] for k, v in index_configs.items() if v.get("id", k) != k}
+        aliases.update(await self._index_factory.index_name_aliases())
+        return aliases
+
+    async def find_indexes_for_pkg(self, pkg_name: str) -> Iterable[str]:
+        """Return the ids of all registered indexes that contain a package with the provided name.
+
+        The name can be a bare package name, or contain an index id or alias ('<index>.<pkg_name>').
+
+        This uses a (persisted) lookup table, indexes are only loaded if their lookup entry is missing or outdated.
+        """
+
+        index_configs = await self._index_factory.get_index_configs()
+
+        async def refresh(_index_id: str):
+
+            index_config = index_configs.get(_index_id, None)
+            fingerprint = (
+                calculate_index_fingerprint(index_config)
+                if index_config is not None
+                else None
+            )
+            # entries without fingerprint are not persisted, and valid until 'invalidate_index' is called
+            if self._pkg_lookup.is_current(_index_id, fingerprint):
+                return
+
+            index = await self.get_index(_index_id)
+            pkg_names = await index.pkg_names
+            self._pkg_lookup.set_index_pkgs(_index_id, pkg_names, fingerprint)
+
+        index_ids = list(self.index_ids)
+        async with create_task_group() as tg:
+            for index_id in index_ids:
+                await tg.spawn(run_limited, "network", refresh, index_id)
+
+        try:
+            self._pkg_lookup.save()
+        except Exception as e:
+            log.debug(f"Can't save package lookup table: {e}")
+
+        aliases = await self.get_index_aliases()
+        return self._pkg_lookup.get_index_ids(
+            pkg_name, index_ids=index_ids, aliases=aliases
+        )
+
     async def get_alias_pkg_map(self, *indexes: str) -> Mapping[str, PkgTing]:
 
+        key = tuple(sorted(indexes))
+        if key in self._alias_pkg_maps.keys():
+            return self._alias_pkg_maps[key]
+
         pkg_map = await self.get_pkg_map(*indexes)
 
         result: Dict[str, PkgTing] = {}
@@ -395,6 +467,7 @@ class Bring(SimpleTing):
             for pkg_name in sorted(index_map.keys()):
                 result[f"{index_name}.{pkg_name}"] = index_map[pkg_name]
 
+        self._alias_pkg_maps[key] = result
         return result
 
     async def get_pkg_property_map(
@@ -425,7 +498,7 @@ class Bring(SimpleTing):
         async with create_task_group() as tg:
             for pkg_name, pkg in alias_pkg_map.items():
 
-                await tg.spawn(add_pkg, pkg_name, pkg)
+                await tg.spawn(run_limited, "network", add_pkg, pkg_name, pkg)
 
         return result
 
@@ -468,14 +541,11 @@ class Bring(SimpleTing):
         _pkg_name, _index_name = parse_pkg_string(name)
         if _index_name is None:
             _index_name = await self.get_default_index()
-
-        if _index_name is None:
-            for id_n in self.index_ids:
-                idx = await self.get_index(id_n)
-                pkg_names = await idx.pkg_names
-                if _pkg_name in pkg_names:
-                    _index_name = idx.id
-                    break
+            default_index = await self.get_index(_index_name)
+            if _pkg_name not in await default_index.pkg_names:
+                # fall back to any other registered index that contains the package
+                index_ids = await self.find_indexes_for_pkg(_pkg_name)
+                _index_name = list(index_ids)[0] if index_ids else _index_name
 
         if _index_name is None:
             if raise_exception:
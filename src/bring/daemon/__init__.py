@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""A long-running bring process that keeps config, indexes and package metadata in memory.
+
+The daemon listens on a Unix socket ('BRING_DAEMON_SOCKET'). The client, and the message format, live in the
+'bring_client' package, so the cli can forward commands to a running daemon without importing bring itself.
+"""
+
+
+DAEMON_COMMANDS = [
+    "ping",
+    "status",
+    "list",
+    "explain",
+    "search",
+    "invalidate",
+    "shutdown",
+]
+"""Commands a daemon understands."""
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import io
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+from bring.bring import Bring
+from bring.config.bring_config import BringConfig
+from bring.daemon import DAEMON_COMMANDS
+from bring.defaults import BRING_DAEMON_SOCKET, BRING_DEFAULT_CONFIG_PROFILE
+from bring.interfaces.cli import LIGHT_THEME
+from bring.interfaces.cli.commands.explain import (
+    print_index_explanation,
+    print_pkg_explanation,
+)
+from bring.interfaces.cli.commands.search import print_search_results
+from bring.interfaces.cli.list_pkgs import (
+    create_index_pkg_list_string,
+    create_pkg_list_string,
+)
+from bring.pkg_index.folder_index import BringDynamicIndexTing
+from bring.pkg_index.index import BringIndexTing
+from bring.utils.watch import (
+    FileChange,
+    InotifyWatcher,
+    PollingWatcher,
+    create_watcher,
+)
+from bring_client import MAX_MESSAGE_SIZE, decode_message, encode_message
+from frkl.common.exceptions import FrklException
+from frkl.common.filesystem import ensure_folder
+from rich.console import Console
+
+
+log = logging.getLogger("bring")
+
+
+def create_output_console(output: io.StringIO, width: Optional[int] = None) -> Console:
+    """Create a console that renders into a buffer, using the same theme as the cli.
+
+    Output always contains color codes, the client removes them if it doesn't write to a terminal.
+    """
+
+    return Console(file=output, theme=LIGHT_THEME, width=width, force_terminal=True)
+
+
+class BringDaemon(object):
+    """Serves requests from the bring cli, using a warm (in-memory) bring instance.
+
+    Index sources (local index files and folders) and the config folder are watched: if an index source changes,
+    only that index is reloaded, if the configuration changes, everything is re-read.
+    """
+
+    def __init__(
+        self,
+        bring_config: BringConfig,
+        socket_path: str = BRING_DAEMON_SOCKET,
+        poll_interval: float = 1.0,
+    ):
+
+        self._bring_config: BringConfig = bring_config
+        self._socket_path: str = socket_path
+        self._poll_interval: float = poll_interval
+
+        self._watcher: Union[InotifyWatcher, PollingWatcher] = create_watcher()
+        self._config_path: str = os.path.realpath(
+            BRING_DEFAULT_CONFIG_PROFILE["config_path"]
+        )
+        self._index_paths: Dict[str, str] = {}
+
+        self._lock: Optional[asyncio.Lock] = None
+        self._shutdown: Optional[asyncio.Event] = None
+
+        self._started: Optional[float] = None
+        self._requests: int = 0
+
+    @property
+    def bring(self) -> Bring:
+
+        return self._bring_config.get_bring()
+
+    async def _prepare(
+        self, config_list: Iterable[Union[str, Mapping[str, Any]]]
+    ) -> Bring:
+
+        self.bring.config.set_config(*config_list)
+        await self.bring.add_all_config_indexes()
+        await self._watch_indexes()
+        return self.bring
+
+    async def _watch_indexes(self) -> None:
+
+        indexes: Mapping[str, BringIndexTing] = await self.bring.get_indexes()
+        for index_id, index in indexes.items():
+            if index_id in self._index_paths.keys():
+                continue
+            try:
+                uri = await index.get_uri()
+            except Exception:
+                continue
+            if not os.path.exists(uri):
+                continue
+            path = os.path.realpath(uri)
+            self._index_paths[index_id] = path
+            self._watcher.add_path(path)
+
+    def start(self) -> None:
+        """Initialize the state needed to handle requests, needs to be called from within the event loop."""
+
+        self._lock = asyncio.Lock()
+        self._shutdown = asyncio.Event()
+        self._started = time.time()
+        self._requests = 0
+
+    async def handle_request(self, request: Mapping[str, Any]) -> Mapping[str, Any]:
+
+        command = request.get("command", None)
+        args: Mapping[str, Any] = request.get("args", None) or {}
+        config_list: List[Union[str, Mapping[str, Any]]] = (
+            request.get("config", None) or []
+        )
+
+        if command not in DAEMON_COMMANDS:
+            return {"exit_code": 2, "error": f"Unknown daemon command: {command}"}
+
+        if command == "ping":
+            return {"exit_code": 0, "output": "pong\n"}
+
+        if command == "shutdown":
+            self._shutdown.set()  # type: ignore
+            return {"exit_code": 0, "output": "bring daemon shutting down\n"}
+
+        async with self._lock:  # type: ignore
+
+            if command == "status":
+                return {
+                    "exit_code": 0,
+                    "status": {
+                        "pid": os.getpid(),
+                        "uptime": time.time() - self._started,  # type: ignore
+                        "requests": self._requests,
+                        "indexes": sorted(self.bring.index_ids),
+                        "watched_paths": sorted(self._watcher.paths),
+                    },
+                }
+
+            if command == "invalidate":
+                await self.invalidate_all()
+                return {"exit_code": 0, "output": "bring daemon caches invalidated\n"}
+
+            bring = await self._prepare(config_list)
+
+            if command == "list":
+                index_name = args.get("index", None)
+                if index_name is None:
+                    output = await create_pkg_list_string(bring)
+                else:
+                    index = await bring.get_index(index_name)
+                    output = await create_index_pkg_list_string(index)
+                return {"exit_code": 0, "output": output}
+
+            buffer = io.StringIO()
+            console = create_output_console(buffer, width=request.get("width", None))
+            if command == "explain":
+                if args.get("target", None) == "package":
+                    await print_pkg_explanation(console, bring, args["package"])
+                else:
+                    await print_index_explanation(
+                        console,
+                        bring,
+                        indexes=args.get("indexes", None),
+                        update=args.get("update", False),
+                    )
+            elif command == "search":
+                await print_search_results(
+                    console, bring, args["query"], limit=args.get("limit", 25)
+                )
+            else:
+                return {
+                    "exit_code": 2,
+                    "error": f"Daemon command not implemented: {command}",
+                }
+
+            return {"exit_code": 0, "output": buffer.getvalue()}
+
+        return {"exit_code": 2, "error": f"Daemon command not implemented: {command}"}
+
+    async def invalidate_all(self) -> None:
+
+        for index_id in list(self._index_paths.keys()):
+            await self.invalidate_index(index_id)
+        await self._bring_config.get_contexts(update=True)
+        self._bring_config.invalidate()
+
+    async def invalidate_index(self, index_id: str) -> None:
+
+        path = self._index_paths.pop(index_id, None)
+        if path is not None and path not in self._index_paths.values():
+            self._watcher.remove_path(path)
+
+        self.bring.invalidate_index(index_id)
+        index = (await self.bring.get_indexes()).get(index_id, None)
+        if index is not None:
+            log.debug(f"Reloading index: {index_id}")
+            await index.reload()
+
+    async def process_changes(self, changes: Iterable[FileChange]) -> None:
+
+        watched = set(c.watched_path for c in changes)
+        if not watched:
+            return
+
+        async with self._lock:  # type: ignore
+            if self._config_path in watched:
+                log.debug("Config changed, invalidating everything.")
+                await self.invalidate_all()
+                return
+
+            for index_id, path in list(self._index_paths.items()):
+                if path not in watched:
+                    continue
+                index = (await self.bring.get_indexes()).get(index_id, None)
+                if isinstance(index, BringDynamicIndexTing):
+                    # only the packages whose files changed need to be updated
+                    index_changes = [c for c in changes if c.watched_path == path]
+                    if await index.apply_file_changes(index_changes):
+                        self.bring.invalidate_index(index_id)
+                else:
+                    await self.invalidate_index(index_id)
+
+            await self._watch_indexes()
+
+    async def _watch(self) -> None:
+
+        while not self._shutdown.is_set():  # type: ignore
+            await asyncio.sleep(self._poll_interval)
+            try:
+                changes = self._watcher.check()
+                if changes:
+                    await self.process_changes(changes)
+            except Exception as e:
+                log.warning(f"Error processing file changes: {e}")
+                log.debug("Error processing file changes.", exc_info=True)
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            self._requests = self._requests + 1
+            try:
+                request = decode_message(line)
+                response = await self.handle_request(request)
+            except Exception as e:
+                log.debug("Error handling daemon request.", exc_info=True)
+                response = {"exit_code": 1, "error": str(e)}
+
+            writer.write(encode_message(response))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+
+        if os.path.exists(self._socket_path):
+            raise FrklException(
+                msg="Can't start bring daemon.",
+                reason=f"Socket file already exists: {self._socket_path}",
+                solution="Make sure no other bring daemon is running, then delete the socket file.",
+            )
+
+        ensure_folder(os.path.dirname(self._socket_path))
+
+        self.start()
+
+        # warm up config, indexes and packages before accepting requests
+        try:
+            bring = await self._prepare(self._bring_config.config_input)
+            await bring.get_pkg_map()
+        except Exception as e:
+            log.warning(f"Error loading indexes: {e}")
+            log.debug("Error loading indexes.", exc_info=True)
+        self._watcher.add_path(self._config_path)
+
+        # create the socket with the right permissions, instead of fixing them (racily) afterwards
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(
+                self._handle_client, path=self._socket_path, limit=MAX_MESSAGE_SIZE
+            )
+        finally:
+            os.umask(old_umask)
+        watch_task = asyncio.ensure_future(self._watch())
+
+        try:
+            await self._shutdown.wait()
+        finally:
+            watch_task.cancel()
+            self._watcher.close()
+            server.close()
+            await server.wait_closed()
+            if os.path.exists(self._socket_path):
+                os.unlink(self._socket_path)
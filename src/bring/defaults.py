@@ -4,6 +4,7 @@ import sys
 from typing import Any, Dict, Mapping
 
 from appdirs import AppDirs
+from bring_client import BRING_DAEMON_SOCKET  # noqa: F401
 from frkl.common.jinja_templating import get_global_jinja_env
 
 
@@ -19,6 +20,9 @@ else:
 # BRING_CONTEXTS_FOLDER = os.path.join(BRING_APP_DIRS.user_config_dir, "indexes")
 
 BRING_RESOURCES_FOLDER = os.path.join(BRING_MODULE_BASE_FOLDER, "resources")
+BRING_PLUGIN_MANIFEST_FILE = os.path.join(
+    BRING_RESOURCES_FOLDER, "plugin_manifest.json"
+)
 # BRING_DEFAULT_CONTEXTS_FOLDER = os.path.join(BRING_RESOURCES_FOLDER, "default_indexes")
 
 BRING_DOWNLOAD_CACHE = os.path.join(bring_app_dirs.user_cache_dir, "downloads")
@@ -34,6 +38,13 @@ BRING_RESULTS_FOLDER = os.path.join(BRING_WORKSPACE_FOLDER, "results")
 BRING_PKG_CACHE = os.path.join(bring_app_dirs.user_cache_dir, "pkgs")
 BRING_PKG_VERSION_CACHE = os.path.join(bring_app_dirs.user_cache_dir, "pkg_versions")
 BRING_PLUGIN_CACHE = os.path.join(bring_app_dirs.user_cache_dir, "plugins")
+BRING_SEARCH_INDEX_CACHE = os.path.join(bring_app_dirs.user_cache_dir, "search")
+BRING_PKG_LOOKUP_FILE = os.path.join(bring_app_dirs.user_cache_dir, "index_lookup.json")
+BRING_MANIFEST_CACHE = os.path.join(bring_app_dirs.user_cache_dir, "manifests")
+BRING_URL_PROBE_CACHE_FILE = os.path.join(
+    bring_app_dirs.user_cache_dir, "url_probes.json"
+)
+BRING_URL_PROBE_MAX_AGE = 60 * 60 * 24
 
 BRING_BACKUP_FOLDER = os.path.join(bring_app_dirs.user_data_dir, "backup")
 
@@ -41,11 +52,12 @@ BRING_DEFAULT_LOG_FILE = os.path.join(bring_app_dirs.user_data_dir, "logs", "bri
 
 DEFAULT_CONTEXT_NAME = "binaries"
 
+# plugin modules (mogrifiers, pkg types) are not preloaded, they are imported on first use, see 'bring.utils.plugins'
 BRINGISTRY_PRELOAD_MODULES = [
     "bring.bring",
     "bring.pkg",
-    "bring.pkg_types.*",
-    "bring.mogrify.*",
+    "bring.pkg_types",
+    "bring.mogrify",
     "bring.plugins.*",
     "bring.plugins.templating.*",
     "bring.pkg_index.*",
@@ -229,3 +241,12 @@ DEFAULT_FOLDER_INDEX_EXTENSION = ".idx.br"
 DEFAULT_FOLDER_INDEX_NAME = f"this{DEFAULT_FOLDER_INDEX_EXTENSION}"
 
 BRING_DEFAULT_MAX_PARALLEL_TASKS = 8
+
+BRING_CONCURRENCY_LIMITS: Dict[str, int] = {
+    "network": 16,
+    "git": 4,
+    "disk": 8,
+    "cpu": os.cpu_count() or 2,
+    "install": BRING_DEFAULT_MAX_PARALLEL_TASKS,
+}
+"""Default max number of concurrent operations per resource class, see 'bring.utils.concurrency'."""
@@ -5,7 +5,7 @@ from typing import Any, Dict, Iterable, Mapping, MutableMapping, Optional
 
 from anyio import create_task_group
 from bring.bring import Bring
-from bring.pkg_types import get_pkg_type_plugin_factory
+from bring.pkg_types import get_pkg_type, get_pkg_type_plugin_factory
 from frkl.common.doc import Doc
 from frkl.explain.explanation import Explanation
 
@@ -76,7 +76,9 @@ class PluginExplanation(Explanation):
 class PkgTypeExplanation(PluginExplanation):
     async def augment_metadata(self, current: MutableMapping[str, Any]) -> None:
 
-        plugin = self._plugin_factory.get_singleton(self._plugin_name)
+        plugin = get_pkg_type(
+            self._bring.arg_hive, self._plugin_name, raise_exception=True
+        )
 
         args = plugin.get_args()
         record_arg = self._bring.arg_hive.create_record_arg(childs=args)
@@ -11,6 +11,8 @@ from bring.defaults import BRING_DEFAULT_MAX_PARALLEL_TASKS, BRING_WORKSPACE_FOL
 from bring.frecklets import BringFrecklet, parse_target_data
 from bring.frecklets.install_pkg import InstallMergeResult
 from bring.utils import parse_pkg_string
+from bring.utils.concurrency import get_limit, override_limit
+from bring.utils.metrics import measure_phase
 from freckles.core.frecklet import FreckletVar
 from frkl.args.arg import Arg, RecordArg
 from frkl.common.exceptions import FrklException
@@ -308,8 +310,14 @@ class ParallelAssemblyTask(Tasks):
 
     async def execute_tasklets(self, *tasklets: Task) -> None:
 
-        for t in tasklets:
-            await t.run_async(raise_exception=True)
+        max_parallel = self._max_parallel_tasks
+        if not max_parallel:
+            max_parallel = get_limit("install")
+
+        # the parallel task container doesn't enforce the max, so the install tasks do
+        with measure_phase("install_assembly"), override_limit("install", max_parallel):
+            for t in tasklets:
+                await t.run_async(raise_exception=True)
 
     async def create_result_value(self, *tasklets: Task) -> Any:
 
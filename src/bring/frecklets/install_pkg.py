@@ -13,6 +13,8 @@ from bring.mogrify import Transmogrificator
 from bring.mogrify.transform_folder import PkgContentLocalFolder
 from bring.pkg import PkgTing
 from bring.pkg_index.index import BringIndexTing
+from bring.utils.concurrency import limit
+from bring.utils.metrics import measure_phase
 from bring.utils.pkg_spec import PkgSpec
 from freckles.core.frecklet import FreckletException, FreckletVar
 from frkl.args.arg import RecordArg
@@ -122,9 +124,10 @@ class PkgContentTask(Task):
         source_folder = self._prior_task_result.result_value["folder_path"]
         folder = PkgContentLocalFolder(path=self._target, pkg_spec=self._pkg_spec)
 
-        merge_result = await folder.merge_folders(
-            source_folder, item_metadata=self._item_metadata
-        )
+        async with limit("disk"):
+            merge_result = await folder.merge_folders(
+                source_folder, item_metadata=self._item_metadata
+            )
         merge_result.add_metadata("transform", self._pkg_spec.to_dict())
 
         result = {"folder_path": self._target, "merge_result": merge_result}
@@ -180,9 +183,10 @@ class MoveToTargetTask(Task):
             _item_metadata = self._item_metadata
 
         target_folder = TrackingLocalFolder(path=_target_path)
-        merge_result = await target_folder.merge_folders(
-            source_folder, item_metadata=_item_metadata, merge_config=_merge_config
-        )
+        async with limit("disk"):
+            merge_result = await target_folder.merge_folders(
+                source_folder, item_metadata=_item_metadata, merge_config=_merge_config
+            )
 
         merge_result.add_metadata("item_metadata", _item_metadata)
 
@@ -266,8 +270,10 @@ class BringInstallTask(Tasks):
 
     async def execute_tasklets(self, *tasklets: Task) -> None:
 
-        for t in tasklets:
-            await t.run_async(raise_exception=True)
+        async with limit("install"):
+            with measure_phase("install_pkg"):
+                for t in tasklets:
+                    await t.run_async(raise_exception=True)
 
     async def create_result_value(self, *tasklets: Task) -> Any:
 
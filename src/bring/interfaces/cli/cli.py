@@ -3,6 +3,7 @@
 import sys
 
 import asyncclick as click
+from bring._startup import startup_phase
 from bring.interfaces.cli.command_group import BringCommandGroup
 from frkl.project_meta import AppEnvironment
 
@@ -19,7 +20,8 @@ click.anyio_backend = "asyncio"
 AppEnvironment.set_main_app("bring")
 
 
-cli = BringCommandGroup()
+with startup_phase("command_group"):
+    cli = BringCommandGroup()
 
 if __name__ == "__main__":
     exit_code = cli(_anyio_backend="asyncio")  # pragma: no cover
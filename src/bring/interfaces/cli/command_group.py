@@ -5,6 +5,7 @@ from typing import Any, Mapping, Optional
 
 from asyncclick import Option
 from bring import BRING
+from bring._startup import startup_phase
 from bring.bring import Bring
 from bring.config.bring_config import BringConfig
 from bring.defaults import BRINGISTRY_INIT, BRING_DEFAULT_LOG_FILE
@@ -155,6 +156,7 @@ class BringCommandGroup(FrklBaseCommand):
             "install",
             "explain",
             "list",
+            "search",
             "update",
             "export-index",
             "create",
@@ -162,6 +164,7 @@ class BringCommandGroup(FrklBaseCommand):
             "doc",
             "plugin",
             "self",
+            "daemon",
             # "differ",
         ]
 
@@ -229,8 +232,10 @@ class BringCommandGroup(FrklBaseCommand):
 
         if not is_list_command:
 
-            self.bring.config.set_config(*config_list)
-            await self.bring.add_all_config_indexes()
+            with startup_phase("load_config"):
+                self.bring.config.set_config(*config_list)
+            with startup_phase("register_indexes"):
+                await self.bring.add_all_config_indexes()
 
         if name == "list":
 
@@ -259,6 +264,12 @@ class BringCommandGroup(FrklBaseCommand):
         #     command = BringPluginGroup(bring=self.bring, name="plugin")
         #     command.short_help = "install one or a list of packages"
 
+        elif name == "search":
+            from bring.interfaces.cli.commands.search import BringSearchCommand
+
+            command = BringSearchCommand(bring=self.bring, name="search")
+            command.short_help = "search packages in all registered indexes"
+
         elif name == "update":
             from bring.interfaces.cli.commands.update import BringUpdateCommand
 
@@ -286,6 +297,12 @@ class BringCommandGroup(FrklBaseCommand):
             command = BringExportIndexCommand(bring=self.bring, name="export")
             command.short_help = "export index folder metadata to file"
 
+        elif name == "daemon":
+            from bring.interfaces.cli.commands.daemon import BringDaemonCommand
+
+            command = BringDaemonCommand(bring=self.bring, name="daemon")
+            command.short_help = "keep indexes in memory and serve cli requests"
+
         elif name == "self":
 
             from frkl.args.cli.click_commands.self_command import SelfCommandGroup
@@ -8,7 +8,7 @@ import asyncclick as click
 from anyio import aopen
 from asyncclick import Argument, Option
 from bring.defaults import DEFAULT_PKG_EXTENSION
-from bring.pkg_types import PkgType, get_pkg_type_plugin_factory
+from bring.pkg_types import PkgType, get_pkg_type, get_pkg_type_plugin_factory
 from frkl.args.arg import RecordArg
 from frkl.args.cli.click_commands import FrklBaseCommand
 from frkl.args.hive import ArgHive
@@ -75,7 +75,9 @@ class BringCreatePkgDescGroup(FrklBaseCommand):
         return self._plugin_factory.plugin_names
 
     async def _get_command(self, ctx, name):
-        plugin: PkgType = self._plugin_factory.get_singleton(name, raise_exception=True)
+        plugin: PkgType = get_pkg_type(  # type: ignore
+            self.arg_hive, name, raise_exception=True
+        )
 
         command = BringCreatePkgDescCommand(
             name=name, plugin=plugin, arg_hive=self.arg_hive
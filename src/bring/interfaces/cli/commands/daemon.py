@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import json
+
+import asyncclick as click
+from asyncclick import Option
+from bring.bring import Bring
+from bring.defaults import BRING_DAEMON_SOCKET
+from bring_client import DaemonNotAvailable, send_request
+
+
+DAEMON_HELP = """Run a bring daemon, which keeps indexes and package metadata in memory.
+
+While a daemon is running, the 'list' command is forwarded to it by the cli. Set the 'BRING_NO_DAEMON' environment variable to disable that.
+"""
+
+
+class BringDaemonCommand(click.Command):
+    def __init__(self, name: str, bring: Bring):
+
+        self._bring: Bring = bring
+
+        params = [
+            Option(
+                ["--socket"],
+                required=False,
+                default=BRING_DAEMON_SOCKET,
+                show_default=True,
+                help="the path of the socket file",
+            ),
+            Option(
+                ["--poll-interval"],
+                type=float,
+                default=1.0,
+                show_default=True,
+                help="how often (in seconds) to check indexes and config for changes",
+            ),
+            Option(
+                ["--status"], is_flag=True, help="display status of a running daemon",
+            ),
+            Option(["--stop"], is_flag=True, help="stop a running daemon"),
+        ]
+
+        super().__init__(
+            name=name, callback=self.daemon, params=params, help=DAEMON_HELP
+        )
+
+    async def daemon(self, socket: str, poll_interval: float, status: bool, stop: bool):
+
+        if status or stop:
+            command = "shutdown" if stop else "status"
+            try:
+                response = send_request({"command": command}, socket_path=socket)
+            except DaemonNotAvailable as e:
+                click.echo(str(e), err=True)
+                raise click.exceptions.Exit(1)
+
+            if "status" in response.keys():
+                click.echo(json.dumps(response["status"], indent=2))
+            else:
+                click.echo(response.get("output", ""), nl=False)
+            return
+
+        from bring.daemon.server import BringDaemon
+
+        daemon = BringDaemon(
+            bring_config=self._bring.config,
+            socket_path=socket,
+            poll_interval=poll_interval,
+        )
+        click.echo(f"bring daemon starting, socket: {socket}")
+        await daemon.serve()
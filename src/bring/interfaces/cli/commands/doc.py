@@ -7,13 +7,14 @@ from bring.bring import Bring
 from bring.config.bring_config import BringConfig
 from bring.interfaces.cli import bring_code_theme, bring_style, console
 from bring.mogrify import Mogrifier
-from bring.pkg_types import PkgType, get_pkg_type_plugin_factory
+from bring.pkg_types import PkgType, get_pkg_type
 from bring.utils.doc import create_pkg_type_markdown_string
+from bring.utils.plugins import load_plugin_modules
 from freckles.core.freckles import Freckles
 from frkl.args.cli.click_commands import FrklBaseCommand
 from frkl.args.hive import ArgHive
 from frkl.args.renderers.rich import to_rich_table
-from frkl.types.plugins import PluginFactory, PluginManager
+from frkl.types.plugins import PluginManager
 from frkl.types.typistry import Typistry
 from rich import box
 from rich.console import RenderGroup
@@ -86,13 +87,19 @@ class BringDocGroup(FrklBaseCommand):
 
 class BringPluginGroup(FrklBaseCommand):
     def __init__(
-        self, name: str, freckles: Freckles, plugin_class: Type, arg_hive: ArgHive
+        self,
+        name: str,
+        freckles: Freckles,
+        plugin_class: Type,
+        plugin_type: str,
+        arg_hive: ArgHive,
     ):
 
         self._freckles: Freckles = freckles
         self._tingistry: Tingistry = self._freckles.tingistry
 
         self._plugin_class: Type = plugin_class
+        self._plugin_type: str = plugin_type
         self._plugin_manager: Optional[PluginManager] = None
 
         self._bring: Optional[Bring] = None
@@ -103,6 +110,7 @@ class BringPluginGroup(FrklBaseCommand):
     def get_plugin_manager(self) -> PluginManager:
 
         if self._plugin_manager is None:
+            load_plugin_modules(self._plugin_type)
             self._plugin_manager = self.arg_hive.typistry.get_plugin_manager(
                 self._plugin_class
             )
@@ -132,17 +140,14 @@ class BringPluginGroup(FrklBaseCommand):
 class PkgTypePluginGroup(BringPluginGroup):
     def __init__(self, freckles: Freckles, arg_hive: ArgHive):
 
-        self._plugin_factory: Optional[PluginFactory] = None
         super().__init__(
-            name="pkg-type", freckles=freckles, plugin_class=PkgType, arg_hive=arg_hive
+            name="pkg-type",
+            freckles=freckles,
+            plugin_class=PkgType,
+            plugin_type="pkg_types",
+            arg_hive=arg_hive,
         )
 
-    def get_plugin_factory(self) -> PluginFactory:
-
-        if self._plugin_factory is None:
-            self._plugin_factory = get_pkg_type_plugin_factory(self.arg_hive)
-        return self._plugin_factory
-
     async def _get_command(self, ctx, name):
 
         if name not in self.get_plugin_manager().plugin_names:
@@ -170,7 +175,7 @@ class PkgTypePluginGroup(BringPluginGroup):
             )
             all.append(desc)
 
-            plugin = self.get_plugin_factory().get_singleton(name)
+            plugin = get_pkg_type(self.arg_hive, name, raise_exception=True)
 
             args = plugin.get_args()
             record_arg = self.arg_hive.create_record_arg(childs=args)
@@ -202,6 +207,7 @@ class MogrifyPluginGroup(BringPluginGroup):
             name="mogrifier",
             freckles=freckles,
             plugin_class=Mogrifier,
+            plugin_type="mogrifiers",
             arg_hive=arg_hive,
         )
 
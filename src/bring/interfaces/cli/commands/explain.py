@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
 import os
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional
 
 import asyncclick as click
 from bring.bring import Bring
@@ -11,18 +11,75 @@ from bring.doc.index import IndexExplanation
 from bring.doc.pkg import PkgExplanation
 from bring.interfaces.cli import console
 from bring.interfaces.cli.config import BringContextGroup
-from bring.pkg_types import PkgType, get_pkg_type_plugin_factory
+from bring.pkg_types import PkgType, get_pkg_type
 from frkl.args.cli.click_commands import FrklBaseCommand
 from frkl.args.hive import ArgHive
 from frkl.common.cli.exceptions import handle_exc_async
 from frkl.common.formats.auto import AutoInput
 from frkl.explain.explanations.doc import InfoListExplanation
 from frkl.targets.local_folder import TrackingLocalFolder
-from frkl.types.plugins import PluginFactory
+from rich.console import Console
 
 
 log = logging.getLogger("bring")
 
+
+async def print_index_explanation(
+    console: Console,
+    bring: Bring,
+    indexes: Optional[Iterable[str]] = None,
+    update: bool = False,
+) -> None:
+    """Print details about one or several indexes (all registered ones, if none are specified)."""
+
+    full = True
+    index_names: List[str] = list(indexes) if indexes else []
+    if len(index_names) == 1:
+
+        console.line()
+        idx = await bring.get_index(index_name=index_names[0])
+
+        display = IndexExplanation(
+            name=index_names[0], data=idx, update=update, full_info=full
+        )
+        console.print(display)
+        return
+
+    if not index_names:
+        index_names = list(bring.index_ids)
+        full = False
+
+    info_items = []
+    for index in index_names:
+        idx = await bring.get_index(index_name=index)
+        display = IndexExplanation(name=index, data=idx, update=update, full_info=full)
+        info_items.append(display)
+
+    expl = InfoListExplanation(*info_items, full_info=full)
+
+    console.print(expl)
+
+
+async def print_pkg_explanation(console: Console, bring: Bring, package: str) -> None:
+    """Print details about a package (from one of the registered indexes) and its arguments."""
+
+    console.line()
+    pkg = await bring.get_pkg(name=package, raise_exception=True)
+
+    full_name = await bring.get_full_package_name(package)
+
+    vals = await pkg.get_values()
+
+    pkg_info: PkgExplanation = PkgExplanation(
+        pkg_name=full_name,
+        pkg_metadata=vals["metadata"],
+        info=vals["info"],
+        tags=vals["tags"],
+        labels=vals["labels"],
+    )
+    console.print(pkg_info)
+
+
 INFO_HELP = """Display information about a config context, an index, a package or a target.
 """
 
@@ -127,34 +184,10 @@ class BringInfoPkgsGroup(FrklBaseCommand):
             @click.pass_context
             async def command(ctx, indexes, update):
 
-                full = True
                 bring = await self.get_bring()
-                if len(indexes) == 1:
-
-                    console.line()
-                    idx = await bring.get_index(index_name=indexes[0])
-
-                    display = IndexExplanation(
-                        name=indexes[0], data=idx, update=update, full_info=full
-                    )
-                    console.print(display)
-                    return
-
-                if not indexes:
-                    indexes = bring.index_ids
-                    full = False
-
-                info_items = []
-                for index in indexes:
-                    idx = await bring.get_index(index_name=index)
-                    display = IndexExplanation(
-                        name=index, data=idx, update=update, full_info=full
-                    )
-                    info_items.append(display)
-
-                expl = InfoListExplanation(*info_items, full_info=full)
-
-                console.print(expl)
+                await print_index_explanation(
+                    console, bring, indexes=indexes, update=update
+                )
 
             return command
 
@@ -191,12 +224,10 @@ class BringInfoPkgsGroup(FrklBaseCommand):
                     source = desc.pop("source")
 
                     pkg_type = source["type"]
-                    plugin_factory: PluginFactory = get_pkg_type_plugin_factory(
-                        self.arg_hive
+                    plugin: PkgType = get_pkg_type(  # type: ignore
+                        self.arg_hive, pkg_type, raise_exception=True
                     )
 
-                    plugin: PkgType = plugin_factory.get_singleton(pkg_type)
-
                     pkg_metadata = await plugin.get_pkg_metadata(source_details=source)
 
                     md = PkgExplanation(
@@ -209,21 +240,7 @@ class BringInfoPkgsGroup(FrklBaseCommand):
 
                 else:
                     bring = await self.get_bring()
-                    console.line()
-                    pkg = await bring.get_pkg(name=package, raise_exception=True)
-
-                    full_name = await self._bring.get_full_package_name(package)
-
-                    vals = await pkg.get_values()
-
-                    pkg_info: PkgExplanation = PkgExplanation(
-                        pkg_name=full_name,
-                        pkg_metadata=vals["metadata"],
-                        info=vals["info"],
-                        tags=vals["tags"],
-                        labels=vals["labels"],
-                    )
-                    console.print(pkg_info)
+                    await print_pkg_explanation(console, bring, package)
 
             return command
 
@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
-import gzip
-import json
 import logging
 import os
 import sys
@@ -11,7 +9,10 @@ from asyncclick.core import Argument, Option
 from bring.bring import Bring
 from bring.defaults import BRING_METADATA_FOLDER_NAME, DEFAULT_FOLDER_INDEX_NAME
 from bring.interfaces.cli import console
+from bring.pkg_index.binary_index import read_index_file, write_index_file
+from bring.pkg_index.delta import write_index_deltas
 from bring.pkg_index.utils import IndexDiff
+from bring.utils.concurrency import enable_process_pool
 from frkl.common.filesystem import ensure_folder
 
 
@@ -49,12 +50,43 @@ class BringExportIndexCommand(click.Command):
                 help="check export for inconsistencies and errors",
                 is_flag=True,
             ),
+            Option(
+                ["--format", "index_format"],
+                type=click.Choice(["json", "binary"]),
+                default="json",
+                show_default=True,
+                help="the index file format, 'binary' allows reading single packages without loading the whole index, but requires a recent version of bring",
+            ),
+            Option(
+                ["--full"],
+                is_flag=True,
+                help="re-resolve all packages, instead of only the ones that changed since the last export",
+            ),
+            Option(
+                ["--deltas", "-d"],
+                is_flag=True,
+                help="also write a manifest and delta files, so clients can update without downloading the whole index",
+            ),
+            Option(
+                ["--no-process-pool"],
+                is_flag=True,
+                help="process package metadata in this process, instead of a pool of worker processes",
+            ),
         ]
         super().__init__(name=name, callback=self.export_index, params=params, **kwargs)
 
     @click.pass_context
     async def export_index(
-        ctx, self, output_file, index: str, force: bool, check: bool
+        ctx,
+        self,
+        output_file,
+        index: str,
+        force: bool,
+        check: bool,
+        index_format: str,
+        full: bool,
+        deltas: bool,
+        no_process_pool: bool,
     ):
 
         click.echo()
@@ -82,8 +114,19 @@ class BringExportIndexCommand(click.Command):
             click.echo("found '.bring/pkgs' subfolder, using this to find packages...")
             _index = bring_pkgs_folder
 
+        old_index_data = None
+        if os.path.exists(_path):
+            try:
+                old_index_data = read_index_file(_path)
+            except Exception as e:
+                log.debug(f"Can't read previous index file '{_path}': {e}")
+
+        enable_process_pool(not no_process_pool)
+
         index_obj = await self._bring.get_index(_index)
-        exported_index = await index_obj.export_index()
+        exported_index = await index_obj.export_index(
+            previous_index=None if full else old_index_data
+        )
 
         empty: bool = True
         for k in exported_index.keys():
@@ -131,8 +174,12 @@ class BringExportIndexCommand(click.Command):
             console.line()
             console.print(f"Exporting index to file: {_path}")
 
-            json_data = json.dumps(exported_index, indent=2) + "\n"
-            json_bytes = json_data.encode("utf-8")
+            write_index_file(_path, exported_index, index_format=index_format)
 
-            with gzip.GzipFile(_path, "w") as f:
-                f.write(json_bytes)
+            if deltas:
+                manifest = write_index_deltas(
+                    _path, exported_index, old_index_data=old_index_data
+                )
+                console.print(
+                    f"Wrote index manifest (version: {manifest['version']}, deltas available for {len(manifest['history'])} previous version(s))."
+                )
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 import os
 import sys
+from contextlib import ExitStack
 from typing import Dict, Mapping, Optional, Union
 
 import asyncclick as click
 from bring.bring import Bring
 from bring.interfaces.cli.utils import print_pkg_list_help
 from bring.pkg import PKG_INPUT_TYPE
+from bring.utils.profiling import ProfileSummary, collect_step_profiles
 from freckles.core.explanation import FreckletInputExplanation
 from frkl.args.arg import Arg
 from frkl.args.cli.click_commands import FrklBaseCommand
@@ -114,6 +116,12 @@ class BringInstallGroup(FrklBaseCommand):
                 "required": False,
                 "cli": {"is_flag": True},
             },
+            "profile": {
+                "doc": "Record timing and I/O of every install step, and print a summary.",
+                "type": "boolean",
+                "required": False,
+                "cli": {"is_flag": True},
+            },
             # "merge_strategy": {
             #     "doc": "Strategy on how to deal with existing files, options",
             #     "type": "merge_strategy",
@@ -130,6 +138,7 @@ class BringInstallGroup(FrklBaseCommand):
     async def _get_command(self, ctx, name):
 
         explain = self._group_params.get("explain")
+        profile = self._group_params.get("profile")
         load_details = not ctx.obj.get("list_install_commands", False)
         target = self._group_params_parsed.get("target", None)
         target_config = self._group_params_parsed.get("target_config", None)
@@ -258,8 +267,13 @@ class BringInstallGroup(FrklBaseCommand):
                 )
                 self._bring.add_app_event(expl)
 
+                profile_summary: Optional[ProfileSummary] = None
                 try:
-                    result = await frecklet.frecklecute()
+                    with ExitStack() as stack:
+                        if profile:
+                            profile_summary = ProfileSummary()
+                            stack.enter_context(collect_step_profiles(profile_summary))
+                        result = await frecklet.frecklecute()
                     merge_result = result.get_result_value("merge_result")
 
                     res = ResultEvent(merge_result)
@@ -269,6 +283,9 @@ class BringInstallGroup(FrklBaseCommand):
                     ee = ExceptionEvent(e)
                     self._bring.add_app_event(ee)
                     sys.exit(1)
+                finally:
+                    if profile_summary is not None:
+                        self._bring.add_app_event(profile_summary)
 
         if args_renderer:
             command.params = args_renderer.rendered_arg
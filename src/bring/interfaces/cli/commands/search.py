@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from typing import List
+
+import asyncclick as click
+from anyio import create_task_group
+from asyncclick import Argument, Option
+from bring.bring import Bring
+from bring.interfaces.cli import console
+from bring.pkg_index.search import PkgSearchIndex, get_search_index, search_pkgs
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+
+SEARCH_HELP = """Search packages of all registered indexes.
+
+Search terms match package names, descriptions, labels and tags (exact, prefix, or fuzzy). Results can be filtered with 'label:<key>=<value>', 'tag:<tag>' and 'index:<index_id>'.
+"""
+
+
+async def print_search_results(
+    console: Console, bring: Bring, query: str, limit: int = 25
+) -> None:
+    """Search the packages of all registered indexes, and print the results to the provided console."""
+
+    search_indexes: List[PkgSearchIndex] = []
+
+    async def load(_index_id: str):
+        index = await bring.get_index(_index_id)
+        search_indexes.append(await get_search_index(index))
+
+    async with create_task_group() as tg:
+        for index_id in bring.index_ids:
+            await tg.spawn(load, index_id)
+
+    results = search_pkgs(search_indexes, query, limit=limit)
+
+    console.line()
+    if not results:
+        console.print("  No matching packages.")
+        console.line()
+        return
+
+    table = Table(box=box.SIMPLE, show_header=False)
+    table.add_column("pkg", no_wrap=True, style="key2")
+    table.add_column("desc")
+    for result in results:
+        table.add_row(result.full_name, result.slug)
+    console.print(table)
+
+
+class BringSearchCommand(click.Command):
+    def __init__(self, name: str, bring: Bring):
+
+        self._bring: Bring = bring
+
+        params = [
+            Argument(["query"], required=True, nargs=-1),
+            Option(
+                ["--limit", "-l"],
+                type=int,
+                default=25,
+                show_default=True,
+                help="maximum number of results",
+            ),
+        ]
+
+        super().__init__(
+            name=name, callback=self.search, params=params, help=SEARCH_HELP
+        )
+
+    async def search(self, query, limit: int):
+
+        await print_search_results(console, self._bring, " ".join(query), limit=limit)
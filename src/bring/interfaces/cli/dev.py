@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
 import logging
+from typing import Any, List, Mapping
 
 import asyncclick as click
+from bring._startup import ImportNode, profile_startup
 from bring.bring import Bring
 from bring.pkg_types import PkgType
+from bring.utils.plugins import load_plugin_modules
 from frkl.args.arg import RecordArg
 from frkl.args.cli.click_commands import FrklBaseCommand
+from frkl.common.cli import get_console
+from rich import box
+from rich.console import Console, ConsoleOptions, RenderResult
+from rich.table import Table
 
 
 log = logging.getLogger("bring")
@@ -40,9 +47,16 @@ class BringDevGroup(FrklBaseCommand):
 
     async def _list_commands(self, ctx):
 
-        return ["create-pkg"]
+        return ["create-pkg", "startup-profile"]
 
     async def _get_command(self, ctx, name):
+
+        if name == "startup-profile":
+            return BringStartupProfileCommand(name="startup-profile")
+        elif name != "create-pkg":
+            return None
+
+        load_plugin_modules("pkg_types")
         plugin_manager = self._bring.arg_hive.typistry.get_plugin_manager(PkgType)
         plugin: PkgType = plugin_manager.get_plugin("github_release")
         command = BringCreatePkgCommand(
@@ -85,3 +99,96 @@ class BringCreatePkgCommand(click.Command):
         # md = PkgExplanation(pkg_name="example_name", pkg_metadata=pkg_metadata, **desc)
         #
         # get_console().print(md)
+
+
+class StartupProfile(object):
+    """Renders the result of a startup profiling run, slowest imports first."""
+
+    def __init__(
+        self, profile: Mapping[str, Any], min_ms: float = 1.0, max_depth: int = 3
+    ):
+
+        self._profile: Mapping[str, Any] = profile
+        self._min_us: float = min_ms * 1000
+        self._max_depth: int = max_depth
+
+    def _add_import_rows(self, table: Table, nodes: List[ImportNode], depth: int):
+
+        for node in sorted(nodes, key=lambda n: n.cumulative_us, reverse=True):
+            if node.cumulative_us < self._min_us:
+                break
+            table.add_row(
+                ("  " * depth) + node.name,
+                f"{node.self_us / 1000:.1f}ms",
+                f"{node.cumulative_us / 1000:.1f}ms",
+            )
+            if depth + 1 < self._max_depth:
+                self._add_import_rows(table, node.children, depth + 1)
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+
+        total = self._profile["total"]
+        imports: List[ImportNode] = self._profile["imports"]
+        import_total = sum(n.cumulative_us for n in imports) / 1000000
+
+        yield f"[title]Startup profile[/title] (total: {total:.3f}s, imports: {import_total:.3f}s)"
+        yield ""
+
+        phases = Table(box=box.SIMPLE)
+        phases.add_column("phase")
+        phases.add_column("time", justify="right")
+        for phase in self._profile["phases"]:
+            phases.add_row(
+                ("  " * phase["depth"]) + phase["name"],
+                f"{phase.get('duration', 0) * 1000:.1f}ms",
+            )
+        yield phases
+
+        table = Table(box=box.SIMPLE)
+        table.add_column("module")
+        table.add_column("self", justify="right")
+        table.add_column("cumulative", justify="right")
+        self._add_import_rows(table, imports, 0)
+        yield table
+
+
+class BringStartupProfileCommand(click.Command):
+    def __init__(self, name: str, **kwargs):
+
+        params = [
+            click.Option(
+                ["--min-ms"],
+                type=float,
+                default=1.0,
+                show_default=True,
+                help="hide imports that took less than this (cumulative)",
+            ),
+            click.Option(
+                ["--depth"],
+                type=int,
+                default=3,
+                show_default=True,
+                help="maximum depth of the import tree",
+            ),
+            click.Argument(["args"], nargs=-1),
+        ]
+
+        super().__init__(
+            name=name,
+            callback=self.startup_profile,
+            params=params,
+            help="Profile the startup of bring (module imports and startup phases).\n\nAny arguments are forwarded to the profiled 'bring' process, the default is '--help'.",
+            **kwargs,
+        )
+
+    async def startup_profile(self, min_ms: float, depth: int, args):
+
+        profile = profile_startup(list(args) if args else None)
+        if profile["exit_code"] != 0:
+            log.warning(
+                f"Profiled bring process exited with code: {profile['exit_code']}"
+            )
+
+        get_console().print(StartupProfile(profile, min_ms=min_ms, max_depth=depth))
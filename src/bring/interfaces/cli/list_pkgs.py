@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from typing import Any, Mapping, Optional
+from typing import Any, Dict, Mapping, Optional
 
 import asyncclick as click
 from bring.bring import Bring
@@ -15,6 +15,48 @@ from frkl.args.cli.click_commands import FrklBaseCommand
 from frkl.common.strings import reindent
 
 
+async def create_pkg_list_string(bring: Bring) -> str:
+    """Render the packages of all registered indexes, the way 'bring list' displays them."""
+
+    index_ids = bring.index_ids
+
+    pkgs: Mapping[str, PkgTing] = await bring.get_alias_pkg_map()
+
+    pkgs_info: Mapping[str, Any] = await get_values_for_pkgs(pkgs, "info")
+
+    index_info: Dict[str, Dict[str, Any]] = {}
+    for pkg_name, info in pkgs_info.items():
+        pkg_name, index_name = parse_pkg_string(pkg_name)
+        if index_name is None:
+            raise Exception(
+                f"No index name for pkg: {pkg_name}. This is most likely a bug."
+            )
+        index_info.setdefault(index_name, {})[pkg_name] = info
+
+    lines = [""]
+    for idx_id in index_ids:
+        lines.append(click.style(idx_id, bold=True))
+        lines.append("")
+        table = create_info_table_string(index_info[idx_id])
+        lines.append(reindent(table, 2))
+        lines.append("")
+
+    return "\n".join(lines) + "\n"
+
+
+async def create_index_pkg_list_string(index: BringIndexTing) -> str:
+    """Render the packages of a single index, the way 'bring list <index>' displays them."""
+
+    _pkgs = await index.get_pkgs()
+
+    if not _pkgs:
+        table_str = "  No packages"
+    else:
+        table_str = await create_pkg_info_table_string(_pkgs)
+
+    return f"\n{table_str}\n\n"
+
+
 class BringListPkgsGroup(FrklBaseCommand):
     def __init__(
         self, bring: Bring, index: Optional[BringIndexTing] = None, name=None, **kwargs
@@ -67,29 +109,7 @@ class BringListPkgsGroup(FrklBaseCommand):
         if ctx.invoked_subcommand:  # type: ignore
             return
 
-        click.echo()
-        # all: Iterable[PkgTing] = await self._tingistry.get_all_pkgs()
-        index_ids = self._bring.index_ids
-
-        pkgs: Mapping[str, PkgTing] = await self._bring.get_alias_pkg_map()
-
-        pkgs_info: Mapping[str, Any] = await get_values_for_pkgs(pkgs, "info")
-
-        index_info = {}
-        for pkg_name, info in pkgs_info.items():
-            pkg_name, index_name = parse_pkg_string(pkg_name)
-            if index_name is None:
-                raise Exception(
-                    f"No index name for pkg: {pkg_name}. This is most likely a bug."
-                )
-            index_info.setdefault(index_name, {})[pkg_name] = info
-
-        for idx_id in index_ids:
-            click.secho(idx_id, bold=True)
-            click.echo()
-            table = create_info_table_string(index_info[idx_id])
-            click.echo(reindent(table, 2))
-            click.echo()
+        click.echo(await create_pkg_list_string(self._bring), nl=False)
 
     async def _list_commands(self, ctx):
 
@@ -104,16 +124,7 @@ class BringListPkgsGroup(FrklBaseCommand):
         @click.pass_context
         async def command(ctx, **kwargs):
 
-            print()
-
-            _pkgs = await index.get_pkgs()
-
-            if not _pkgs:
-                print("  No packages")
-            else:
-                table_str = await create_pkg_info_table_string(_pkgs)
-                click.echo(table_str)
-            print()
+            click.echo(await create_index_pkg_list_string(index), nl=False)
 
         ctx_info = await index.get_info()
         command.short_help = ctx_info.get("slug", "n/a")
@@ -6,9 +6,25 @@ import os
 import shutil
 import tempfile
 from abc import abstractmethod
-from typing import Any, Iterable, Mapping, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Type,
+    Union,
+)
 
 from bring.defaults import BRING_WORKSPACE_FOLDER
+from bring.utils.plugins import (
+    get_plugin_class,
+    get_plugin_names,
+    load_plugin_modules,
+)
+from bring.utils.profiling import profile_step
 from frkl.common.exceptions import FrklException
 from frkl.common.filesystem import ensure_folder
 from frkl.common.jinja_templating import replace_strings_in_obj
@@ -22,12 +38,17 @@ from tings.ting import SimpleTing, TingMeta
 from tings.tingistry import Tingistry
 
 
-# if TYPE_CHECKING:
-#     from bring.mogrify.parallel_pkg_merge import ParallelPkgMergeMogrifier
+if TYPE_CHECKING:
+    from bring.mogrify.parallel_pkg_merge import ParallelPkgMergeMogrifier
 
 
 log = logging.getLogger("bring")
 
+FILE_TREE_STEP_TYPES = ["file_filter", "flatten", "set_mode", "rename"]
+"""Mogrifier types that only move, filter or chmod files, and can be compiled into a single 'file_tree' step."""
+
+FILE_TREE_RELOCATING_STEP_TYPES = ["file_filter", "flatten"]
+
 
 def assemble_mogrifiers(
     mogrifier_list: Iterable[Union[Mapping, str]],
@@ -73,6 +94,68 @@ def assemble_mogrifiers(
     return mog_data
 
 
+def fuse_file_tree_steps(
+    mogrifier_list: Iterable[Any], min_steps: int = 2
+) -> List[Any]:
+    """Replace runs of consecutive file-tree mogrifiers in an (assembled) mogrifier list with a single 'file_tree' step.
+
+    Only runs that contain at least one step that relocates files ('file_filter' or 'flatten') are compiled, since
+    only those already create a new folder. Steps that specify their own 'folder_path' input are never fused.
+    Nested lists (parallel pipelines) are processed recursively.
+    """
+
+    result: List[Any] = []
+    run: List[Mapping[str, Any]] = []
+
+    def close_run():
+
+        if len(run) >= min_steps and any(
+            s["type"] in FILE_TREE_RELOCATING_STEP_TYPES for s in run
+        ):
+            steps = []
+            for s in run:
+                step = dict(s)
+                step.pop("_task_desc", None)
+                steps.append(step)
+            result.append(
+                {
+                    "type": "file_tree",
+                    "steps": steps,
+                    "_task_desc": run[0].get("_task_desc", None),
+                }
+            )
+        else:
+            result.extend(run)
+        run.clear()
+
+    for mog in mogrifier_list:
+        if isinstance(mog, collections.Mapping):
+            if (
+                mog.get("type", None) in FILE_TREE_STEP_TYPES
+                and "folder_path" not in mog.keys()
+            ):
+                run.append(mog)
+                continue
+            close_run()
+            result.append(mog)
+        elif isinstance(mog, collections.Iterable) and not isinstance(mog, str):
+            close_run()
+            branches: List[Any] = []
+            for branch in mog:
+                if isinstance(branch, collections.Mapping):
+                    branches.append(branch)
+                else:
+                    branches.append(fuse_file_tree_steps(branch, min_steps=min_steps))
+            result.append(branches)
+        else:
+            close_run()
+            result.append(mog)
+
+    close_run()
+
+    return result
+
+
 class Mogrifiception(FrklException):
     def __init__(self, *args, mogrifier: "Mogrifier" = None, **kwargs):
 
@@ -264,12 +347,17 @@ class Transmogrificator(SimpleTasks):
         super().__init__(**kwargs)
 
         self._current: Optional[Mogrifier] = None
+        self._first_item: Optional[Mogrifier] = None
         self._last_item: Optional[Mogrifier] = None
 
     @property
     def working_dir(self):
         return self._working_dir
 
+    @property
+    def first_mogrifier(self) -> Optional[Mogrifier]:
+        return self._first_item
+
     async def add_mogrifier(self, mogrifier: Mogrifier) -> None:
 
         mogrifier.working_dir = self._working_dir
@@ -277,13 +365,21 @@ class Transmogrificator(SimpleTasks):
             mogrifier.set_requirements(self._current)
 
         await self.add_tasklet(mogrifier)  # type: ignore
+        if self._first_item is None:
+            self._first_item = mogrifier
         self._current = mogrifier
         self._last_item = self._current
 
     async def execute_tasklets(self, *tasklets: Task) -> Any:
 
         for child in tasklets:
-            last_result = await child.run_async()
+            step_type = getattr(child, "_plugin_name", child.__class__.__name__)
+            step_id = child.name.split(".")[-1]  # type: ignore
+            with profile_step(
+                step_id=step_id, step_type=step_type, pipeline_id=self._id
+            ) as profile:
+                last_result = await child.run_async()
+                profile.success = last_result.success
             if not last_result.success:
                 # msg = "Error executing retrieval pipeline."
                 # exc = MogrifierException(child, last_result.error, msg=msg)  # type: ignore
@@ -317,12 +413,17 @@ class Transmogrificator(SimpleTasks):
 
 class Transmogritory(SimpleTing):
     """Registry that holds all mogrify plugins.
+
+    Built-in mogrifiers are loaded lazily: the module of a mogrifier is only imported when that mogrifier is first used
+    (using the plugin manifest). The full plugin factory (which imports all mogrifier modules) is only created if a
+    mogrifier is not in the manifest, or if it is requested explicitly.
     """
 
-    def __init__(self, name: str, meta: TingMeta, _load_plugins_at_init: bool = True):
+    def __init__(self, name: str, meta: TingMeta, _load_plugins_at_init: bool = False):
 
         self._tingistry_obj: Tingistry = meta.tingistry
         self._plugin_factory: Optional[PluginFactory] = None
+        self._registered_plugins: Set[str] = set()
 
         super().__init__(name=name, meta=meta)
         if _load_plugins_at_init:
@@ -347,15 +448,56 @@ class Transmogritory(SimpleTing):
         if self._plugin_factory is not None:
             return self._plugin_factory
 
+        load_plugin_modules("mogrifiers")
         self._plugin_factory = self._tingistry_obj.typistry.register_plugin_factory(
             "mogrifiers", Mogrifier, singleton=False, use_existing=False
         )
 
         for k, v in self._plugin_factory.plugin_type_map.items():
-            self._tingistry_obj.register_prototing(f"bring.mogrify.plugins.{k}", v)
+            self._register_mogrifier_prototing(k, v)
 
         return self._plugin_factory
 
+    @property
+    def plugin_names(self) -> Iterable[str]:
+
+        if self._plugin_factory is not None:
+            return self._plugin_factory.plugin_names
+        return get_plugin_names("mogrifiers")
+
+    def _register_mogrifier_prototing(
+        self, plugin_name: str, plugin_class: Type[Mogrifier]
+    ) -> None:
+
+        if plugin_name in self._registered_plugins:
+            return
+
+        self._tingistry_obj.register_prototing(
+            f"bring.mogrify.plugins.{plugin_name}", plugin_class
+        )
+        self._registered_plugins.add(plugin_name)
+
+    def ensure_mogrifier_plugin(self, mogrify_plugin: str) -> None:
+        """Make sure the prototing for the specified mogrifier is registered, importing its module if necessary."""
+
+        if mogrify_plugin in self._registered_plugins:
+            return
+
+        plugin_class: Optional[Type[Mogrifier]] = None
+        if self._plugin_factory is None:
+            plugin_class = get_plugin_class("mogrifiers", mogrify_plugin)
+
+        if plugin_class is None:
+            # not a built-in plugin, so we need to load all of them
+            if mogrify_plugin not in self.plugin_factory.plugin_names:
+                raise FrklException(
+                    msg="Can't create transmogrifier.",
+                    reason=f"No mogrify plugin '{mogrify_plugin}' available.",
+                )
+            return
+
+        self._register_mogrifier_prototing(mogrify_plugin, plugin_class)
+
     def create_mogrifier_ting(
         self,
         mogrify_plugin: str,
@@ -364,11 +506,7 @@ class Transmogritory(SimpleTing):
         input_vals: Mapping[str, Any],
     ) -> Mogrifier:
 
-        if mogrify_plugin not in self.plugin_factory.plugin_names:
-            raise FrklException(
-                msg="Can't create transmogrifier.",
-                reason=f"No mogrify plugin '{mogrify_plugin}' available.",
-            )
+        self.ensure_mogrifier_plugin(mogrify_plugin)
 
         # print("---")
         # print(input_vals)
@@ -385,6 +523,93 @@ class Transmogritory(SimpleTing):
 
         return ting
 
+    def create_mogrifier_ting_from_config(
+        self, mog_config: Mapping[str, Any], pipeline_id: str, index: str
+    ) -> Mogrifier:
+
+        vals = dict(mog_config)
+        mogrify_plugin: Optional[str] = vals.pop("type", None)
+        vals.pop("_task_desc", None)
+        if not mogrify_plugin:
+            raise FrklException(
+                msg="Can't create transmogrificator.",
+                reason=f"No mogrifier type specified in config: {mog_config}",
+            )
+
+        return self.create_mogrifier_ting(
+            mogrify_plugin=mogrify_plugin,
+            pipeline_id=pipeline_id,
+            index=index,
+            input_vals=vals,
+        )
+
+    async def create_parallel_mogrifier(
+        self,
+        branches: Iterable[Union[Mapping[str, Any], Iterable[Mapping[str, Any]]]],
+        pipeline_id: str,
+        index: str,
+        working_dir: str,
+    ) -> "ParallelPkgMergeMogrifier":
+        """Create a mogrifier that runs every one of the provided branches as its own pipeline, concurrently.
+
+        Each branch is either a single mogrifier config, or a list of them. Once all branches are finished, their
+        resulting folders are merged using the 'merge_folders' mogrifier.
+        """
+
+        tms: List[Transmogrificator] = []
+        for j, branch in enumerate(branches):
+
+            if isinstance(branch, collections.Mapping):
+                branch = [branch]
+            elif isinstance(branch, str) or not isinstance(
+                branch, collections.Iterable
+            ):
+                raise FrklException(
+                    msg="Can't create transmogrificator.",
+                    reason=f"Invalid configuration type for parallel pipeline '{type(branch)}': {branch}",
+                )
+
+            branch_id = f"{pipeline_id}_{index}_{j}"
+            td = TaskDesc(name=branch_id, msg=f"executing sub-pipeline '{branch_id}'",)
+            tm = Transmogrificator(
+                branch_id,
+                self._tingistry_obj,
+                task_desc=td,
+                working_dir=os.path.join(working_dir, f"{index}_{j}"),
+                is_root_transmogrifier=False,
+            )
+
+            for k, _m in enumerate(branch):
+                if not isinstance(_m, collections.Mapping):
+                    raise FrklException(
+                        msg="Can't create transmogrificator.",
+                        reason=f"Nested parallel pipelines are not supported: {_m}",
+                    )
+                t = self.create_mogrifier_ting_from_config(
+                    _m, pipeline_id=pipeline_id, index=f"{index}_{j}_{k}"
+                )
+                await tm.add_mogrifier(t)
+
+            tms.append(tm)
+
+        merge = self.create_mogrifier_ting(
+            mogrify_plugin="merge_folders",
+            pipeline_id=pipeline_id,
+            index=f"{index}_merge",
+            input_vals={},
+        )
+        p_ting: "ParallelPkgMergeMogrifier" = self.create_mogrifier_ting(  # type: ignore
+            mogrify_plugin="parallel_pkg_merge",
+            pipeline_id=pipeline_id,
+            index=index,
+            input_vals={"pipeline_id": pipeline_id},
+        )
+        p_ting.add_mogrificators(*tms)
+        p_ting.set_merge_task(merge)
+        p_ting.task_desc = TaskDesc(name="parallel_pkg_merge", msg=p_ting.get_msg())
+
+        return p_ting
+
     async def create_transmogrificator(
         self,
         data: Iterable[Union[Mapping[str, Any], str]],
@@ -392,6 +617,7 @@ class Transmogritory(SimpleTing):
         args: Mapping[str, Any],
         task_desc: Optional[TaskDesc] = None,
         pipeline_id: Optional[str] = None,
+        fuse_file_tree: bool = True,
         **kwargs,
     ) -> Transmogrificator:
 
@@ -406,6 +632,8 @@ class Transmogritory(SimpleTing):
             )
 
         mogrifier_list = assemble_mogrifiers(mogrifier_list=data, vars=vars, args=args)
+        if fuse_file_tree:
+            mogrifier_list = fuse_file_tree_steps(mogrifier_list)
 
         transmogrificator = Transmogrificator(
             pipeline_id, self._tingistry_obj, task_desc=task_desc, **kwargs,
@@ -415,97 +643,20 @@ class Transmogritory(SimpleTing):
 
             if isinstance(_mog, collections.Mapping):
 
-                vals = dict(_mog)
-                mogrify_plugin: Optional[str] = vals.pop("type", None)
-                vals.pop("_task_desc")
-                if not mogrify_plugin:
-                    raise FrklException(
-                        msg="Can't create transmogrificator.",
-                        reason=f"No mogrifier type specified in config: {mogrifier_list}",
-                    )
-
-                ting: Mogrifier = self.create_mogrifier_ting(
-                    mogrify_plugin=mogrify_plugin,
-                    pipeline_id=pipeline_id,
-                    index=str(index),
-                    input_vals=vals,
+                ting: Mogrifier = self.create_mogrifier_ting_from_config(
+                    _mog, pipeline_id=pipeline_id, index=str(index)
                 )
 
                 await transmogrificator.add_mogrifier(ting)
             elif isinstance(_mog, collections.Iterable):
 
-                raise NotImplementedError()
-                #
-                # tms = []
-                # for j, child_list in enumerate(_mog):
-                #
-                #     tings = []
-                #     guess_task_desc = None
-                #     for k, _m in enumerate(child_list):
-                #
-                #         if guess_task_desc is None and "_task_desc" in _m.keys():
-                #             guess_task_desc = _m["_task_desc"]
-                #
-                #         m = dict(_m)
-                #         mogrify_plugin = m.pop("type", None)
-                #         # sub_task_desc = m.pop("_task_desc", {})
-                #         if not mogrify_plugin:
-                #             raise FrklException(
-                #                 msg="Can't create transmogrificator.",
-                #                 reason=f"No mogrifier type specified in config: {mogrifier_list}",
-                #             )
-                #         t = self.create_mogrifier_ting(
-                #             mogrify_plugin=mogrify_plugin,
-                #             pipeline_id=pipeline_id,
-                #             index=f"{index}_{j}_{k}",
-                #             input_vals=m,
-                #             basetopic=basetopic
-                #         )
-                #         tings.append(t)
-                #
-                #     tm_working_dir = os.path.join(
-                #         transmogrificator.working_dir, f"{index}_{j}"
-                #     )
-                #     subtopic = f"{pipeline_id}.{index}_{j}"
-                #     if guess_task_desc:
-                #         td = BringTaskDesc(subtopic=subtopic)
-                #         if "name" in guess_task_desc.keys():
-                #             td.name = guess_task_desc["name"]
-                #         if "msg" in guess_task_desc.keys():
-                #             td.msg = guess_task_desc["msg"]
-                #     else:
-                #         td = BringTaskDesc(subtopic=subtopic)
-                #
-                #     tm = Transmogrificator(
-                #         f"{pipeline_id}_{index}_{j}",
-                #         self._tingistry_obj,
-                #         task_desc=td,
-                #         working_dir=tm_working_dir,
-                #         is_root_transmogrifier=False,
-                #     )
-                #     for _m in tings:
-                #         tm.add_mogrifier(_m)
-                #
-                #     tms.append(tm)
-                #
-                # merge = self.create_mogrifier_ting(
-                #     mogrify_plugin="merge_folders",
-                #     pipeline_id=pipeline_id,
-                #     index=f"{index}_merge",
-                #     input_vals={},
-                #     basetopic=basetopic
-                # )
-                # p_ting: ParallelPkgMergeMogrifier = self.create_mogrifier_ting(  # type: ignore
-                #     mogrify_plugin="parallel_pkg_merge",
-                #     pipeline_id=pipeline_id,
-                #     index=str(index),
-                #     input_vals={"pipeline_id": pipeline_id, "merge": merge},
-                #     basetopic=basetopic
-                # )
-                # p_ting.add_mogrificators(*tms)
-                #
-                # transmogrificator.add_mogrifier(p_ting)
-                # p_ting.set_merge_task(merge)
+                p_ting = await self.create_parallel_mogrifier(
+                    _mog,
+                    pipeline_id=pipeline_id,
+                    index=str(index),
+                    working_dir=transmogrificator.working_dir,
+                )
+                await transmogrificator.add_mogrifier(p_ting)
             else:
 
                 raise FrklException(
@@ -9,6 +9,8 @@ import httpx
 from anyio import aopen
 from bring.defaults import BRING_DOWNLOAD_CACHE
 from bring.mogrify import MogrifierException, SimpleMogrifier
+from bring.utils.metrics import record_cache_access
+from bring.utils.profiling import record_step_value
 from frkl.common.downloads.cache import calculate_cache_path
 from frkl.common.filesystem import ensure_folder
 from frkl.common.strings import generate_valid_identifier
@@ -51,7 +53,10 @@ class DownloadMogrifier(SimpleMogrifier):
             base_path=BRING_DOWNLOAD_CACHE, url=download_url
         )
 
-        if not os.path.exists(cache_path):
+        cache_hit = os.path.exists(cache_path)
+        record_cache_access("download", hit=cache_hit)
+
+        if not cache_hit:
 
             ensure_folder(os.path.dirname(cache_path))
 
@@ -72,6 +77,7 @@ class DownloadMogrifier(SimpleMogrifier):
                             async with client.stream("GET", download_url) as response:
                                 async for chunk in response.aiter_bytes():
                                     await f.write(chunk)
+                                    record_step_value("network_bytes", len(chunk))
                         success = True
                     except Exception as e:
                         log.debug(
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import shutil
+import stat
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+from bring.mogrify import FILE_TREE_STEP_TYPES, SimpleMogrifier
+from bring.utils.paths import resolve_include_patterns
+from bring.utils.profiling import record_step_value
+from frkl.common.exceptions import FrklException
+from pathspec import PathSpec, patterns
+
+
+log = logging.getLogger("bring")
+
+
+class FileTreeEntry(object):
+    def __init__(self, orig_path: str, is_dir: bool = False):
+
+        self.orig_path: str = orig_path
+        self.path: str = orig_path
+        self.is_dir: bool = is_dir
+        self.executable: bool = False
+
+
+class FileTreePlan(object):
+    """A compiled list of 'file_filter', 'flatten', 'set_mode' and 'rename' steps.
+
+    Instead of walking the folder once per step, and moving (or chmod-ing) every file once per step, the plan walks the
+    source folder once, calculates the final location and mode of every file in memory, and then does one move (and
+    at most one chmod) per remaining file.
+
+    Like the individual mogrifiers, the plan follows symlinked directories. Empty directories are only tracked so
+    they can be renamed, 'file_filter' and 'flatten' drop them, same as the individual mogrifiers do.
+    """
+
+    def __init__(self, steps: Iterable[Mapping[str, Any]]):
+
+        self._steps: List[Mapping[str, Any]] = list(steps)
+        for step in self._steps:
+            step_type = step.get("type", None)
+            if step_type not in FILE_TREE_STEP_TYPES:
+                raise FrklException(
+                    msg="Can't create file tree plan.",
+                    reason=f"Invalid step type '{step_type}', allowed: {', '.join(FILE_TREE_STEP_TYPES)}",
+                )
+
+    @property
+    def steps(self) -> List[Mapping[str, Any]]:
+        return self._steps
+
+    def get_msg(self) -> str:
+
+        msgs = []
+        for step in self._steps:
+            step_type = step["type"]
+            if step_type == "file_filter":
+                include = resolve_include_patterns(step.get("include", None))
+                msg = f"filter files matching: '{', '.join(include)}'"
+                if step.get("flatten", False):
+                    msg = msg + " (flattened)"
+            elif step_type == "flatten":
+                msg = "flatten folder"
+            elif step_type == "set_mode":
+                msg = "set file mode"
+            else:
+                msg = "rename files"
+            msgs.append(msg)
+
+        return f"processing files in a single pass: {', '.join(msgs)}"
+
+    def _walk(self, source: str) -> List[FileTreeEntry]:
+
+        entries = []
+        visited: Set[str] = set()
+        for root, dirs, files in os.walk(source, followlinks=True):
+            # don't loop forever on symlinks that point to one of their parents
+            real_root = os.path.realpath(root)
+            if real_root in visited:
+                dirs[:] = []
+                continue
+            visited.add(real_root)
+
+            rel_root = os.path.relpath(root, source)
+            if not dirs and not files and rel_root != ".":
+                entries.append(FileTreeEntry(rel_root, is_dir=True))
+            for f in files:
+                if rel_root == ".":
+                    rel_path = f
+                else:
+                    rel_path = os.path.join(rel_root, f)
+                entries.append(FileTreeEntry(rel_path))
+
+        return entries
+
+    def _filter(
+        self, entries: List[FileTreeEntry], step: Mapping[str, Any]
+    ) -> List[FileTreeEntry]:
+
+        include = resolve_include_patterns(step["include"])
+        flatten = step.get("flatten", False)
+        path_spec = PathSpec.from_lines(patterns.GitWildMatchPattern, include)
+
+        result: Dict[str, FileTreeEntry] = {}
+        for entry in entries:
+            if entry.is_dir or not path_spec.match_file(entry.path):
+                continue
+            if flatten:
+                entry.path = os.path.basename(entry.path)
+            # same as moving the files one by one: a later duplicate replaces an earlier one
+            result.pop(entry.path, None)
+            result[entry.path] = entry
+
+        return list(result.values())
+
+    def _flatten(
+        self, entries: List[FileTreeEntry], step: Mapping[str, Any]
+    ) -> List[FileTreeEntry]:
+
+        strategy = step.get("duplicate", "ignore")
+
+        result: Dict[str, FileTreeEntry] = {}
+        for entry in entries:
+            if entry.is_dir:
+                continue
+            target = os.path.basename(entry.path)
+            if target in result.keys():
+                if strategy == "ignore":
+                    log.info(f"Duplicate file '{target}', ignoring...")
+                    continue
+                else:
+                    raise NotImplementedError()
+            entry.path = target
+            result[target] = entry
+
+        return list(result.values())
+
+    def _set_mode(self, entries: List[FileTreeEntry], step: Mapping[str, Any]) -> None:
+
+        include = step.get("include", ["*", ".*"])
+        path_spec = PathSpec.from_lines(
+            patterns.GitWildMatchPattern, resolve_include_patterns(include)
+        )
+
+        set_executable = step.get("set_executable", None)
+        set_readable = step.get("set_readable", None)
+        set_writeable = step.get("set_writeable", None)
+
+        for entry in entries:
+            if entry.is_dir or not path_spec.match_file(entry.path):
+                continue
+
+            if set_executable is True:
+                entry.executable = True
+            elif set_executable is False:
+                raise NotImplementedError()
+
+            if set_readable in [True, False]:
+                raise NotImplementedError()
+            if set_writeable in [True, False]:
+                raise NotImplementedError()
+
+    def _rename(
+        self, entries: List[FileTreeEntry], step: Mapping[str, Any]
+    ) -> List[FileTreeEntry]:
+        """Rename files and folders, the same way 'shutil.move' would."""
+
+        rename_map: Mapping[str, str] = step.get("rename_map", None)
+        if not rename_map:
+            return entries
+
+        for source, target in rename_map.items():
+            source = os.path.normpath(source)
+            target = os.path.normpath(target)
+            prefix = source + os.path.sep
+
+            matched = [
+                e for e in entries if e.path == source or e.path.startswith(prefix)
+            ]
+            if not matched:
+                raise FileNotFoundError(f"Can't rename '{source}': no such file.")
+            matched_ids = {id(e) for e in matched}
+
+            # moving onto an existing folder moves the source into it
+            target_prefix = target + os.path.sep
+            if any(
+                (e.path == target and e.is_dir) or e.path.startswith(target_prefix)
+                for e in entries
+                if id(e) not in matched_ids
+            ):
+                target = os.path.join(target, os.path.basename(source))
+
+            # an existing file at the target gets replaced
+            if len(matched) == 1 and matched[0].path == source:
+                entries = [
+                    e for e in entries if id(e) in matched_ids or e.path != target
+                ]
+
+            for entry in matched:
+                if entry.path == source:
+                    entry.path = target
+                else:
+                    entry.path = os.path.join(target, entry.path[len(prefix) :])
+
+        return entries
+
+    def calculate(self, source: str) -> List[FileTreeEntry]:
+        """Walk the source folder once, and calculate the final path and mode of every file."""
+
+        entries = self._walk(source)
+
+        for step in self._steps:
+            step_type = step["type"]
+            if step_type == "file_filter":
+                entries = self._filter(entries, step)
+            elif step_type == "flatten":
+                entries = self._flatten(entries, step)
+            elif step_type == "set_mode":
+                self._set_mode(entries, step)
+            elif step_type == "rename":
+                entries = self._rename(entries, step)
+
+        return entries
+
+    def execute(self, source: str, target: str) -> List[FileTreeEntry]:
+        """Move all remaining files from the source into the target folder, and set their mode."""
+
+        entries = self.calculate(source)
+
+        created: Set[str] = set()
+        for entry in entries:
+            target_file = os.path.join(target, entry.path)
+            if entry.is_dir:
+                os.makedirs(target_file, exist_ok=True)
+                continue
+            parent = os.path.dirname(target_file)
+            if parent not in created:
+                os.makedirs(parent, exist_ok=True)
+                created.add(parent)
+
+            shutil.move(os.path.join(source, entry.orig_path), target_file)
+
+            if entry.executable:
+                st = os.stat(target_file)
+                os.chmod(
+                    target_file,
+                    st.st_mode | stat.S_IEXEC | stat.S_IXGRP | stat.S_IXOTH,
+                )
+
+        record_step_value("files_touched", len(entries))
+
+        return entries
+
+
+class FileTreeMogrifier(SimpleMogrifier):
+    """Filter, flatten, rename and set the mode of files in a single pass.
+
+    This mogrifier is used internally to replace a run of 'file_filter', 'flatten', 'set_mode' and 'rename' steps,
+    and, for now, can't be used in user-created mogrifier lists.
+    """
+
+    _plugin_name: str = "file_tree"
+
+    _requires: Mapping[str, str] = {"folder_path": "string", "steps": "list"}
+    _provides: Mapping[str, str] = {"folder_path": "string"}
+
+    def __init__(self, name: str, meta, **kwargs):
+
+        self._plan: Optional[FileTreePlan] = None
+        super().__init__(name=name, meta=meta, **kwargs)
+
+    def get_plan(self, steps: Optional[Iterable[Mapping[str, Any]]] = None):
+
+        if self._plan is None:
+            if steps is None:
+                steps = self.get_user_input("steps", [])
+            self._plan = FileTreePlan(steps)  # type: ignore
+        return self._plan
+
+    def get_msg(self) -> str:
+
+        return self.get_plan().get_msg()
+
+    async def mogrify(self, *value_names: str, **requirements) -> Mapping[str, Any]:
+
+        path: str = requirements["folder_path"]
+        plan = self.get_plan(requirements["steps"])
+
+        target_path = self.create_temp_dir(prefix="file_tree_")
+        plan.execute(source=path, target=target_path)
+
+        return {"folder_path": target_path}
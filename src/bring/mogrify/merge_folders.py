@@ -1,15 +1,20 @@
 # -*- coding: utf-8 -*-
 from typing import Any, Mapping, MutableMapping
 
-from bring.mogrify import SimpleMogrifier
+from bring.mogrify import MogrifierException, SimpleMogrifier
+from bring.utils.paths import merge_folders
 
 
-# from bring.merge_strategy import FolderMerge, MergeStrategy
+MERGE_STRATEGIES = ["default", "overwrite"]
 
 
 class MergeFoldersMogrifier(SimpleMogrifier):
     """Merge multiple folders into a single one, using one of the available merge strategies.
 
+    Supported merge strategies:
+      - default: if a file exists in more than one source folder, the first one is used
+      - overwrite: if a file exists in more than one source folder, the last one is used
+
     This mogrifier is used internally, and, for now, can't be used in user-created mogrifier lists.
     """
 
@@ -30,11 +35,20 @@ class MergeFoldersMogrifier(SimpleMogrifier):
         )
         if isinstance(strategy, str):
             strategy = {"type": strategy, "config": {"move_method": "move"}}
+        else:
+            strategy = dict(strategy)
+
+        strategy_type = strategy.get("type", "default")
+        if strategy_type not in MERGE_STRATEGIES:
+            raise MogrifierException(
+                self,
+                msg="Can't merge directories.",
+                reason=f"Invalid merge strategy '{strategy_type}', allowed: {', '.join(MERGE_STRATEGIES)}",
+            )
 
-        if "config" not in strategy.keys():
-            strategy["config"] = {}
-        if "move_method" not in strategy["config"].keys():
-            strategy["config"]["move_method"] = "copy"
+        config = dict(strategy.get("config", {}))
+        if "move_method" not in config.keys():
+            config["move_method"] = "copy"
 
         folder_paths = requirements["folder_paths"]
         if not folder_paths:
@@ -42,13 +56,11 @@ class MergeFoldersMogrifier(SimpleMogrifier):
 
         target_path = self.create_temp_dir("merge_")
 
-        raise NotImplementedError()
-        # merge_strategy = MergeStrategy.create_merge_strategy(
-        #     typistry=self._tingistry_obj.typistry, merge_strategy=strategy
-        # )
-        #
-        # merge_obj = FolderMerge(target=target_path, merge_strategy=merge_strategy)
-        #
-        # await merge_obj.merge_folders(*folder_paths)
+        merge_folders(
+            target_path,
+            *folder_paths,
+            move_method=config["move_method"],
+            overwrite=strategy_type == "overwrite",
+        )
 
         return {"folder_path": target_path}
@@ -1,67 +1,157 @@
 # -*- coding: utf-8 -*-
-# import logging
-# from typing import Any, Dict, List, Mapping, Optional
-#
-# from anyio import create_task_group
-# from bring.mogrify import Mogrifier, Transmogrificator
-# from frkl.tasks.task import Task
-# from tings.ting import TingMeta
-#
-#
-# log = logging.getLogger("bring")
-#
-#
-# class ParallelPkgMergeMogrifier(Mogrifier):
-#
-#     _plugin_name: str = "parallel_pkg_merge"
-#     _provides: Mapping[str, str] = {"folder_path": "string"}
-#     _requires: Mapping[str, str] = {"pipeline_id": "string", "merge": "any"}
-#
-#     def __init__(self, name: str, meta: TingMeta, **kwargs):
-#
-#         raise NotImplementedError()
-#     self._mogrificators: List[Transmogrificator] = []
-#     self._merge_task: Optional[Mogrifier] = None
-#
-#     super().__init__(name=name, meta=meta, **kwargs)
-#
-# def add_mogrificators(self, *mogrificators: Transmogrificator):
-#
-#     if self._started:
-#         raise Exception("Can't add child mogrifiers: already started")
-#
-#     for m in mogrificators:
-#         self.add_task(m)
-#
-# def set_merge_task(self, merge_task: Mogrifier):
-#
-#     self._merge_task = merge_task
-#     self._merge_task.parent_task = self
-#     self._merge_task.working_dir = self.working_dir
-#
-# def get_msg(self) -> str:
-#
-#     return "merging multiple pkgs"
-#
-# async def execute(self) -> Any:
-#
-#     return await self.get_values()
-#
-# async def mogrify(self, *value_names: str, **requirements) -> Mapping[str, Any]:
-#
-#     if self._merge_task is None:
-#         raise Exception("Can't execute parallel package merge. Merge task not set.")
-#
-#     async with create_task_group() as tg:
-#         for tm in self._children.values():
-#             await tg.spawn(tm.transmogrify)  # type: ignore
-#
-#     folders = []
-#     for tm in self._children.values():
-#         folder = tm._last_item.current_state["folder_path"]  # type: ignore
-#         folders.append(folder)
-#
-#     inp: Dict[str, Any] = {"folder_paths": folders}
-#     self._merge_task.set_input(**inp)
-#     vals = await self._merge_task.run_async()
-#     return vals.result_value
+import functools
+import logging
+import os
+import shutil
+from typing import Any, Dict, List, Mapping, Optional
+
+from anyio import create_task_group, run_in_thread
+from bring.mogrify import (
+    Mogrifier,
+    MogrifierException,
+    SimpleMogrifier,
+    Transmogrificator,
+)
+from frkl.common.exceptions import FrklException
+from frkl.tasks.task import TaskResult
+from tings.defaults import NO_VALUE_MARKER
+from tings.ting import TingMeta
+
+
+log = logging.getLogger("bring")
+
+
+class ParallelPkgMergeMogrifier(SimpleMogrifier):
+    """Run several mogrifier pipelines concurrently, and merge their resulting folders.
+
+    This is used for nested lists in a packages mogrifier list: every sub-list is executed as its own pipeline, all
+    of those pipelines run at the same time, and once all of them are finished, the resulting folders are merged
+    into one.
+
+    This mogrifier is used internally, and, for now, can't be used in user-created mogrifier lists.
+    """
+
+    _plugin_name: str = "parallel_pkg_merge"
+    _provides: Mapping[str, str] = {"folder_path": "string"}
+    _requires: Mapping[str, str] = {
+        "pipeline_id": "string",
+        "folder_path": "string?",
+        "file_path": "string?",
+    }
+
+    def __init__(self, name: str, meta: TingMeta, **kwargs):
+
+        self._mogrificators: List[Transmogrificator] = []
+        self._merge_task: Optional[Mogrifier] = None
+
+        super().__init__(name=name, meta=meta, **kwargs)
+
+    def add_mogrificators(self, *mogrificators: Transmogrificator) -> None:
+
+        self._mogrificators.extend(mogrificators)
+
+    @property
+    def mogrificators(self) -> List[Transmogrificator]:
+
+        return self._mogrificators
+
+    def set_merge_task(self, merge_task: Mogrifier) -> None:
+
+        self._merge_task = merge_task
+        self._merge_task.working_dir = self.working_dir
+
+    def get_msg(self) -> str:
+
+        return (
+            f"retrieving and merging {len(self._mogrificators)} pipelines in parallel"
+        )
+
+    async def _connect_upstream(self, **requirements) -> None:
+        """Pass the output of the previous pipeline step on to the first step of every branch.
+
+        Only values a branch requires, and that were not set explicitly in its config, are passed on. Every branch
+        but the last one gets its own copy of the upstream folder/file, since branches run at the same time and
+        mogrifiers are free to modify their input.
+        """
+
+        upstream = {}
+        for key in ["folder_path", "file_path"]:
+            value = requirements.get(key, None)
+            if value is not None and value != NO_VALUE_MARKER:
+                upstream[key] = value
+
+        if not upstream:
+            return
+
+        last = len(self._mogrificators) - 1
+        for index, tm in enumerate(self._mogrificators):
+            first = tm.first_mogrifier
+            if first is None:
+                continue
+
+            user_input = first.user_input  # type: ignore
+            inputs = {}
+            for key, value in upstream.items():
+                if key not in first.requires().keys() or key in user_input.keys():
+                    continue
+                if index != last:
+                    target = os.path.join(
+                        tm.working_dir, f"upstream_{os.path.basename(value)}"
+                    )
+                    # copying can take a while, so don't block the event loop
+                    if os.path.isdir(value):
+                        await run_in_thread(
+                            functools.partial(
+                                shutil.copytree, value, target, symlinks=True
+                            )
+                        )
+                    else:
+                        await run_in_thread(shutil.copy2, value, target)
+                    value = target
+                inputs[key] = value
+
+            if inputs:
+                first.set_input(**user_input, **inputs)
+
+    async def mogrify(self, *value_names: str, **requirements) -> Mapping[str, Any]:
+
+        if self._merge_task is None:
+            raise FrklException(
+                msg="Can't execute parallel package merge.",
+                reason="Merge task not set. This is a bug.",
+            )
+
+        await self._connect_upstream(**requirements)
+
+        results: Dict[int, TaskResult] = {}
+
+        async def run_pipeline(_index: int, _tm: Transmogrificator):
+            results[_index] = await _tm.run_async()
+
+        async with create_task_group() as tg:
+            for index, tm in enumerate(self._mogrificators):
+                await tg.spawn(run_pipeline, index, tm)
+
+        folders = []
+        for index in range(len(self._mogrificators)):
+            result = results[index]
+            if not result.success:
+                if result.error is None:
+                    raise MogrifierException(
+                        self, msg=f"Unknown error when executing pipeline #{index}."
+                    )
+                raise result.error
+            folders.append(result.result_value["folder_path"])
+
+        self._merge_task.working_dir = self.working_dir
+        self._merge_task.set_input(folder_paths=folders)
+        merge_result = await self._merge_task.run_async()
+
+        if not merge_result.success:
+            if merge_result.error is None:
+                raise MogrifierException(
+                    self, msg="Unknown error when merging pipeline results."
+                )
+            raise merge_result.error
+
+        return merge_result.result_value
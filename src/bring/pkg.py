@@ -10,7 +10,7 @@ from bring.pkg_types import (
     PkgMetadata,
     PkgType,
     PkgVersion,
-    get_pkg_type_plugin_factory,
+    get_pkg_type,
 )
 from bring.utils import find_version, replace_var_aliases
 from frkl.args.arg import RecordArg
@@ -19,7 +19,6 @@ from frkl.common.exceptions import FrklException
 from frkl.common.formats.serialize import to_value_string
 from frkl.common.strings import generate_valid_identifier
 from frkl.tasks.task_desc import TaskDesc
-from frkl.types.plugins import PluginFactory
 from tings.exceptions import TingException
 from tings.ting import SimpleTing, TingMeta
 from tings.tingistry import Tingistry
@@ -508,10 +507,11 @@ class DynamicPkgTing(PkgTing):
         if pkg_type is None:
             raise KeyError(f"No 'type' key in package details: {dict(source_dict)}")
 
-        pf: PluginFactory = get_pkg_type_plugin_factory(self._tingistry_obj.arg_hive)
         # pm: PluginManager = self._tingistry_obj.get_plugin_manager("pkg_type")
 
-        resolver: PkgType = pf.get_singleton(pkg_type, raise_exception=False)
+        resolver: Optional[PkgType] = get_pkg_type(
+            self._tingistry_obj.arg_hive, pkg_type
+        )
         if resolver is None:
             r_type = source_dict.get("type", source_dict)
             raise TingException(
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Binary index file format, with random access to single packages.
+
+Layout (all integers little-endian):
+
+    magic (8 bytes: 'BRINGIDX') | format version (uint32) | header length (uint32) | header | package records
+
+The header is a json document with the index metadata (all '_bring_*' keys of the index), and a table that maps
+every package name to the offset and length of its record (relative to the start of the record section). Every
+package record is a zlib-compressed json document.
+
+Reading a single package only requires parsing the header, and decompressing that package's record. The file is
+memory-mapped, so records that are not used are never read from disk.
+
+To convert a (gzipped json) index file:
+
+    python -m bring.pkg_index.binary_index <source> <target>
+"""
+import gzip
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from typing import Any, Dict, Iterator, Mapping, Tuple
+
+from frkl.common.exceptions import FrklException
+
+
+BINARY_INDEX_MAGIC = b"BRINGIDX"
+BINARY_INDEX_VERSION = 1
+
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def is_binary_index(data: bytes) -> bool:
+    """Check whether the provided (start of a file) content is a binary index."""
+
+    return data[0 : len(BINARY_INDEX_MAGIC)] == BINARY_INDEX_MAGIC
+
+
+def is_binary_index_file(path: str) -> bool:
+
+    with open(path, "rb") as f:
+        return is_binary_index(f.read(len(BINARY_INDEX_MAGIC)))
+
+
+def serialize_binary_index(index_data: Mapping[str, Any]) -> bytes:
+    """Create binary index content out of the (json) index data, as created by 'BringIndexTing.export_index'."""
+
+    metadata: Dict[str, Any] = {}
+    offsets: Dict[str, Tuple[int, int]] = {}
+    records = []
+    offset = 0
+
+    for pkg_name in sorted(index_data.keys()):
+        pkg_data = index_data[pkg_name]
+        if pkg_name.startswith("_bring_"):
+            metadata[pkg_name] = pkg_data
+            continue
+
+        record = zlib.compress(
+            json.dumps(pkg_data, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        )
+        offsets[pkg_name] = (offset, len(record))
+        records.append(record)
+        offset = offset + len(record)
+
+    header = json.dumps(
+        {"metadata": metadata, "pkgs": offsets}, separators=(",", ":")
+    ).encode("utf-8")
+
+    preamble = _PREAMBLE.pack(BINARY_INDEX_MAGIC, BINARY_INDEX_VERSION, len(header))
+
+    return b"".join([preamble, header] + records)
+
+
+def write_binary_index(path: str, index_data: Mapping[str, Any]) -> None:
+    """Write a binary index file.
+
+    The file is replaced atomically, so readers that have the old version memory-mapped are not affected.
+    """
+
+    content = serialize_binary_index(index_data)
+    fd, temp_path = tempfile.mkstemp(
+        prefix=".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path))
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+def _parse_header(buffer: Any, source: str) -> Tuple[Mapping[str, Any], int]:
+    """Parse the header of binary index content, returns the header and the offset of the first package record."""
+
+    if len(buffer) < _PREAMBLE.size:
+        raise FrklException(
+            msg=f"Can't read index file '{source}'.", reason="File too short."
+        )
+
+    magic, version, header_length = _PREAMBLE.unpack_from(buffer, 0)
+    if magic != BINARY_INDEX_MAGIC:
+        raise FrklException(
+            msg=f"Can't read index file '{source}'.", reason="Not a binary index file.",
+        )
+    if version > BINARY_INDEX_VERSION:
+        raise FrklException(
+            msg=f"Can't read index file '{source}'.",
+            reason=f"Unsupported index format version: {version}",
+            solution="Upgrade bring.",
+        )
+
+    header_start = _PREAMBLE.size
+    records_start = header_start + header_length
+    header = json.loads(bytes(buffer[header_start:records_start]).decode("utf-8"))
+
+    return header, records_start
+
+
+def deserialize_binary_index(content: bytes, source: str = "n/a") -> Dict[str, Any]:
+    """Decode all of a binary index, the result is the same as the content of a json index file."""
+
+    header, records_start = _parse_header(content, source)
+
+    result: Dict[str, Any] = dict(header["metadata"])
+    for pkg_name, (offset, length) in header["pkgs"].items():
+        start = records_start + offset
+        result[pkg_name] = json.loads(zlib.decompress(content[start : start + length]))
+
+    return result
+
+
+class BinaryIndexReader(Mapping[str, Mapping[str, Any]]):
+    """Read-only mapping of package name to package data, backed by a (memory-mapped) binary index file.
+
+    Package records are decoded on first access.
+    """
+
+    def __init__(self, path: str):
+
+        self._path: str = path
+
+        with open(path, "rb") as f:
+            self._mmap: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header, self._records_start = _parse_header(self._mmap, path)
+        self._metadata: Mapping[str, Any] = header["metadata"]
+        self._offsets: Mapping[str, Tuple[int, int]] = header["pkgs"]
+        self._cache: Dict[str, Mapping[str, Any]] = {}
+
+    @property
+    def metadata(self) -> Mapping[str, Any]:
+
+        return self._metadata
+
+    def __getitem__(self, pkg_name: str) -> Mapping[str, Any]:
+
+        pkg_data = self._cache.get(pkg_name, None)
+        if pkg_data is not None:
+            return pkg_data
+
+        offset, length = self._offsets[pkg_name]
+        start = self._records_start + offset
+        pkg_data = json.loads(zlib.decompress(self._mmap[start : start + length]))
+        self._cache[pkg_name] = pkg_data
+        return pkg_data
+
+    def __contains__(self, pkg_name: object) -> bool:
+
+        return pkg_name in self._offsets
+
+    def __iter__(self) -> Iterator[str]:
+
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+
+        return len(self._offsets)
+
+    @property
+    def closed(self) -> bool:
+
+        return self._mmap.closed
+
+    def close(self) -> None:
+
+        self._mmap.close()
+
+
+def read_json_index_file(path: str) -> Mapping[str, Any]:
+    """Read a (legacy) gzipped json index file."""
+
+    with open(path, "rb") as f:
+        content = f.read()
+    return json.loads(zlib.decompress(content, 16 + zlib.MAX_WBITS))
+
+
+def read_index_file(path: str) -> Dict[str, Any]:
+    """Read all of an index file (json or binary)."""
+
+    if is_binary_index_file(path):
+        with open(path, "rb") as f:
+            return deserialize_binary_index(f.read(), source=path)
+    else:
+        return dict(read_json_index_file(path))
+
+
+def write_index_file(
+    path: str, index_data: Mapping[str, Any], index_format: str = "json"
+) -> None:
+    """Write an index file, in either 'json' (gzipped) or 'binary' format."""
+
+    if index_format == "binary":
+        write_binary_index(path, index_data)
+    elif index_format == "json":
+        with gzip.GzipFile(path, "w") as f:
+            f.write((json.dumps(index_data, indent=2) + "\n").encode("utf-8"))
+    else:
+        raise FrklException(
+            msg=f"Can't write index file '{path}'.",
+            reason=f"Invalid index format: {index_format}",
+            solution="Use either 'binary' or 'json'.",
+        )
+
+
+def convert_index_file(source: str, target: str, target_format: str = "binary") -> None:
+    """Convert an index file (json or binary) to the specified format ('binary' or 'json')."""
+
+    if target_format not in ["binary", "json"]:
+        raise FrklException(
+            msg=f"Can't convert index file '{source}'.",
+            reason=f"Invalid target format: {target_format}",
+            solution="Use either 'binary' or 'json'.",
+        )
+
+    write_index_file(target, read_index_file(source), index_format=target_format)
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) not in [3, 4]:
+        print(
+            "Usage: python -m bring.pkg_index.binary_index <source> <target> [binary|json]"
+        )
+        sys.exit(1)
+
+    _format = sys.argv[3] if len(sys.argv) == 4 else "binary"
+    convert_index_file(sys.argv[1], os.path.abspath(sys.argv[2]), _format)
+    print(f"index file written to: {sys.argv[2]}")
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""Delta updates for (remote) index files.
+
+When exporting an index with deltas, two things are published next to the index file:
+
+- '<index_file>.manifest.json': the index version, a content hash for every package, the index metadata, and the
+  list of previous versions ('history') that deltas are available for
+- '<index_file>.deltas/<version>.json.gz': for every version in the history, the changes (changed/added package
+  records and removed package names) to get from that version to the next one
+
+Clients that have an older version of the index cached only fetch the manifest and the deltas they are missing, and
+fall back to downloading the full index file if their version is not in the history (anymore).
+"""
+import gzip
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Mapping, Optional
+
+import httpx
+from bring.defaults import BRING_INDEX_FILES_CACHE
+from bring.pkg_index.binary_index import (
+    is_binary_index_file,
+    read_index_file,
+    write_index_file,
+)
+from bring.utils.hashing import hash_content
+from bring.utils.metrics import METRICS
+from frkl.common.downloads.cache import calculate_cache_path
+
+
+log = logging.getLogger("bring")
+
+INDEX_MANIFEST_SUFFIX = ".manifest.json"
+INDEX_DELTAS_SUFFIX = ".deltas"
+DEFAULT_DELTA_HISTORY = 10
+"""How many previous index versions deltas are kept for."""
+
+INDEX_MANIFEST_FORMAT = 1
+
+
+def create_index_manifest(index_data: Mapping[str, Any]) -> Dict[str, Any]:
+
+    pkgs: Dict[str, str] = {}
+    metadata: Dict[str, Any] = {}
+    for key, value in index_data.items():
+        if key.startswith("_bring_"):
+            metadata[key] = value
+        else:
+            pkgs[key] = hash_content(value)
+
+    return {
+        "format": INDEX_MANIFEST_FORMAT,
+        "version": hash_content({"pkgs": pkgs, "metadata": metadata}),
+        "pkgs": pkgs,
+        "metadata": metadata,
+        "history": [],
+    }
+
+
+def create_index_delta(
+    old_manifest: Mapping[str, Any],
+    new_manifest: Mapping[str, Any],
+    new_data: Mapping[str, Any],
+) -> Dict[str, Any]:
+
+    old_pkgs: Mapping[str, str] = old_manifest["pkgs"]
+    new_pkgs: Mapping[str, str] = new_manifest["pkgs"]
+
+    changed = {
+        pkg_name: new_data[pkg_name]
+        for pkg_name, pkg_hash in new_pkgs.items()
+        if old_pkgs.get(pkg_name, None) != pkg_hash
+    }
+    removed = [pkg_name for pkg_name in old_pkgs.keys() if pkg_name not in new_pkgs]
+
+    return {
+        "from": old_manifest["version"],
+        "to": new_manifest["version"],
+        "changed": changed,
+        "removed": removed,
+        "metadata": new_manifest["metadata"],
+    }
+
+
+def apply_index_delta(
+    index_data: Dict[str, Any], delta: Mapping[str, Any]
+) -> Dict[str, Any]:
+
+    for key in [k for k in index_data.keys() if k.startswith("_bring_")]:
+        index_data.pop(key)
+    for pkg_name in delta["removed"]:
+        index_data.pop(pkg_name, None)
+    index_data.update(delta["changed"])
+    index_data.update(delta["metadata"])
+
+    return index_data
+
+
+def _write_json(path: str, data: Mapping[str, Any], compress: bool = False) -> None:
+
+    fd, temp_path = tempfile.mkstemp(
+        prefix=".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path))
+    )
+    content = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    if compress:
+        content = gzip.compress(content)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+def write_index_deltas(
+    index_file: str,
+    index_data: Mapping[str, Any],
+    old_index_data: Optional[Mapping[str, Any]] = None,
+    history_size: int = DEFAULT_DELTA_HISTORY,
+) -> Mapping[str, Any]:
+    """Write the manifest (and a delta from the previous version, if provided) for a freshly exported index file."""
+
+    manifest_path = f"{index_file}{INDEX_MANIFEST_SUFFIX}"
+    deltas_folder = f"{index_file}{INDEX_DELTAS_SUFFIX}"
+
+    new_manifest = create_index_manifest(index_data)
+
+    old_manifest: Optional[Mapping[str, Any]] = None
+    if old_index_data is not None:
+        old_manifest = create_index_manifest(old_index_data)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                previous = json.load(f)
+            # only keep the history if the previous manifest belongs to the previous index file
+            if previous.get("version", None) == old_manifest["version"]:
+                old_manifest["history"] = previous.get("history", [])
+
+    history: List[str] = []
+    if old_manifest is not None:
+        history = list(old_manifest["history"])
+        if old_manifest["version"] != new_manifest["version"]:
+            os.makedirs(deltas_folder, exist_ok=True)
+            delta = create_index_delta(old_manifest, new_manifest, index_data)
+            _write_json(
+                os.path.join(deltas_folder, f"{old_manifest['version']}.json.gz"),
+                delta,
+                compress=True,
+            )
+            history.append(old_manifest["version"])
+
+    pruned = history[0 : max(0, len(history) - history_size)]
+    history = history[len(pruned) :]
+    for version in pruned:
+        delta_file = os.path.join(deltas_folder, f"{version}.json.gz")
+        if os.path.exists(delta_file):
+            os.unlink(delta_file)
+
+    new_manifest["history"] = history
+    _write_json(manifest_path, new_manifest)
+
+    return new_manifest
+
+
+async def _fetch(client: httpx.AsyncClient, url: str) -> Optional[bytes]:
+
+    try:
+        response = await client.get(url)
+    except Exception as e:
+        log.debug(f"Can't fetch '{url}': {e}")
+        return None
+
+    if response.status_code != 200:
+        log.debug(f"Can't fetch '{url}': status code {response.status_code}")
+        return None
+
+    METRICS.inc("bring_index_delta_bytes_total", len(response.content))
+    return response.content
+
+
+async def update_index_file_with_deltas(index_url: str) -> bool:
+    """Try to bring the locally cached copy of a remote index file up to date, using the published deltas.
+
+    Returns 'False' if that is not possible (no cached copy, no manifest or deltas published, cached copy too old),
+    in which case the full index file needs to be downloaded.
+    """
+
+    cache_path = calculate_cache_path(base_path=BRING_INDEX_FILES_CACHE, url=index_url)
+    if not os.path.exists(cache_path):
+        return False
+
+    local_manifest_path = f"{cache_path}{INDEX_MANIFEST_SUFFIX}"
+
+    async with httpx.AsyncClient() as client:
+
+        content = await _fetch(client, f"{index_url}{INDEX_MANIFEST_SUFFIX}")
+        if content is None:
+            return False
+        try:
+            remote_manifest = json.loads(content)
+        except Exception as e:
+            log.debug(f"Invalid index manifest for '{index_url}': {e}")
+            return False
+        if remote_manifest.get("format", None) != INDEX_MANIFEST_FORMAT:
+            return False
+
+        index_data: Optional[Dict[str, Any]] = None
+        local_version: Optional[str] = None
+        if os.path.exists(local_manifest_path):
+            with open(local_manifest_path, "r") as f:
+                local_version = json.load(f).get("version", None)
+        if local_version is None:
+            index_data = read_index_file(cache_path)
+            local_version = create_index_manifest(index_data)["version"]
+
+        if local_version == remote_manifest["version"]:
+            _write_json(local_manifest_path, remote_manifest)
+            METRICS.inc("bring_index_delta_updates_total", result="unchanged")
+            return True
+
+        history: List[str] = remote_manifest.get("history", [])
+        if local_version not in history:
+            log.debug(
+                f"Cached index file for '{index_url}' too old for delta update, downloading full index."
+            )
+            METRICS.inc("bring_index_delta_updates_total", result="too_old")
+            return False
+
+        if index_data is None:
+            index_data = read_index_file(cache_path)
+
+        for version in history[history.index(local_version) :]:
+            content = await _fetch(
+                client, f"{index_url}{INDEX_DELTAS_SUFFIX}/{version}.json.gz"
+            )
+            if content is None:
+                return False
+            delta = json.loads(gzip.decompress(content))
+            apply_index_delta(index_data, delta)
+
+    if create_index_manifest(index_data)["version"] != remote_manifest["version"]:
+        log.debug(f"Delta update for '{index_url}' failed verification.")
+        METRICS.inc("bring_index_delta_updates_total", result="invalid")
+        return False
+
+    index_format = "binary" if is_binary_index_file(cache_path) else "json"
+    fd, temp_path = tempfile.mkstemp(
+        prefix=".", suffix=".tmp", dir=os.path.dirname(cache_path)
+    )
+    os.close(fd)
+    try:
+        write_index_file(temp_path, index_data, index_format=index_format)
+        os.replace(temp_path, cache_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    _write_json(local_manifest_path, remote_manifest)
+
+    METRICS.inc("bring_index_delta_updates_total", result="updated")
+    return True
@@ -1,38 +1,50 @@
 # -*- coding: utf-8 -*-
-from typing import Mapping, Optional
+import logging
+import os
+from typing import Dict, Iterable, Mapping, Optional
 
 import arrow
 from bring.defaults import DEFAULT_PKG_EXTENSION
 from bring.pkg import PkgTing
 from bring.pkg_index.config import IndexConfig
 from bring.pkg_index.index import BringIndexTing
-from bring.pkg_index.pkgs import Pkgs
+from bring.pkg_index.manifests import ManifestCache, find_manifests
+from bring.utils.concurrency import limit
 from bring.utils.git import ensure_repo_cloned
+from bring.utils.hashing import hash_content
+from bring.utils.watch import FileChange
 from frkl.common.exceptions import FrklException
 from frkl.common.strings import is_git_repo_url
 from frkl.tasks.task import SingleTaskAsync, Task
 from frkl.tasks.task_desc import TaskDesc
 from frkl.tasks.tasks import ParallelTasksAsync
-from tings.makers import TingMaker
 from tings.ting import TingMeta
 
 
+log = logging.getLogger("bring")
+
+
+def get_file_timestamp(path: str) -> str:
+    """Return the modification time of a file, in the format used for metadata timestamps."""
+
+    return str(arrow.get(os.stat(path).st_mtime))
+
+
 class BringDynamicIndexTing(BringIndexTing):
     def __init__(self, name: str, meta: TingMeta):
 
         super().__init__(name=name, meta=meta)
 
         self._pkg_namespace = f"bring.indexes.{self.full_name}.pkgs"
-        self._pkg_list: Pkgs = self._tingistry_obj.create_singleting(  # type: ignore
-            name=self._pkg_namespace,
-            ting_class="pkgs",
-            subscription_namespace=self._pkg_namespace,
-            bring_index=self,
-        )
-        self._maker_path: Optional[str] = None
-        self._maker: Optional[TingMaker] = None
+        self._base_path: Optional[str] = None
+        self._manifest_cache: Optional[ManifestCache] = None
+
+        self._pkgs: Dict[str, PkgTing] = {}
+        self._pkg_paths: Dict[str, str] = {}
+        self._pkg_hashes: Dict[str, str] = {}
 
         self._metadata_timestamp: Optional[str] = None
+        self._pkg_metadata_timestamps: Dict[str, str] = {}
         self._uri: Optional[str] = None
 
     async def init(self, config: IndexConfig) -> None:
@@ -64,9 +76,10 @@ class BringDynamicIndexTing(BringIndexTing):
             self._uri = path
             _local_path = path
 
-        maker = await self.get_maker(_local_path)
-        await maker.sync()
-        self._metadata_timestamp = str(arrow.Arrow.now())
+        self._base_path = os.path.realpath(_local_path)
+        self._manifest_cache = ManifestCache(self._base_path)
+        await self._sync_pkgs()
+        self._metadata_timestamp = get_file_timestamp(self._base_path)  # type: ignore
 
     async def get_uri(self) -> str:
 
@@ -79,11 +92,157 @@ class BringDynamicIndexTing(BringIndexTing):
 
     async def _get_metadata_timestamp(self) -> Optional[str]:
 
-        return self._metadata_timestamp
+        if not self._pkg_metadata_timestamps:
+            return self._metadata_timestamp
+
+        return str(max(arrow.get(ts) for ts in self._pkg_metadata_timestamps.values()))
+
+    async def get_content_hash(self) -> Optional[str]:
+
+        return hash_content(sorted(self._pkg_hashes.items()))
+
+    async def get_pkg_metadata_timestamp(self, pkg_name: str) -> Optional[str]:
+        """Return the time the description file of a package was last modified."""
+
+        return self._pkg_metadata_timestamps.get(pkg_name, self._metadata_timestamp)
 
     async def _get_pkgs(self) -> Mapping[str, PkgTing]:
 
-        return self._pkg_list.pkgs
+        return self._pkgs
+
+    def _update_pkg(self, pkg_name: str, path: str) -> bool:
+        """Create or update the ting for a package description file.
+
+        Returns:
+            bool: whether the package is new
+        """
+
+        content_hash, content = self._manifest_cache.get_manifest(path)  # type: ignore
+        pkg = self._pkgs.get(pkg_name, None)
+        if pkg is not None and self._pkg_hashes.get(pkg_name, None) == content_hash:
+            return False
+
+        if "source" not in content.keys():
+            log.warning(f"Ignoring package file '{path}': no 'source' key.")
+            self._remove_pkg(pkg_name)
+            return False
+
+        if pkg is None:
+            ting_name = f"{self._pkg_namespace}.{pkg_name}"
+            pkg = self._tingistry_obj.get_ting(ting_name)  # type: ignore
+            if pkg is None:
+                pkg = self._tingistry_obj.create_ting(  # type: ignore
+                    "bring.types.dynamic_pkg", ting_name
+                )
+
+        # the time the description changed, so the timestamp is the same for every process that reads it
+        timestamp = get_file_timestamp(path)
+        pkg.set_input(  # type: ignore
+            source=content["source"],
+            info=content.get("info", {}),
+            labels=content.get("labels", {}),
+            tags=content.get("tags", []),
+            ting_make_timestamp=timestamp,
+            ting_make_metadata={"path": path},
+        )
+
+        is_new = pkg_name not in self._pkgs.keys()
+        self._pkgs[pkg_name] = pkg  # type: ignore
+        self._pkg_paths[pkg_name] = path
+        self._pkg_hashes[pkg_name] = content_hash
+        self._pkg_metadata_timestamps[pkg_name] = timestamp
+        return is_new
+
+    def _remove_pkg(self, pkg_name: str) -> bool:
+
+        self._pkg_paths.pop(pkg_name, None)
+        self._pkg_hashes.pop(pkg_name, None)
+        self._pkg_metadata_timestamps.pop(pkg_name, None)
+        return self._pkgs.pop(pkg_name, None) is not None
+
+    def _save_manifest_cache(self) -> None:
+
+        try:
+            self._manifest_cache.save()  # type: ignore
+        except Exception as e:
+            log.debug(f"Can't save manifest cache for index '{self.name}': {e}")
+
+    async def _sync_pkgs(self) -> None:
+        """(Re-)read all package description files of this index.
+
+        Only files that changed since they were last read are parsed, all others are taken from the manifest cache.
+        """
+
+        paths = find_manifests(self._base_path)  # type: ignore
+        for pkg_name in [p for p in self._pkgs.keys() if p not in paths.keys()]:
+            self._remove_pkg(pkg_name)
+
+        for pkg_name, path in paths.items():
+            try:
+                self._update_pkg(pkg_name, path)
+            except Exception as e:
+                log.warning(f"Ignoring package file '{path}': {e}")
+                self._remove_pkg(pkg_name)
+
+        self._manifest_cache.prune(paths.values())  # type: ignore
+        self._save_manifest_cache()
+
+    async def reload(self) -> None:
+
+        await self._sync_pkgs()
+        self._metadata_timestamp = get_file_timestamp(self._base_path)  # type: ignore
+        self.invalidate()
+
+    async def apply_file_changes(self, changes: Iterable[FileChange]) -> bool:
+        """Update the packages of this index after changes to their '.bring' files.
+
+        Only packages whose files were added, changed or deleted are touched, all other packages keep their (cached)
+        values.
+
+        Returns:
+            bool: whether the list of packages changed
+        """
+
+        if self._base_path is None:
+            return False
+
+        pkgs_changed = False
+        for change in changes:
+
+            if change.path == self._base_path:
+                # e.g. if file system events got lost
+                await self._sync_pkgs()
+                pkgs_changed = True
+                continue
+
+            if not change.path.endswith(DEFAULT_PKG_EXTENSION):
+                continue
+
+            pkg_name = os.path.basename(change.path)[0 : -len(DEFAULT_PKG_EXTENSION)]
+            current_path = self._pkg_paths.get(pkg_name, None)
+            if current_path is not None and current_path != change.path:
+                # another file provides a package with this name
+                continue
+
+            if os.path.isfile(change.path):
+                try:
+                    if self._update_pkg(pkg_name, change.path):
+                        pkgs_changed = True
+                except Exception as e:
+                    log.warning(f"Ignoring package file '{change.path}': {e}")
+                    pkgs_changed = self._remove_pkg(pkg_name) or pkgs_changed
+            else:
+                pkgs_changed = self._remove_pkg(pkg_name) or pkgs_changed
+
+            log.debug(
+                f"Processed '{change.change_type}' event for package '{pkg_name}' in index '{self.name}'."
+            )
+
+        self._save_manifest_cache()
+        if pkgs_changed:
+            self.invalidate()
+
+        return pkgs_changed
 
     async def _create_update_tasks(self) -> Optional[Task]:
 
@@ -99,32 +258,13 @@ class BringDynamicIndexTing(BringIndexTing):
                 name=f"{pkg_name}",
                 msg=f"updating metadata for pkg '{pkg_name}' (index: {self.name})",
             )
-            t = SingleTaskAsync(pkg.update_metadata, task_desc=td, parent_task=tasks)
-            await tasks.add_tasklet(t)
-
-        return tasks
 
-    async def get_maker(self, uri: str) -> TingMaker:
-
-        # TODO: revisit typing here
-        if self._maker is not None:
-            if uri != self._maker_path:
-                raise Exception("Maker uri changed, this is not supported yet...")
-            return self._maker  # type: ignore
-
-        maker_name = f"bring.pkg_maker.{self.name}"
-        self._maker_path = uri
-        self._maker = self._tingistry_obj.create_singleting(  # type: ignore
-            name=maker_name,
-            ting_class="text_file_ting_maker",
-            prototing="bring.types.dynamic_pkg",
-            ting_name_strategy="basename_no_ext",
-            ting_target_namespace=self._pkg_namespace,
-            file_matchers=[
-                {"type": "extension", "regex": f".*\\{DEFAULT_PKG_EXTENSION}"}
-            ],
-        )
+            # every package update retrieves remote metadata, those share the network limit
+            async def update_pkg(_pkg: PkgTing = pkg):
+                async with limit("network"):
+                    return await _pkg.update_metadata()
 
-        self._maker.add_base_paths(uri)  # type: ignore
+            t = SingleTaskAsync(update_pkg, task_desc=td, parent_task=tasks)
+            await tasks.add_tasklet(t)
 
-        return self._maker  # type: ignore
+        return tasks
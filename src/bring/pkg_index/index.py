@@ -5,11 +5,13 @@ from typing import Any, Dict, Iterable, Mapping, Optional
 
 import arrow
 from anyio import create_task_group
-from bring.defaults import BRING_NO_METADATA_TIMESTAMP_MARKER
+from bring.defaults import BRING_NO_METADATA_TIMESTAMP_MARKER, PKG_RESOLVER_DEFAULTS
 from bring.pkg import PkgTing
 from bring.pkg_index.config import IndexConfig
 from bring.pkg_types import PkgMetadata
+from bring.utils.concurrency import run_limited
 from bring.utils.defaults import calculate_defaults
+from bring.utils.hashing import hash_content
 from frkl.common.async_utils import wrap_async_task
 from frkl.common.exceptions import FrklException
 from frkl.common.types import isinstance_or_subclass
@@ -20,6 +22,8 @@ from tings.ting.inheriting import InheriTing
 
 log = logging.getLogger("bring")
 
+PKG_CONTENT_HASHES_KEY = "_bring_pkg_content_hashes"
+
 
 class BringIndexTing(InheriTing, SimpleTing):
     def __init__(self, name: str, meta: TingMeta):
@@ -173,6 +177,11 @@ class BringIndexTing(InheriTing, SimpleTing):
     async def _create_update_tasks(self) -> Optional[Task]:
         raise NotImplementedError()
 
+    async def reload(self) -> None:
+        """Re-read the index source, e.g. after it changed on disk."""
+
+        self.invalidate()
+
     async def get_metadata_timestamp(self, return_format: str = "default") -> str:
 
         mts = await self._get_metadata_timestamp()
@@ -196,6 +205,14 @@ class BringIndexTing(InheriTing, SimpleTing):
 
         return None
 
+    async def get_content_hash(self) -> Optional[str]:
+        """Return a hash that changes whenever the package descriptions of this index change, if available.
+
+        Caches derived from the package descriptions (like the search index) prefer this over the metadata timestamp.
+        """
+
+        return None
+
     async def get_pkg(
         self, name: str, raise_exception: bool = True
     ) -> Optional[PkgTing]:
@@ -259,29 +276,99 @@ class BringIndexTing(InheriTing, SimpleTing):
         async with create_task_group() as tg:
             pkgs = await self.get_pkgs()
             for pkg in pkgs.values():
-                await tg.spawn(get_value, pkg, value_names)
+                await tg.spawn(run_limited, "network", get_value, pkg, value_names)
 
         return result
 
-    async def export_index(self, update: bool = True) -> Mapping[str, Any]:
+    async def export_index(
+        self,
+        update: bool = True,
+        previous_index: Optional[Mapping[str, Any]] = None,
+        metadata_max_age: Optional[int] = None,
+    ) -> Mapping[str, Any]:
+        """Export the index data, in a format that can be used as 'index_file'.
 
-        if update:
-            await self.update()
+        If the data of a previous export is provided, only packages whose package description changed, or whose
+        metadata is older than 'metadata_max_age' are re-resolved (and updated, if 'update' is set). The existing
+        records are used for all other packages.
+        """
+
+        if previous_index is None:
+            if update:
+                await self.update()
+            previous_index = {}
+
+        if metadata_max_age is None:
+            metadata_max_age = PKG_RESOLVER_DEFAULTS["metadata_max_age"]
 
         timestamp = await self.get_metadata_timestamp()
 
-        all_values = await self.get_all_pkg_values(
-            "source",
-            "metadata",
-            "aliases",
-            "info",
-            "labels",
-            "tags",
-            serializeable=True,
+        # those values come from the package description only, so they are cheap to get
+        content_values = await self.get_all_pkg_values(
+            "source", "info", "labels", "tags"
         )
+        content_hashes = {
+            pkg_name: hash_content(values)
+            for pkg_name, values in content_values.items()
+        }
+        previous_hashes = previous_index.get(PKG_CONTENT_HASHES_KEY, {})
 
-        _all_values: Dict[str, Any] = dict(all_values)
+        _all_values: Dict[str, Any] = {}
+        changed_pkgs = []
+        pkgs = await self.get_pkgs()
+        for pkg_name, pkg in pkgs.items():
+            previous = previous_index.get(pkg_name, None)
+            if (
+                previous is not None
+                and previous_hashes.get(pkg_name, None) == content_hashes[pkg_name]
+                and metadata_is_fresh(previous, metadata_max_age)
+            ):
+                _all_values[pkg_name] = previous
+            else:
+                changed_pkgs.append(pkg)
+
+        if previous_index:
+            log.debug(
+                f"Incremental export of index '{self.id}': {len(changed_pkgs)} of {len(pkgs)} package(s) changed or expired."
+            )
+
+        async def export_pkg(_pkg: PkgTing):
+
+            if update and previous_index:
+                await _pkg.update_metadata()
+            _vals = await _pkg.get_values(
+                "source", "metadata", "aliases", "info", "labels", "tags"
+            )
+            md: PkgMetadata = _vals["metadata"]  # type: ignore
+            _vals["metadata"] = md.to_dict()  # type: ignore
+            _all_values[_pkg.name] = _vals
+
+        async with create_task_group() as tg:
+            for pkg in changed_pkgs:
+                await tg.spawn(run_limited, "network", export_pkg, pkg)
 
         _all_values["_bring_metadata_timestamp"] = timestamp
+        _all_values[PKG_CONTENT_HASHES_KEY] = content_hashes
 
         return _all_values
+
+
+def metadata_is_fresh(pkg_data: Mapping[str, Any], metadata_max_age: int) -> bool:
+    """Check whether the metadata of an exported package is younger than 'metadata_max_age' seconds.
+
+    A negative max age means metadata never expires.
+    """
+
+    if metadata_max_age < 0:
+        return True
+
+    timestamp = pkg_data.get("metadata", {}).get("metadata_timestamp", None)
+    if not timestamp:
+        return False
+    try:
+        age = arrow.utcnow() - arrow.get(timestamp)
+    except Exception as e:
+        log.debug(f"Can't parse metadata timestamp '{timestamp}': {e}")
+        return False
+
+    return age.total_seconds() <= metadata_max_age
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from bring.defaults import BRING_INDEX_FILES_CACHE, BRING_PKG_LOOKUP_FILE
+from bring.utils.hashing import hash_content
+from frkl.common.downloads.cache import calculate_cache_path
+from frkl.common.filesystem import ensure_folder
+
+
+log = logging.getLogger("bring")
+
+PKG_LOOKUP_FORMAT = 1
+
+
+def calculate_index_fingerprint(index_config: Mapping[str, Any]) -> Optional[str]:
+    """Calculate a cheap fingerprint that changes whenever the package names of an index (might) change.
+
+    This only uses file system metadata, so the index itself does not need to be loaded. Returns 'None' for index
+    types that can't be fingerprinted this way (e.g. github/gitlab user indexes).
+    """
+
+    index_type = index_config.get("type", None)
+
+    if index_type == "folder":
+        path = index_config.get("path", None)
+        if not path or not os.path.isdir(path):
+            return None
+        # package names are file names, so the modification times of all folders are enough
+        mtimes = []
+        for root, dirnames, _ in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d != ".git")
+            mtimes.append((root, os.stat(root).st_mtime_ns))
+        return hash_content(mtimes)
+
+    index_file = index_config.get("index_file", None)
+    if index_type in ["index_file", "git_repo"] and index_file:
+        if not os.path.exists(index_file):
+            index_file = calculate_cache_path(
+                base_path=BRING_INDEX_FILES_CACHE, url=index_file
+            )
+        if not os.path.exists(index_file):
+            return None
+        st = os.stat(index_file)
+        return hash_content([index_file, st.st_mtime_ns, st.st_size])
+
+    return None
+
+
+class PkgIndexLookup(object):
+    """Maps package names (and full, or aliased package names) to the ids of the indexes that contain the package.
+
+    Entries are maintained per index. Entries of indexes that can be fingerprinted (see
+    'calculate_index_fingerprint') are persisted, and re-used as long as the fingerprint doesn't change.
+    """
+
+    def __init__(self, lookup_file: Optional[str] = BRING_PKG_LOOKUP_FILE):
+
+        self._lookup_file: Optional[str] = lookup_file
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._names: Optional[Dict[str, List[str]]] = None
+        self._changed: bool = False
+
+    def _get_entries(self) -> Dict[str, Dict[str, Any]]:
+
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+        if self._lookup_file and os.path.exists(self._lookup_file):
+            try:
+                with open(self._lookup_file, "r") as f:
+                    data = json.load(f)
+                if data.get("format", None) == PKG_LOOKUP_FORMAT:
+                    self._entries = data["indexes"]
+            except Exception as e:
+                log.debug(f"Can't read package lookup file, ignoring: {e}")
+
+        return self._entries
+
+    def is_current(self, index_id: str, fingerprint: Optional[str]) -> bool:
+
+        entry = self._get_entries().get(index_id, None)
+        if entry is None:
+            return False
+        return entry["fingerprint"] == fingerprint
+
+    def set_index_pkgs(
+        self, index_id: str, pkg_names: Iterable[str], fingerprint: Optional[str]
+    ) -> None:
+
+        self._get_entries()[index_id] = {
+            "fingerprint": fingerprint,
+            "pkgs": sorted(pkg_names),
+        }
+        self._names = None
+        self._changed = True
+
+    def invalidate_index(self, index_id: str) -> None:
+
+        if self._get_entries().pop(index_id, None) is not None:
+            self._names = None
+            self._changed = True
+
+    def get_index_ids(
+        self,
+        pkg_name: str,
+        index_ids: Optional[Iterable[str]] = None,
+        aliases: Optional[Mapping[str, str]] = None,
+    ) -> List[str]:
+        """Return the ids of all indexes that contain a package with the provided name.
+
+        The name can be a bare package name, or a full one ('<index_id>.<pkg_name>'). If 'aliases' (alias -> index
+        id) is provided, names using an index alias ('<alias>.<pkg_name>') are resolved too. If 'index_ids' is
+        provided, only those indexes are considered, in that order.
+        """
+
+        if self._names is None:
+            names: Dict[str, List[str]] = {}
+            for _index_id, entry in self._get_entries().items():
+                for _pkg_name in entry["pkgs"]:
+                    names.setdefault(_pkg_name, []).append(_index_id)
+                    names.setdefault(f"{_index_id}.{_pkg_name}", []).append(_index_id)
+            self._names = names
+
+        result = list(self._names.get(pkg_name, []))
+        if aliases:
+            # aliases can change without the indexes changing, so they are resolved here and never persisted
+            for alias, _index_id in aliases.items():
+                if not pkg_name.startswith(f"{alias}."):
+                    continue
+                full_name = f"{_index_id}.{pkg_name[len(alias) + 1:]}"
+                for i in self._names.get(full_name, []):
+                    if i not in result:
+                        result.append(i)
+
+        if index_ids is None:
+            return result
+        return [i for i in index_ids if i in result]
+
+    def save(self) -> None:
+
+        if not self._changed or not self._lookup_file:
+            return
+
+        persisted = {
+            k: v for k, v in self._get_entries().items() if v["fingerprint"] is not None
+        }
+        ensure_folder(os.path.dirname(self._lookup_file))
+        temp_file = f"{self._lookup_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump({"format": PKG_LOOKUP_FORMAT, "indexes": persisted}, f)
+        os.replace(temp_file, self._lookup_file)
+        self._changed = False
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Cache for the parsed content of '.bring' package description files ('manifests') of folder indexes.
+
+Parsing yaml is slow, so the parsed content of every manifest is cached, keyed by its path, modification time, size
+and content hash. All entries of one index folder are stored together, in a single (compressed) file.
+"""
+import logging
+import os
+import pickle
+import zlib
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from bring.defaults import BRING_MANIFEST_CACHE, DEFAULT_PKG_EXTENSION
+from bring.utils.hashing import hash_bytes, hash_content
+from frkl.common.exceptions import FrklException
+from frkl.common.filesystem import ensure_folder
+from ruamel.yaml import YAML
+
+
+log = logging.getLogger("bring")
+
+MANIFEST_CACHE_FORMAT = 1
+
+ManifestEntry = Tuple[int, int, str, Mapping[str, Any]]
+"""Modification time (ns), size, content hash and parsed content of a manifest."""
+
+
+def parse_manifest(content: str, path: str) -> Mapping[str, Any]:
+
+    yaml = YAML(typ="safe")
+    data = yaml.load(content)
+
+    if not isinstance(data, Mapping):
+        raise FrklException(
+            msg=f"Can't read package file '{path}'.",
+            reason="Content is not a dictionary.",
+        )
+    return data
+
+
+def find_manifests(base_path: str) -> Dict[str, str]:
+    """Find all package description files within a folder (recursively).
+
+    Returns:
+        Dict[str, str]: a map with package names as keys, and the paths to the respective files as values
+    """
+
+    result: Dict[str, str] = {}
+    for root, dirnames, filenames in os.walk(base_path):
+        dirnames[:] = sorted(d for d in dirnames if d != ".git")
+        for f in sorted(filenames):
+            if not f.endswith(DEFAULT_PKG_EXTENSION):
+                continue
+            pkg_name = f[0 : -len(DEFAULT_PKG_EXTENSION)]
+            path = os.path.join(root, f)
+            if pkg_name in result.keys():
+                log.warning(
+                    f"Ignoring package file '{path}': duplicate package name '{pkg_name}' (also in '{result[pkg_name]}')."
+                )
+                continue
+            result[pkg_name] = path
+
+    return result
+
+
+class ManifestCache(object):
+    def __init__(self, base_path: str, cache_file: Optional[str] = None):
+
+        self._base_path: str = os.path.realpath(base_path)
+        if cache_file is None:
+            cache_file = os.path.join(
+                BRING_MANIFEST_CACHE, f"{hash_content(self._base_path)}.pickle.z"
+            )
+        self._cache_file: str = cache_file
+        self._entries: Optional[Dict[str, ManifestEntry]] = None
+        self._changed: bool = False
+
+    def _get_entries(self) -> Dict[str, ManifestEntry]:
+
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+        if os.path.exists(self._cache_file):
+            try:
+                with open(self._cache_file, "rb") as f:
+                    data = pickle.loads(zlib.decompress(f.read()))
+                if data.get("format", None) == MANIFEST_CACHE_FORMAT:
+                    self._entries = data["entries"]
+            except Exception as e:
+                log.debug(f"Can't read manifest cache '{self._cache_file}': {e}")
+
+        return self._entries
+
+    def get_manifest(self, path: str) -> Tuple[str, Mapping[str, Any]]:
+        """Return the content hash and the parsed content of a manifest file.
+
+        The file is only read if its modification time or size changed, and only parsed if its content did.
+        """
+
+        entries = self._get_entries()
+        key = os.path.relpath(os.path.realpath(path), self._base_path)
+
+        st = os.stat(path)
+        entry = entries.get(key, None)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2], entry[3]
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        content_hash = hash_bytes(raw)
+
+        if entry is not None and entry[2] == content_hash:
+            content = entry[3]
+        else:
+            content = parse_manifest(raw.decode("utf-8"), path)
+
+        entries[key] = (st.st_mtime_ns, st.st_size, content_hash, content)
+        self._changed = True
+        return content_hash, content
+
+    def prune(self, paths: Iterable[str]) -> None:
+        """Remove the entries of all files that are not in the provided list."""
+
+        keep = set(os.path.relpath(os.path.realpath(p), self._base_path) for p in paths)
+        entries = self._get_entries()
+        for key in [k for k in entries.keys() if k not in keep]:
+            entries.pop(key)
+            self._changed = True
+
+    def save(self) -> None:
+
+        if not self._changed:
+            return
+
+        data = {"format": MANIFEST_CACHE_FORMAT, "entries": self._get_entries()}
+        ensure_folder(os.path.dirname(self._cache_file))
+        temp_file = f"{self._cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)))
+        os.replace(temp_file, self._cache_file)
+        self._changed = False
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING, Any, Dict, List, Mapping
 
 from anyio import create_task_group
 from bring.pkg import PkgTing
+from bring.utils.concurrency import run_limited
 from tings.ting import Ting, TingMeta
 from tings.ting.tings import SubscripTings
 
@@ -77,7 +78,15 @@ class Pkgs(SubscripTings):
 
         async with create_task_group() as tg:
             for pkg_name, pkg in self.pkgs.items():
-                await tg.spawn(get_info, pkg_name, pkg, include_metadata, update)
+                await tg.spawn(
+                    run_limited,
+                    "network",
+                    get_info,
+                    pkg_name,
+                    pkg,
+                    include_metadata,
+                    update,
+                )
 
         return result
 
@@ -91,7 +100,7 @@ class Pkgs(SubscripTings):
 
         async with create_task_group() as tg:
             for pkg in self.pkgs.values():
-                await tg.spawn(get_value, pkg, value_names)
+                await tg.spawn(run_limited, "network", get_value, pkg, value_names)
                 # break
 
         return result
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""Search over the packages of one or several indexes.
+
+Every index gets its own inverted index (search term -> packages), built from the package names, 'info' (slug,
+desc), 'labels' and 'tags' values. Those are persisted in the bring cache, and only re-built if the index metadata
+changes.
+
+Query syntax: search terms are matched exactly, as prefix, or (if nothing else matches) fuzzy. All terms have to
+match. Facet filters restrict the results to packages with a label ('label:<key>=<value>'), a tag ('tag:<tag>'),
+or in an index ('index:<index_id>').
+"""
+import bisect
+import difflib
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from bring.defaults import BRING_SEARCH_INDEX_CACHE
+from bring.pkg_index.index import BringIndexTing
+from bring.utils.hashing import hash_content
+from bring.utils.pkgs import get_values_for_pkgs
+from frkl.common.filesystem import ensure_folder
+
+
+log = logging.getLogger("bring")
+
+SEARCH_INDEX_FORMAT = 1
+
+TOKEN_REGEX = re.compile(r"[a-z0-9][a-z0-9_\-+.]*")
+
+FACET_PREFIXES = ["label:", "tag:", "index:"]
+
+# relative weights of the different ways a term can match a package
+EXACT_MATCH_SCORE = 3.0
+PREFIX_MATCH_SCORE = 2.0
+FUZZY_MATCH_SCORE = 1.0
+NAME_MATCH_BONUS = 2.0
+
+
+def tokenize(text: Any) -> List[str]:
+
+    if not text:
+        return []
+    if not isinstance(text, str):
+        text = str(text)
+    return [t.strip(".-") for t in TOKEN_REGEX.findall(text.lower()) if t.strip(".-")]
+
+
+class SearchResult(object):
+    def __init__(self, index_id: str, pkg_name: str, slug: str, score: float):
+
+        self.index_id: str = index_id
+        self.pkg_name: str = pkg_name
+        self.slug: str = slug
+        self.score: float = score
+
+    @property
+    def full_name(self) -> str:
+
+        return f"{self.index_id}.{self.pkg_name}"
+
+    def __repr__(self):
+
+        return f"SearchResult(pkg={self.full_name}, score={self.score})"
+
+
+class PkgSearchIndex(object):
+    """Inverted index for the packages of a single bring index."""
+
+    def __init__(
+        self,
+        index_id: str,
+        version: Optional[str] = None,
+        pkgs: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ):
+
+        self._index_id: str = index_id
+        self._version: Optional[str] = version
+
+        self._pkgs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._facets: Dict[str, Set[str]] = {}
+        self._terms: Optional[List[str]] = None
+
+        if pkgs:
+            for pkg_name, details in pkgs.items():
+                self._add(pkg_name, details)
+
+    @property
+    def index_id(self) -> str:
+
+        return self._index_id
+
+    @property
+    def version(self) -> Optional[str]:
+
+        return self._version
+
+    @property
+    def terms(self) -> List[str]:
+
+        if self._terms is None:
+            self._terms = sorted(self._postings.keys())
+        return self._terms
+
+    def add_pkg(
+        self,
+        pkg_name: str,
+        info: Optional[Mapping[str, Any]] = None,
+        labels: Optional[Mapping[str, Any]] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+
+        if info is None:
+            info = {}
+        details = {
+            "slug": info.get("slug", ""),
+            "desc": info.get("desc", ""),
+            "labels": dict(labels) if labels else {},
+            "tags": list(tags) if tags else [],
+        }
+        self._add(pkg_name, details)
+
+    def _add(self, pkg_name: str, details: Mapping[str, Any]) -> None:
+
+        self._pkgs[pkg_name] = dict(details)
+        self._terms = None
+
+        terms: Set[str] = set(tokenize(pkg_name))
+        terms.add(pkg_name.lower())
+        terms.update(tokenize(details.get("slug", None)))
+        terms.update(tokenize(details.get("desc", None)))
+        for k, v in details.get("labels", {}).items():
+            terms.update(tokenize(v))
+            self._facets.setdefault(f"label:{k}={v}".lower(), set()).add(pkg_name)
+        for tag in details.get("tags", []):
+            terms.update(tokenize(tag))
+            self._facets.setdefault(f"tag:{tag}".lower(), set()).add(pkg_name)
+
+        for term in terms:
+            self._postings.setdefault(term, set()).add(pkg_name)
+
+    def _match_term(self, term: str) -> Dict[str, float]:
+
+        result: Dict[str, float] = {}
+
+        for pkg_name in self._postings.get(term, ()):
+            result[pkg_name] = EXACT_MATCH_SCORE
+
+        terms = self.terms
+        i = bisect.bisect_left(terms, term)
+        while i < len(terms) and terms[i].startswith(term):
+            for pkg_name in self._postings[terms[i]]:
+                if pkg_name not in result:
+                    result[pkg_name] = PREFIX_MATCH_SCORE
+            i = i + 1
+
+        if not result:
+            for close in difflib.get_close_matches(term, terms, n=5, cutoff=0.75):
+                for pkg_name in self._postings[close]:
+                    result[pkg_name] = max(result.get(pkg_name, 0), FUZZY_MATCH_SCORE)
+
+        return result
+
+    def search(
+        self, terms: Iterable[str], facets: Iterable[str] = ()
+    ) -> List[SearchResult]:
+
+        candidates: Optional[Set[str]] = None
+        for facet in facets:
+            if facet.startswith("index:"):
+                if facet[6:] != self._index_id.lower():
+                    return []
+                continue
+            matches = self._facets.get(facet, set())
+            candidates = matches if candidates is None else candidates & matches
+
+        scores: Dict[str, float] = {}
+        terms = list(terms)
+        if not terms:
+            for pkg_name in candidates if candidates is not None else self._pkgs.keys():
+                scores[pkg_name] = 0.0
+        else:
+            for idx, term in enumerate(terms):
+                matches = self._match_term(term)
+                if candidates is not None:
+                    matches = {k: v for k, v in matches.items() if k in candidates}
+                if idx == 0:
+                    scores = dict(matches)
+                else:
+                    scores = {
+                        k: v + matches[k] for k, v in scores.items() if k in matches
+                    }
+                if not scores:
+                    return []
+
+            for pkg_name in scores.keys():
+                if pkg_name.lower() in terms:
+                    scores[pkg_name] = scores[pkg_name] + NAME_MATCH_BONUS
+
+        return [
+            SearchResult(
+                index_id=self._index_id,
+                pkg_name=pkg_name,
+                slug=self._pkgs[pkg_name].get("slug", ""),
+                score=score,
+            )
+            for pkg_name, score in scores.items()
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+
+        return {
+            "format": SEARCH_INDEX_FORMAT,
+            "index_id": self._index_id,
+            "version": self._version,
+            "pkgs": self._pkgs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "PkgSearchIndex":
+
+        return PkgSearchIndex(
+            index_id=data["index_id"], version=data["version"], pkgs=data["pkgs"]
+        )
+
+
+def parse_query(query: str) -> Tuple[List[str], List[str]]:
+    """Split a query string into search terms and facet filters."""
+
+    terms: List[str] = []
+    facets: List[str] = []
+    for token in query.split():
+        if any(token.lower().startswith(p) for p in FACET_PREFIXES):
+            facets.append(token.lower())
+        else:
+            terms.extend(tokenize(token))
+
+    return terms, facets
+
+
+def _cache_path(index_id: str) -> str:
+
+    return os.path.join(BRING_SEARCH_INDEX_CACHE, f"{hash_content(index_id)}.json")
+
+
+async def get_search_index(index: BringIndexTing) -> PkgSearchIndex:
+    """Load the (cached) search index for a bring index, (re-)build it if necessary."""
+
+    # prefer a hash of the package descriptions, timestamps can change without the content changing
+    content_hash = await index.get_content_hash()
+    if content_hash is not None:
+        version = hash_content({"id": index.id, "content": content_hash})
+    else:
+        timestamp = await index.get_metadata_timestamp()
+        version = hash_content({"id": index.id, "timestamp": timestamp})
+
+    path = _cache_path(index.id)
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if (
+                data.get("format", None) == SEARCH_INDEX_FORMAT
+                and data.get("version", None) == version
+            ):
+                return PkgSearchIndex.from_dict(data)
+        except Exception as e:
+            log.debug(f"Can't load search index '{path}', re-building: {e}")
+
+    pkgs = await index.get_pkgs()
+    values = await get_values_for_pkgs(
+        pkgs, "info", "labels", "tags", skip_pkgs_with_error=True
+    )
+
+    search_index = PkgSearchIndex(index_id=index.id, version=version)
+    for pkg_name, vals in values.items():
+        search_index.add_pkg(
+            pkg_name,
+            info=vals.get("info", None),  # type: ignore
+            labels=vals.get("labels", None),  # type: ignore
+            tags=vals.get("tags", None),  # type: ignore
+        )
+
+    ensure_folder(BRING_SEARCH_INDEX_CACHE)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(search_index.to_dict(), f)
+    os.replace(temp_path, path)
+
+    return search_index
+
+
+def search_pkgs(
+    search_indexes: Iterable[PkgSearchIndex], query: str, limit: Optional[int] = None
+) -> List[SearchResult]:
+
+    terms, facets = parse_query(query)
+
+    results: List[SearchResult] = []
+    for search_index in search_indexes:
+        results.extend(search_index.search(terms, facets))
+
+    results.sort(key=lambda r: (-r.score, r.index_id, r.pkg_name))
+    if limit:
+        results = results[0:limit]
+    return results
@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 import logging
-from typing import Any, Dict, Mapping, Optional
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
 
 import arrow
 from bring.pkg import PkgTing
+from bring.pkg_index.binary_index import BinaryIndexReader, is_binary_index_file
 from bring.pkg_index.config import IndexConfig
 from bring.pkg_index.index import BringIndexTing
-from bring.pkg_index.utils import retrieve_index_file_content
+from bring.pkg_index.utils import (
+    ensure_index_file_is_local,
+    retrieve_index_file_content,
+)
+from bring.utils.concurrency import limit
 from frkl.common.exceptions import FrklException
 from frkl.tasks.task import SingleTaskAsync, Task
 from frkl.tasks.task_desc import TaskDesc
@@ -32,11 +37,19 @@ class BringIndexFile(object):
 
     async def update(self):
 
-        self._pkg_data = None
-        self._metadata = None
+        self.close()
 
         await self.get_pkg_data(update_index_file=True)
 
+    def close(self) -> None:
+        """Release the (memory-mapped) index file, if any, data is re-read on next access."""
+
+        if isinstance(self._pkg_data, BinaryIndexReader):
+            self._pkg_data.close()
+
+        self._pkg_data = None
+        self._metadata = None
+
     async def get_pkg_data(
         self, update_index_file: bool = False
     ) -> Mapping[str, Mapping[str, Any]]:
@@ -44,30 +57,40 @@ class BringIndexFile(object):
         if self._pkg_data is not None:
             return self._pkg_data
 
-        pkgs: Dict[str, Mapping[str, Any]] = {}
-
-        data: Mapping[str, Any] = await retrieve_index_file_content(
+        # remote index files are downloaded into the local cache, so we can memory-map binary ones
+        local_path = await ensure_index_file_is_local(
             self._index_file, update=update_index_file
         )
 
-        index_metadata: Dict[str, Any] = {}
-
-        for pkg_name, pkg_data in data.items():
-
-            if pkg_name.startswith("_bring_"):
-
-                if pkg_name == "_bring_metadata_timestamp":
-                    try:
-                        pkg_data = arrow.get(pkg_data)
-                        index_metadata[pkg_name] = pkg_data
-                    except Exception as e:
-                        log.debug(f"Can't parse date '{pkg_data}', ignoring: {e}")
+        pkgs: Mapping[str, Mapping[str, Any]]
+        metadata: Mapping[str, Any]
+        if is_binary_index_file(local_path):
+            reader = BinaryIndexReader(local_path)
+            pkgs = reader
+            metadata = reader.metadata
+        else:
+            data: Mapping[str, Any] = await retrieve_index_file_content(local_path)
+            json_pkgs: Dict[str, Mapping[str, Any]] = {}
+            json_metadata: Dict[str, Any] = {}
+            for pkg_name, pkg_data in data.items():
+                if pkg_name.startswith("_bring_"):
+                    json_metadata[pkg_name] = pkg_data
                 else:
-                    index_metadata[pkg_name] = pkg_data
+                    json_pkgs[pkg_name] = pkg_data
+            pkgs = json_pkgs
+            metadata = json_metadata
 
-                continue
+        index_metadata: Dict[str, Any] = {}
 
-            pkgs[pkg_name] = pkg_data
+        for key, value in metadata.items():
+
+            if key == "_bring_metadata_timestamp":
+                try:
+                    index_metadata[key] = arrow.get(value)
+                except Exception as e:
+                    log.debug(f"Can't parse date '{value}', ignoring: {e}")
+            else:
+                index_metadata[key] = value
 
         self._pkg_data = pkgs
         self._metadata = index_metadata
@@ -84,29 +107,70 @@ class BringIndexFile(object):
                 reason="No package with that name available.",
             )
 
-        ting: PkgTing = index.tingistry.get_ting(  # type: ignore
-            f"{index.full_name}.pkgs.{pkg_name}"
+        return create_static_pkg_ting(index=index, pkg_name=pkg_name, pkg_data=pkg_data)
+
+    async def create_tings(self, index: BringIndexTing) -> Mapping[str, PkgTing]:
+        """Return a mapping of all packages in this index file, package tings are only created when accessed."""
+
+        pkgs = await self.get_pkg_data()
+
+        return LazyPkgTingMap(index=index, pkg_data=pkgs)
+
+
+def create_static_pkg_ting(
+    index: BringIndexTing, pkg_name: str, pkg_data: Mapping[str, Any]
+) -> PkgTing:
+
+    ting: PkgTing = index.tingistry.get_ting(  # type: ignore
+        f"{index.full_name}.pkgs.{pkg_name}"
+    )
+    if ting is None:
+        ting = index.tingistry.create_ting(  # type: ignore
+            "bring.types.static_pkg",
+            f"{index.full_name}.pkgs.{pkg_name}",  # type: ignore
         )
+        # ting.bring_index = index
+
+    ting.set_input(**pkg_data)
+    # ting._set_result(data)
+    return ting
+
+
+class LazyPkgTingMap(Mapping[str, PkgTing]):
+    """Maps package names to package tings, tings are created (and registered) on first access.
+
+    Package names are taken from the raw package data, so listing or checking names doesn't create any tings.
+    """
+
+    def __init__(
+        self, index: BringIndexTing, pkg_data: Mapping[str, Mapping[str, Any]]
+    ):
+
+        self._index: BringIndexTing = index
+        self._pkg_data: Mapping[str, Mapping[str, Any]] = pkg_data
+        self._tings: Dict[str, PkgTing] = {}
+
+    def __getitem__(self, pkg_name: str) -> PkgTing:
+
+        ting = self._tings.get(pkg_name, None)
         if ting is None:
-            ting = index.tingistry.create_ting(  # type: ignore
-                "bring.types.static_pkg",
-                f"{index.full_name}.pkgs.{pkg_name}",  # type: ignore
+            ting = create_static_pkg_ting(
+                index=self._index, pkg_name=pkg_name, pkg_data=self._pkg_data[pkg_name]
             )
-            # ting.bring_index = index
-
-        ting.set_input(**pkg_data)
-        # ting._set_result(data)
+            self._tings[pkg_name] = ting
         return ting
 
-    async def create_tings(self, index: BringIndexTing) -> Mapping[str, PkgTing]:
+    def __contains__(self, pkg_name: object) -> bool:
 
-        pkgs = await self.get_pkg_data()
+        return pkg_name in self._pkg_data
+
+    def __iter__(self) -> Iterator[str]:
 
-        result: Dict[str, PkgTing] = {}
-        for pkg_name in pkgs.keys():
-            result[pkg_name] = await self.create_ting(index=index, pkg_name=pkg_name)
+        return iter(self._pkg_data)
 
-        return result
+    def __len__(self) -> int:
+
+        return len(self._pkg_data)
 
 
 class BringStaticIndexTing(BringIndexTing):
@@ -120,6 +184,8 @@ class BringStaticIndexTing(BringIndexTing):
     def _invalidate(self) -> None:
 
         self._pkgs = None
+        if self._index_file is not None:
+            self._index_file.close()
         self._index_file = None
 
     async def _get_metadata_timestamp(self) -> Optional[str]:
@@ -151,6 +217,13 @@ class BringStaticIndexTing(BringIndexTing):
             self._pkgs = await index_file.create_tings(self)
         return self._pkgs
 
+    @property
+    async def pkg_names(self) -> Iterable[str]:
+
+        index_file = await self.get_index_file()
+        pkg_data = await index_file.get_pkg_data()
+        return pkg_data.keys()
+
     async def _create_update_tasks(self) -> Optional[Task]:
 
         task_desc = TaskDesc(
@@ -160,7 +233,8 @@ class BringStaticIndexTing(BringIndexTing):
 
         async def update_index():
             self.invalidate()
-            await self.get_index_file(update=True)
+            async with limit("network"):
+                await self.get_index_file(update=True)
 
         task = SingleTaskAsync(update_index, task_desc=task_desc, parent_task=None)
 
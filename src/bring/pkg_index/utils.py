@@ -5,13 +5,21 @@ import os
 import zlib
 from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Set
 
-from anyio import aopen
+from anyio import aopen, create_task_group
 from bring.defaults import BRING_INDEX_FILES_CACHE
 from bring.pkg import PkgTing
+from bring.pkg_index.binary_index import deserialize_binary_index, is_binary_index
+from bring.pkg_index.delta import INDEX_MANIFEST_SUFFIX, update_index_file_with_deltas
 from bring.pkg_index.index import BringIndexTing
+from bring.utils.concurrency import run_limited
+from bring.utils.hashing import hash_content
+from bring.utils.metrics import record_cache_access
 from frkl.common.async_utils import wrap_async_task
 from frkl.common.downloads import REMOTE_FILE_TYPE
-from frkl.common.downloads.cache import download_cached_file_async
+from frkl.common.downloads.cache import (
+    calculate_cache_path,
+    download_cached_file_async,
+)
 from frkl.common.exceptions import FrklException
 from rich.console import Console, ConsoleOptions, RenderResult
 
@@ -197,29 +205,30 @@ async def diff_packages(
     versions_added: MutableMapping[PkgTing, Iterable[Mapping[str, Any]]] = {}
     versions_removed: MutableMapping[PkgTing, Iterable[Mapping[str, Any]]] = {}
 
-    for pkg_name, pkg in pkgs_orig.items():
+    async def diff_pkg(_pkg: PkgTing, _pkg_new: PkgTing):
 
-        pkg_new = pkgs_new.get(pkg_name, None)
-        if pkg_new is None:
-            pkgs_missing.append(pkg)
-            continue
+        _v_orig = await _pkg.get_versions()
+        _v_new = await _pkg_new.get_versions()
 
-        _v_orig = await pkg.get_versions()
-        v_orig = []
-        for v in _v_orig:
-            v_orig.append(v.to_dict())
-        _v_new = await pkg_new.get_versions()
-        v_new = []
-        for v in _v_new:
-            v_new.append(v.to_dict())
-
-        v_diff = diff_version_lists(v_orig, v_new)
+        v_diff = diff_version_lists(
+            [v.to_dict() for v in _v_orig], [v.to_dict() for v in _v_new]
+        )
         if v_diff:
-            pkgs_diff[pkg] = v_diff
+            pkgs_diff[_pkg] = v_diff
             if v_diff.get("added", None):
-                versions_added[pkg] = v_diff["added"]
+                versions_added[_pkg] = v_diff["added"]
             if v_diff.get("removed", None):
-                versions_removed[pkg] = v_diff["removed"]
+                versions_removed[_pkg] = v_diff["removed"]
+
+    async with create_task_group() as tg:
+        for pkg_name, pkg in pkgs_orig.items():
+
+            pkg_new = pkgs_new.get(pkg_name, None)
+            if pkg_new is None:
+                pkgs_missing.append(pkg)
+                continue
+
+            await tg.spawn(run_limited, "network", diff_pkg, pkg, pkg_new)
 
     for pkg_name, pkg in pkgs_new.items():
 
@@ -245,17 +254,17 @@ def diff_version_lists(
     versions_orig: Iterable[Mapping[str, Any]],
     versions_new: Iterable[Mapping[str, Any]],
 ) -> Mapping[str, Iterable[Mapping[str, Any]]]:
+    """Diff two lists of (serialized) versions.
 
-    versions_missing = []
-    versions_added = []
+    Versions are compared via digests of their canonical json representation, the order of the input lists is kept
+    in the result.
+    """
 
-    for version in versions_orig:
-        if version not in versions_new:
-            versions_missing.append(version)
+    digests_orig = {hash_content(v): v for v in versions_orig}
+    digests_new = {hash_content(v): v for v in versions_new}
 
-    for version in versions_new:
-        if version not in versions_orig:
-            versions_added.append(version)
+    versions_missing = [v for d, v in digests_orig.items() if d not in digests_new]
+    versions_added = [v for d, v in digests_new.items() if d not in digests_orig]
 
     result = {}
     if versions_added:
@@ -266,13 +275,43 @@ def diff_version_lists(
     return result
 
 
-async def ensure_index_file_is_local(index_url: str) -> str:
+async def refresh_cached_index_file(index_url: str) -> bool:
+    """Try to update the cached copy of a remote index file via deltas.
+
+    Returns 'True' if the cached copy is up-to-date afterwards, otherwise the full index file needs to be downloaded.
+    """
+
+    if await update_index_file_with_deltas(index_url):
+        return True
+
+    # the cached manifest won't match the (fully) re-downloaded index file
+    manifest_path = (
+        calculate_cache_path(base_path=BRING_INDEX_FILES_CACHE, url=index_url)
+        + INDEX_MANIFEST_SUFFIX
+    )
+    if os.path.exists(manifest_path):
+        os.unlink(manifest_path)
+    return False
+
+
+async def ensure_index_file_is_local(index_url: str, update: bool = False) -> str:
 
     if os.path.exists(index_url):
         return index_url
 
+    if update and await refresh_cached_index_file(index_url):
+        update = False
+
+    record_cache_access(
+        "index",
+        hit=not update
+        and os.path.exists(
+            calculate_cache_path(base_path=BRING_INDEX_FILES_CACHE, url=index_url)
+        ),
+    )
     cache_path = await download_cached_file_async(
         url=index_url,
+        update=update,
         cache_base=BRING_INDEX_FILES_CACHE,
         return_content=False,
         file_type=REMOTE_FILE_TYPE.bytes,
@@ -290,6 +329,16 @@ async def retrieve_index_file_content(
             content = await f.read()
     else:
 
+        if update and await refresh_cached_index_file(index_url):
+            update = False
+
+        record_cache_access(
+            "index",
+            hit=not update
+            and os.path.exists(
+                calculate_cache_path(base_path=BRING_INDEX_FILES_CACHE, url=index_url)
+            ),
+        )
         content = await download_cached_file_async(
             url=index_url,
             update=update,
@@ -298,6 +347,9 @@ async def retrieve_index_file_content(
             file_type=REMOTE_FILE_TYPE.bytes,
         )
 
+    if is_binary_index(content):  # type: ignore
+        return deserialize_binary_index(content, source=index_url)  # type: ignore
+
     json_string = zlib.decompress(content, 16 + zlib.MAX_WBITS)  # type: ignore
 
     data = json.loads(json_string)
@@ -1,14 +1,37 @@
 # -*- coding: utf-8 -*-
+import bisect
 import copy
+import functools
+import itertools
 import logging
 import os
 import pathlib
 import pickle
 import shutil
+import sys
 import tempfile
+import uuid
 from abc import ABCMeta, abstractmethod
+from array import array
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from weakref import WeakKeyDictionary
+
+import collections.abc
 
 import arrow
 from anyio import aopen
@@ -19,9 +42,13 @@ from bring.defaults import (
     DEFAULT_ARGS_DICT,
     PKG_RESOLVER_DEFAULTS,
 )
-from deepdiff import DeepHash
+from bring.utils.concurrency import run_cpu_bound
+from bring.utils.hashing import hash_content_memoized
+from bring.utils.metrics import record_cache_access
+from bring.utils.plugins import get_plugin_class, load_plugin_modules
 from frkl.args.hive import ArgHive
 from frkl.common.dicts import dict_merge, get_seeded_dict
+from frkl.common.exceptions import FrklException
 from frkl.common.filesystem import ensure_folder
 from frkl.common.jinja_templating import (
     get_global_jinja_env,
@@ -40,8 +67,16 @@ log = logging.getLogger("bring")
 
 DEFAULT_PKG_DESC_TEMPLATE_FILE = pathlib.Path(BRING_RESOURCES_FOLDER) / "pkg_desc.j2"
 
+METADATA_VERSIONS_FILE_SUFFIX = ".versions"
+
+SOURCE_ID_HASH_VERSION = 2
+"""Version of the hashing scheme for source ids, needs to be increased if it changes, so old ids are not re-used."""
+
 
 class PkgVersion(object):
+
+    __slots__ = ("_steps", "_vars", "_metadata")
+
     def __init__(
         self,
         steps: Iterable[Mapping[str, Any]],
@@ -55,6 +90,16 @@ class PkgVersion(object):
             metadata = {}
         self._metadata: Mapping[str, Any] = metadata
 
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return (self._steps, self._vars, self._metadata)
+
+    def __setstate__(self, state: Any) -> None:
+
+        # objects pickled by older versions have their attributes in a dict
+        if isinstance(state, Mapping):
+            state = (state["_steps"], state["_vars"], state["_metadata"])
+        self._steps, self._vars, self._metadata = state
+
     @property
     def steps(self) -> List[Mapping[str, Any]]:
         return self._steps
@@ -80,6 +125,456 @@ class PkgVersion(object):
         return result
 
 
+class _ValueTable(object):
+    """Helper to de-duplicate the values (and key tuples) of a list of versions while it's being packed."""
+
+    def __init__(self):
+
+        self.values: List[Any] = []
+        self._ids: Dict[Any, int] = {}
+        self.shapes: List[Tuple[Any, ...]] = []
+        self._shape_ids: Dict[Tuple[Any, ...], int] = {}
+
+    def value_id(self, value: Any) -> int:
+
+        try:
+            key: Any = (type(value), value)
+            value_id = self._ids.get(key, None)
+        except TypeError:
+            # unhashable values (e.g. mogrify dicts) are often the same object for all versions
+            key = ("__id__", id(value))
+            value_id = self._ids.get(key, None)
+
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self._ids[key] = value_id
+        return value_id
+
+    def shape_id(self, keys: Iterable[Any]) -> int:
+
+        shape = tuple(sys.intern(k) if isinstance(k, str) else k for k in keys)
+        shape_id = self._shape_ids.get(shape, None)
+        if shape_id is None:
+            shape_id = len(self.shapes)
+            self.shapes.append(shape)
+            self._shape_ids[shape] = shape_id
+        return shape_id
+
+
+class PkgVersionList(collections.abc.Sequence):
+    """Compact, read-only list of package versions.
+
+    Values are de-duplicated into one table, and stored as columns (one per var/metadata key) of ids into that
+    table. Key tuples ('shapes') are shared, as are step templates (key tuples of steps), with the values of every
+    step stored per version. 'PkgVersion' objects are created on access.
+    """
+
+    __slots__ = (
+        "_size",
+        "_values",
+        "_shapes",
+        "_var_shapes",
+        "_var_columns",
+        "_metadata_shapes",
+        "_metadata_columns",
+        "_step_offsets",
+        "_step_data",
+    )
+
+    def __init__(self, versions: Iterable[PkgVersion]):
+
+        table = _ValueTable()
+        self._size: int = 0
+        self._var_shapes: array = array("i")
+        self._var_columns: Dict[str, array] = {}
+        self._metadata_shapes: array = array("i")
+        self._metadata_columns: Dict[str, array] = {}
+        self._step_offsets: array = array("i", [0])
+        self._step_data: array = array("i")
+
+        for pos, version in enumerate(versions):
+            self._size = pos + 1
+            self._add_dict(
+                pos, version.vars, table, self._var_shapes, self._var_columns
+            )
+            self._add_dict(
+                pos,
+                version.metadata,
+                table,
+                self._metadata_shapes,
+                self._metadata_columns,
+            )
+            for step in version.steps:
+                self._step_data.append(table.shape_id(step.keys()))
+                self._step_data.extend(table.value_id(v) for v in step.values())
+            self._step_offsets.append(len(self._step_data))
+
+        self._values: List[Any] = table.values
+        self._shapes: List[Tuple[Any, ...]] = table.shapes
+
+    def _add_dict(
+        self,
+        pos: int,
+        data: Mapping[str, Any],
+        table: _ValueTable,
+        shapes: array,
+        columns: Dict[str, array],
+    ) -> None:
+
+        shapes.append(table.shape_id(data.keys()))
+        for k, v in data.items():
+            column = columns.get(k, None)
+            if column is None:
+                column = array("i", [-1]) * pos
+                columns[sys.intern(k)] = column
+            column.extend([-1] * (pos - len(column)))
+            column.append(table.value_id(v))
+
+    def _get_dict(
+        self, pos: int, shapes: array, columns: Dict[str, array]
+    ) -> Dict[str, Any]:
+
+        values = self._values
+        return {k: values[columns[k][pos]] for k in self._shapes[shapes[pos]]}
+
+    def _get_version(self, pos: int) -> PkgVersion:
+
+        values = self._values
+        steps = []
+        data = self._step_data
+        idx = self._step_offsets[pos]
+        end = self._step_offsets[pos + 1]
+        while idx < end:
+            shape = self._shapes[data[idx]]
+            idx = idx + 1
+            steps.append({k: values[data[idx + i]] for i, k in enumerate(shape)})
+            idx = idx + len(shape)
+
+        return PkgVersion(
+            steps=steps,
+            vars=self._get_dict(pos, self._var_shapes, self._var_columns),
+            metadata=self._get_dict(pos, self._metadata_shapes, self._metadata_columns),
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [self._get_version(i) for i in range(*index.indices(self._size))]
+
+        if index < 0:
+            index = index + self._size
+        if index < 0 or index >= self._size:
+            raise IndexError("version index out of range")
+        return self._get_version(index)
+
+    def __iter__(self) -> Iterator[PkgVersion]:
+
+        for pos in range(self._size):
+            yield self._get_version(pos)
+
+    def iter_vars(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the vars of all versions, without creating the version objects."""
+
+        for pos in range(self._size):
+            yield self._get_dict(pos, self._var_shapes, self._var_columns)
+
+
+class PkgVersionMatrix(collections.abc.Sequence):
+    """Versions of a package that are all combinations of the values of a set of template vars.
+
+    Only the url template and the value domains are stored. Versions are created on access: the url is rendered for
+    the combination at that position, and the version is passed to the 'finalizer', which adds the package type
+    specific steps (see 'PkgType.finalize_version'). Combinations can be marked as missing (e.g. because their url
+    doesn't exist), those are not part of the sequence, and are never matched by 'find'.
+
+    Combination order is the same as 'itertools.product' of the value domains, positions in the sequence are the
+    same, minus the missing combinations before them. This class doubles as its own version index (see
+    'PkgVersionIndex').
+    """
+
+    __slots__ = (
+        "_keys",
+        "_domains",
+        "_url",
+        "_size",
+        "_missing",
+        "_missing_sorted",
+        "_finalizer",
+    )
+
+    def __init__(self, template_vars: Mapping[str, Iterable[Any]], url: str):
+
+        self._keys: Tuple[str, ...] = tuple(template_vars.keys())
+        self._domains: Tuple[Tuple[Any, ...], ...] = tuple(
+            tuple(v) for v in template_vars.values()
+        )
+        self._url: str = url
+        size = 1
+        for domain in self._domains:
+            size = size * len(domain)
+        self._size: int = size if self._keys else 0
+        self._missing: Set[int] = set()
+        self._missing_sorted: List[int] = []
+        self._finalizer: Optional[Callable[[PkgVersion], PkgVersion]] = None
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+
+        # the finalizer is bound to a package type object, and needs to be set again after unpickling
+        return (self._keys, self._domains, self._url, self._size, self._missing)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+
+        self._keys, self._domains, self._url, self._size, self._missing = state
+        self._missing_sorted = sorted(self._missing)
+        self._finalizer = None
+
+    def set_finalizer(self, finalizer: Callable[[PkgVersion], PkgVersion]) -> None:
+        self._finalizer = finalizer
+
+    @property
+    def combination_count(self) -> int:
+        """Return the number of all combinations, including missing ones."""
+
+        return self._size
+
+    def set_missing(self, combinations: Iterable[int]) -> None:
+        """Mark the combinations at the provided (combination) positions as missing."""
+
+        self._missing = set(combinations)
+        self._missing_sorted = sorted(self._missing)
+
+    def _to_combination(self, pos: int) -> int:
+
+        for missing in self._missing_sorted:
+            if missing > pos:
+                break
+            pos = pos + 1
+        return pos
+
+    def _to_pos(self, combination: int) -> int:
+
+        return combination - bisect.bisect_left(self._missing_sorted, combination)
+
+    def _iter_combinations(self) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+
+        for combination, values in enumerate(itertools.product(*self._domains)):
+            if combination not in self._missing:
+                yield (combination, values)
+
+    def get_vars(self, combination: int) -> Dict[str, Any]:
+        """Return the vars of the combination at the provided position (including missing ones)."""
+
+        result: Dict[str, Any] = {}
+        for idx in range(len(self._keys) - 1, -1, -1):
+            domain = self._domains[idx]
+            combination, value_idx = divmod(combination, len(domain))
+            result[self._keys[idx]] = domain[value_idx]
+        return {k: result[k] for k in self._keys}
+
+    def get_url(self, combination: int) -> str:
+        """Return the url of the combination at the provided position (including missing ones)."""
+
+        return process_string_template(self._url, self.get_vars(combination))
+
+    def _get_version(self, combination: int) -> PkgVersion:
+
+        vars = self.get_vars(combination)
+        url = process_string_template(self._url, copy.copy(vars))
+        version = PkgVersion(
+            vars=vars,
+            metadata={"url": url},
+            steps=[
+                {
+                    "type": "download",
+                    "url": url,
+                    "target_file_name": os.path.basename(url),
+                }
+            ],
+        )
+        if self._finalizer is None:
+            raise FrklException(
+                msg="Can't create package version.",
+                reason="No finalizer set for version matrix.",
+            )
+        return self._finalizer(version)
+
+    def __len__(self) -> int:
+        return self._size - len(self._missing)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index = index + len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("version index out of range")
+        return self._get_version(self._to_combination(index))
+
+    def __iter__(self) -> Iterator[PkgVersion]:
+
+        for combination, _ in self._iter_combinations():
+            yield self._get_version(combination)
+
+    def iter_vars(self) -> Iterator[Dict[str, Any]]:
+
+        for _, values in self._iter_combinations():
+            yield dict(zip(self._keys, values))
+
+    @property
+    def var_names(self) -> List[str]:
+        return list(self._keys)
+
+    def get_values(self, var_name: str) -> List[Any]:
+
+        if var_name not in self._keys:
+            return []
+        idx = self._keys.index(var_name)
+        if self._missing:
+            domain: Iterable[Any] = (
+                values[idx] for _, values in self._iter_combinations()
+            )
+        else:
+            domain = self._domains[idx]
+        result: List[Any] = []
+        for v in domain:
+            if v not in result:
+                result.append(v)
+        return result
+
+    def find(self, vars: Mapping[str, Any]) -> Optional[List[Tuple[int, int]]]:
+        """Return the positions of all (not missing) combinations that match the provided vars.
+
+        Same as 'PkgVersionIndex.find', but without having to create every version.
+        """
+
+        value_positions: List[Iterable[int]] = []
+        matched_keys = 0
+        for key, domain in zip(self._keys, self._domains):
+
+            comp_v = vars.get(key, None)
+            if comp_v is None:
+                value_positions.append(range(len(domain)))
+                continue
+
+            if not isinstance(comp_v, str) and isinstance(
+                comp_v, collections.abc.Iterable
+            ):
+                comp_values = list(comp_v)
+            else:
+                comp_values = [comp_v]
+
+            value_positions.append(
+                [i for i, v in enumerate(domain) if v in comp_values]
+            )
+            matched_keys = matched_keys + 1
+
+        result = []
+        for value_idxs in itertools.product(*value_positions):
+            combination = 0
+            for domain, value_idx in zip(self._domains, value_idxs):
+                combination = combination * len(domain) + value_idx
+            if combination not in self._missing:
+                result.append((self._to_pos(combination), matched_keys))
+        return result
+
+
+def get_version_index(
+    versions: Iterable[PkgVersion],
+) -> Union["PkgVersionIndex", PkgVersionMatrix]:
+
+    if isinstance(versions, PkgVersionMatrix):
+        return versions
+    return PkgVersionIndex(versions)
+
+
+class PkgVersionIndex(object):
+    """Inverted index of the vars of a list of versions (var name -> value -> positions of the matching versions)."""
+
+    def __init__(self, versions: Iterable[PkgVersion]):
+
+        self._size: int = 0
+        self._keys: Dict[str, Set[int]] = {}
+        self._values: Dict[str, Dict[Any, Set[int]]] = {}
+        # distinct values of vars with values that can't be used as dict keys
+        self._unindexed: Dict[str, List[Any]] = {}
+
+        if isinstance(versions, (PkgVersionList, PkgVersionMatrix)):
+            all_vars: Iterable[Mapping[str, Any]] = versions.iter_vars()
+        else:
+            all_vars = (version.vars for version in versions)
+
+        for pos, version_vars in enumerate(all_vars):
+            self._size = pos + 1
+            for k, v in version_vars.items():
+                self._keys.setdefault(k, set()).add(pos)
+                if k in self._unindexed.keys():
+                    if v not in self._unindexed[k]:
+                        self._unindexed[k].append(v)
+                    continue
+                try:
+                    self._values.setdefault(k, {}).setdefault(v, set()).add(pos)
+                except TypeError:
+                    self._unindexed[k] = list(self._values.pop(k, {}).keys()) + [v]
+
+    @property
+    def var_names(self) -> List[str]:
+        """Return the names of all vars, in the order of the versions they first appear in."""
+
+        return list(self._keys.keys())
+
+    def get_values(self, var_name: str) -> List[Any]:
+        """Return all distinct values of a var, in the order of the versions they first appear in."""
+
+        if var_name in self._unindexed.keys():
+            return list(self._unindexed[var_name])
+        return list(self._values.get(var_name, {}).keys())
+
+    def find(self, vars: Mapping[str, Any]) -> Optional[List[Tuple[int, int]]]:
+        """Return the positions of all versions that match the provided vars, along with the number of matched vars.
+
+        A version matches if all of its vars that are also in 'vars' have the same value (or one of the values, if a
+        list is provided). Returns 'None' if the index can't be used for the provided vars.
+        """
+
+        candidates: Set[int] = set(range(self._size))
+        used_keys: List[str] = []
+        for k, comp_v in vars.items():
+
+            if comp_v is None or k not in self._keys.keys():
+                continue
+            if k in self._unindexed.keys():
+                return None
+
+            if not isinstance(comp_v, str) and isinstance(
+                comp_v, collections.abc.Iterable
+            ):
+                comp_values = list(comp_v)
+            else:
+                comp_values = [comp_v]
+
+            matching: Set[int] = set()
+            try:
+                for c in comp_values:
+                    matching.update(self._values[k].get(c, ()))
+            except TypeError:
+                return None
+
+            # versions that don't have the var at all are not affected
+            candidates.difference_update(self._keys[k] - matching)
+            used_keys.append(k)
+
+        return [
+            (pos, sum(1 for k in used_keys if pos in self._keys[k]))
+            for pos in sorted(candidates)
+        ]
+
+
 class PkgMetadata(object):
     @classmethod
     def from_dict(cls, data: Mapping[str, Any]):
@@ -111,10 +606,13 @@ class PkgMetadata(object):
         vars: Mapping[str, Mapping[str, Any]],
         metadata_timestamp: Optional[datetime] = None,
         aliases: Optional[Mapping[str, Mapping[str, Any]]] = None,
+        version_index: Optional[Union[PkgVersionIndex, PkgVersionMatrix]] = None,
     ):
 
         self._source_details: Mapping[str, Any] = source_details
-        self._versions: Iterable[PkgVersion] = versions
+        if not isinstance(versions, (PkgVersionList, PkgVersionMatrix)):
+            versions = PkgVersionList(versions)
+        self._versions: Optional[Union[PkgVersionList, PkgVersionMatrix]] = versions
         self._vars: Mapping[str, Mapping[str, Any]] = vars
         if metadata_timestamp is None:
             tz = get_localzone()
@@ -123,14 +621,131 @@ class PkgMetadata(object):
         if aliases is None:
             aliases = {}
         self._aliases: Mapping[str, Mapping[str, Any]] = aliases
+        if version_index is None:
+            version_index = get_version_index(self._versions)
+        self._version_index: Optional[
+            Union[PkgVersionIndex, PkgVersionMatrix]
+        ] = version_index
+        self._version_count: int = len(self._versions)
+        # if set, versions (and their index) were not loaded yet, and are read from this file on first access
+        self._versions_file: Optional[str] = None
+        # written into both header and body when splitting, so a body can be matched to its header
+        self._versions_token: Optional[str] = None
+        self._version_finalizer: Optional[Callable[[PkgVersion], PkgVersion]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+
+        state = dict(self.__dict__)
+        state["_version_finalizer"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+
+        state = dict(state)
+        # metadata pickled by older versions stores a plain list of versions
+        versions = state.get("_versions", None)
+        if versions is not None and not isinstance(
+            versions, (PkgVersionList, PkgVersionMatrix)
+        ):
+            versions = PkgVersionList(versions)
+            state["_versions"] = versions
+        if "_version_count" not in state.keys():
+            state["_version_count"] = len(versions) if versions is not None else 0
+        state.setdefault("_versions_file", None)
+        state.setdefault("_versions_token", None)
+        state.setdefault("_version_finalizer", None)
+        self.__dict__.update(state)
+
+    def set_version_finalizer(
+        self, finalizer: Callable[[PkgVersion], PkgVersion]
+    ) -> None:
+        """Set the function that completes versions that are created on access (see 'PkgVersionMatrix')."""
+
+        self._version_finalizer = finalizer
+        if isinstance(self._versions, PkgVersionMatrix):
+            self._versions.set_finalizer(finalizer)
+
+    def split(self) -> Tuple["PkgMetadata", bytes]:
+        """Split this metadata into a header (without versions), and a pickled body (versions, and their index).
+
+        Those can be stored separately, and the body loaded on demand (see 'set_versions_file'). Both contain the
+        same, newly created token, which is used to make sure a body belongs to a header (see
+        'read_versions_token').
+        """
+
+        token = uuid.uuid4().hex
+        header = copy.copy(self)
+        header._versions = None  # type: ignore
+        header._version_index = None
+        header._versions_token = token
+        body = pickle.dumps(token, protocol=pickle.HIGHEST_PROTOCOL) + pickle.dumps(
+            (self.versions, self.version_index), protocol=pickle.HIGHEST_PROTOCOL
+        )
+        return (header, body)
+
+    @classmethod
+    def read_versions_token(cls, path: str) -> Optional[str]:
+        """Read the token of a body that was written to a file, without loading the versions."""
+
+        try:
+            with open(path, "rb") as f:
+                token = pickle.load(f)
+        except Exception:
+            return None
+        return token if isinstance(token, str) else None
+
+    @property
+    def versions_loaded(self) -> bool:
+        return self._versions is not None
+
+    @property
+    def versions_token(self) -> Optional[str]:
+        return self._versions_token
+
+    def set_versions_file(self, path: str) -> None:
+        """Set the file to load the (pickled) body of this metadata from, if this is a header (see 'split')."""
+
+        self._versions_file = path
+
+    def _load_versions(self) -> None:
+
+        if self._versions_file is None:
+            raise FrklException(
+                msg="Can't load package versions.", reason="No versions file set."
+            )
+        try:
+            with open(self._versions_file, "rb") as f:
+                token = pickle.load(f)
+                if token == self._versions_token:
+                    self._versions, self._version_index = pickle.load(f)
+        except Exception as e:
+            raise FrklException(
+                msg="Can't load package versions.",
+                reason=f"Can't read versions file '{self._versions_file}': {e}",
+            )
+        if token != self._versions_token:
+            raise FrklException(
+                msg="Can't load package versions.",
+                reason=f"Versions file '{self._versions_file}' was written for different metadata.",
+            )
+        self._versions_file = None
+        if self._version_finalizer is not None:
+            self.set_version_finalizer(self._version_finalizer)
 
     @property
     def source_details(self) -> Mapping[str, Any]:
         return self._source_details
 
     @property
-    def versions(self) -> Iterable[PkgVersion]:
-        return self._versions
+    def versions(self) -> Union[PkgVersionList, PkgVersionMatrix]:
+
+        if self._versions is None:
+            self._load_versions()
+        return self._versions  # type: ignore
+
+    @property
+    def version_count(self) -> int:
+        return self._version_count
 
     @property
     def vars(self) -> Mapping[str, Mapping[str, Any]]:
@@ -144,6 +759,16 @@ class PkgMetadata(object):
     def aliases(self) -> Mapping[str, Mapping[str, Any]]:
         return self._aliases
 
+    @property
+    def version_index(self) -> Union[PkgVersionIndex, PkgVersionMatrix]:
+
+        if self._versions is None:
+            self._load_versions()
+        # metadata that was pickled by an older version doesn't have an index yet
+        if getattr(self, "_version_index", None) is None:
+            self._version_index = get_version_index(self._versions)  # type: ignore
+        return self._version_index  # type: ignore
+
     def to_dict(self) -> Mapping[str, Any]:
 
         result: Dict[str, Any] = {}
@@ -158,7 +783,25 @@ class PkgMetadata(object):
         return result
 
 
-def get_pkg_type_plugin_factory(arg_hive: ArgHive):
+def get_legacy_deep_hash(data: Any) -> Optional[str]:
+    """Return the 'DeepHash' of the provided data, as used for source ids by older versions of bring.
+
+    Only used to find (and migrate) metadata that was cached by those versions.
+    """
+
+    try:
+        from deepdiff import DeepHash
+    except ImportError:
+        return None
+
+    try:
+        return DeepHash(data)[data]
+    except Exception as e:
+        log.debug(f"Can't calculate legacy hash: {e}")
+        return None
+
+
+def get_pkg_type_config(arg_hive: ArgHive) -> MutableMapping[str, Any]:
 
     _pkg_type_conf: MutableMapping[str, Any] = {}
     for k, v in os.environ.items():
@@ -168,12 +811,63 @@ def get_pkg_type_plugin_factory(arg_hive: ArgHive):
         _pkg_type_conf[k[6:]] = v
 
     _pkg_type_conf["arg_hive"] = arg_hive
+    return _pkg_type_conf
+
+
+def get_pkg_type_plugin_factory(arg_hive: ArgHive):
+    """Return the plugin factory for all package types.
+
+    This imports all package type modules, use 'get_pkg_type' if only one specific package type is needed.
+    """
+
+    load_plugin_modules("pkg_types")
 
     return arg_hive.typistry.register_plugin_factory(
-        "pkg_types", PkgType, singleton=True, use_existing=True, **_pkg_type_conf
+        "pkg_types",
+        PkgType,
+        singleton=True,
+        use_existing=True,
+        **get_pkg_type_config(arg_hive),
     )
 
 
+_PKG_TYPES: "WeakKeyDictionary[ArgHive, Dict[str, PkgType]]" = WeakKeyDictionary()
+
+
+def get_pkg_type(
+    arg_hive: ArgHive, pkg_type: str, raise_exception: bool = False
+) -> Optional["PkgType"]:
+    """Return the (singleton) package type plugin with the specified name.
+
+    Only the module that contains the package type is imported. If the package type is not a built-in one, the full
+    plugin factory is used. Always use this to get a package type instance (instead of the plugin factories
+    'get_singleton'), so there is only ever one instance per package type.
+    """
+
+    instances = _PKG_TYPES.setdefault(arg_hive, {})
+    plugin = instances.get(pkg_type, None)
+    if plugin is not None:
+        return plugin
+
+    plugin_class = get_plugin_class("pkg_types", pkg_type)
+    if plugin_class is None:
+        pf = get_pkg_type_plugin_factory(arg_hive)
+        plugin = pf.get_singleton(pkg_type, raise_exception=False)
+    else:
+        plugin = plugin_class(**get_pkg_type_config(arg_hive))
+
+    if plugin is None:
+        if raise_exception:
+            raise FrklException(
+                msg=f"Can't get package type '{pkg_type}'.",
+                reason="No package type with that name registered.",
+            )
+        return None
+
+    instances[pkg_type] = plugin
+    return plugin
+
+
 class PkgType(metaclass=ABCMeta):
     """Abstract base class which acts as an adapter to retrieve package information using the 'source' key in bring pkg metadata.
     """
@@ -190,10 +884,19 @@ class PkgType(metaclass=ABCMeta):
             BRING_PKG_CACHE, "resolvers", from_camel_case(self.__class__.__name__)
         )
         self._jinja_env_obj: Optional[Environment] = None
+        self._migration_checked: Set[str] = set()
         ensure_folder(self._cache_dir, mode=0o700)
 
         self._config: Mapping[str, Any] = get_seeded_dict(PKG_RESOLVER_DEFAULTS, config)
 
+    def __getstate__(self) -> Dict[str, Any]:
+
+        # the arg hive and jinja environment can't be pickled, and are not needed to create metadata
+        state = dict(self.__dict__)
+        state["_arg_hive"] = None
+        state["_jinja_env_obj"] = None
+        return state
+
     @property
     def resolver_config(self) -> Mapping[str, Any]:
 
@@ -215,17 +918,64 @@ class PkgType(metaclass=ABCMeta):
         """Return a calculated unique id for a package.
 
         Implement your own '_get_unique_type_source_id' method for a type specific, meaningful id.
-        If that method is not overwritten, a 'deephash' of the source dictionary is used.
+        If that method is not overwritten, a hash of the (canonically serialized) source dictionary is used.
 
         This is used mainly for caching purposes.
         """
 
         return f"{from_camel_case(self.__class__.__name__)}_{self._get_unique_source_type_id(source_details=source_details)}"
 
-    def _get_unique_source_type_id(self, source_details: Mapping[str, Any]):
+    def _get_unique_source_type_id(self, source_details: Mapping[str, Any]) -> str:
+
+        return f"v{SOURCE_ID_HASH_VERSION}_{hash_content_memoized(source_details)}"
+
+    def _get_legacy_source_type_id(
+        self, source_details: Mapping[str, Any]
+    ) -> Optional[str]:
+        """Return the id that was used by older versions of bring, if it differs from the current one."""
+
+        # type specific ids didn't change
+        if (
+            self.__class__._get_unique_source_type_id
+            is not PkgType._get_unique_source_type_id
+        ):
+            return None
+
+        return get_legacy_deep_hash(source_details)
+
+    def _migrate_legacy_metadata(
+        self, source_details: Mapping[str, Any], source_id: str
+    ) -> None:
+        """Move metadata that was cached under a legacy source id, if there is any."""
+
+        if source_id in self._migration_checked:
+            return
+        self._migration_checked.add(source_id)
+
+        metadata_file = self._get_cache_path(_source_id=source_id)
+        if os.path.exists(metadata_file):
+            return
+
+        legacy_type_id = self._get_legacy_source_type_id(source_details)
+        if legacy_type_id is None:
+            return
 
-        hashes = DeepHash(source_details)
-        return hashes[source_details]
+        legacy_file = self._get_cache_path(
+            _source_id=f"{from_camel_case(self.__class__.__name__)}_{legacy_type_id}"
+        )
+        if not os.path.exists(legacy_file):
+            return
+
+        log.debug(f"Migrating cached metadata: {legacy_file} -> {metadata_file}")
+        versions_file = f"{legacy_file}{METADATA_VERSIONS_FILE_SUFFIX}"
+        try:
+            if os.path.exists(versions_file):
+                os.replace(
+                    versions_file, f"{metadata_file}{METADATA_VERSIONS_FILE_SUFFIX}"
+                )
+            os.replace(legacy_file, metadata_file)
+        except Exception as e:
+            log.debug(f"Can't migrate cached metadata '{legacy_file}': {e}")
 
     async def get_seed_data(self, source_details: Mapping[str, Any]):
         """Overwrite to provide seed data for a pkg.
@@ -296,6 +1046,10 @@ class PkgType(metaclass=ABCMeta):
         _source_id: Optional[str] = None,
     ) -> Optional[PkgMetadata]:
 
+        if _source_id is None:
+            _source_id = self.get_unique_source_id(source_details=source_details)
+        self._migrate_legacy_metadata(source_details, _source_id)
+
         if not skip_validity_check:
 
             if not self.metadata_is_valid(
@@ -322,7 +1076,15 @@ class PkgType(metaclass=ABCMeta):
         if metadata.source_details != source_details:
             return None
 
-        return metadata
+        if not metadata.versions_loaded:
+            versions_file = f"{path}{METADATA_VERSIONS_FILE_SUFFIX}"
+            # only use a body that was written together with this header (another process might have replaced one of them)
+            token = PkgMetadata.read_versions_token(versions_file)
+            if token is None or token != metadata.versions_token:
+                return None
+            metadata.set_versions_file(versions_file)
+
+        return self._bind_metadata(metadata)
 
     def metadata_is_valid(
         self,
@@ -395,6 +1157,7 @@ class PkgType(metaclass=ABCMeta):
             _source_id=source_id,
         )
 
+        record_cache_access("metadata", hit=cached_metadata is not None)
         if cached_metadata:
             return cached_metadata
 
@@ -416,8 +1179,31 @@ class PkgType(metaclass=ABCMeta):
             )
             raise e
 
+        # the processing of the retrieved data is cpu-bound, so it might be done in a separate process
+        pkg_md: PkgMetadata = await run_cpu_bound(
+            _create_pkg_metadata, self, _source_details, versions, aliases, pkg_args
+        )
+
+        await self.write_metadata(source_id=source_id, metadata=pkg_md)
+
+        return self._bind_metadata(pkg_md)
+
+    def create_pkg_metadata(
+        self,
+        source_details: Mapping[str, Any],
+        versions: Iterable[PkgVersion],
+        aliases: Optional[MutableMapping[str, Any]],
+        pkg_args: Mapping[str, Mapping],
+    ) -> PkgMetadata:
+        """Create package metadata from the versions (and aliases, args) retrieved for a package.
+
+        This method does not do any I/O, and it's called in a separate process if the process pool is enabled
+        (see 'bring.utils.concurrency.run_cpu_bound').
+        """
+
+        _source_details = source_details
+
         metadata: Dict[str, Any] = {}
-        metadata["versions"] = versions
 
         if aliases is None:
             aliases = {}
@@ -433,99 +1219,130 @@ class PkgType(metaclass=ABCMeta):
 
         version_aliases = pkg_aliases.setdefault("version", {})
 
-        for version in versions:
-
-            if "version" in version.vars.keys() and "latest" not in version_aliases:
-                version_aliases["latest"] = version.vars["version"]
-
-            sam = _source_details.get("artefact", None)
-            if sam:
-                if isinstance(sam, str):
-                    sam = {"type": sam}
-
-                if isinstance(sam, Mapping):
-                    version.steps.append(sam)
-                else:
-                    version.steps.extend(sam)
-                continue
-
-            if not hasattr(self, "get_artefact_mogrify"):
-                continue
-
-            vam = self.get_artefact_mogrify(_source_details, version)  # type: ignore
-
-            if vam:
-                if isinstance(vam, Mapping):
-                    version.steps.append(vam)
-                else:
-                    version.steps.extend(vam)
+        if "latest" not in version_aliases:
+            if isinstance(versions, (PkgVersionList, PkgVersionMatrix)):
+                all_vars: Iterable[Mapping[str, Any]] = versions.iter_vars()
+            else:
+                all_vars = (version.vars for version in versions)
+            for version_vars in all_vars:
+                if "version" in version_vars.keys():
+                    version_aliases["latest"] = version_vars["version"]
+                    break
+
+        if isinstance(versions, PkgVersionMatrix):
+            # versions are created (and finalized) on access
+            versions.set_finalizer(
+                functools.partial(self.finalize_version, _source_details)
+            )
+        else:
+            for version in versions:
+                self.finalize_version(_source_details, version)
 
         mogrifiers = _source_details.get("mogrify", None)
-        if mogrifiers:
-            for version in versions:
-                if isinstance(mogrifiers, Mapping):
-                    version.steps.append(mogrifiers)
-                else:
-                    version.steps.extend(mogrifiers)
 
-        for version in versions:
-            pkg_type_mogrifier = self.get_pkg_content_mogrify(_source_details, version)
-            if pkg_type_mogrifier:
-                if isinstance(pkg_type_mogrifier, Mapping):
-                    version.steps.append(pkg_type_mogrifier)
-                else:
-                    raise NotImplementedError()
-                    # version["_mogrify"]
-
-        for version in versions:
-            mog = version.steps
-            # print(version)
-            var_names = find_var_names_in_obj(mog)
-            if var_names:
-                vars = {}
-                for k, v in version.vars.items():
-                    if k.startswith("_"):
-                        continue
-                    vars[k] = v
-                new_mog = replace_var_names_in_obj(mog, vars)
-                # print(vars)
-                # print(new_mog)
-                version.steps = new_mog
+        # finalized versions are stored (and indexed) in compact form
+        if not isinstance(versions, (PkgVersionList, PkgVersionMatrix)):
+            versions = PkgVersionList(versions)
+        metadata["versions"] = versions
+        # the index is used to calculate the vars, and is part of the metadata
+        version_index = get_version_index(versions)
+        metadata["version_index"] = version_index
 
-        pkg_vars = await self.process_vars(
+        pkg_vars = self.calculate_vars(
             source_args=_source_details.get("args", None),
             pkg_args=pkg_args,
             mogrifiers=mogrifiers,
             source_vars=_source_details.get("vars", None),
             versions=versions,  # type: ignore
             aliases=pkg_aliases,
+            version_index=version_index,
         )
         metadata["vars"] = pkg_vars
 
         metadata["metadata_timestamp"] = str(arrow.Arrow.now())
         # await self.write_metadata(metadata_file, metadata, source_details, bring_index)
 
-        pkg_md = PkgMetadata(source_details=_source_details, **metadata)
+        return PkgMetadata(source_details=_source_details, **metadata)
 
-        await self.write_metadata(source_id=source_id, metadata=pkg_md)
+    def finalize_version(
+        self, source_details: Mapping[str, Any], version: PkgVersion
+    ) -> PkgVersion:
+        """Add the artefact, mogrify and content steps of a package to a version, and replace var names in all steps."""
+
+        sam = source_details.get("artefact", None)
+        if sam:
+            if isinstance(sam, str):
+                sam = {"type": sam}
+
+            if isinstance(sam, Mapping):
+                version.steps.append(sam)
+            else:
+                version.steps.extend(sam)
+
+        elif hasattr(self, "get_artefact_mogrify"):
 
-        return pkg_md
+            vam = self.get_artefact_mogrify(source_details, version)  # type: ignore
+
+            if vam:
+                if isinstance(vam, Mapping):
+                    version.steps.append(vam)
+                else:
+                    version.steps.extend(vam)
+
+        mogrifiers = source_details.get("mogrify", None)
+        if mogrifiers:
+            if isinstance(mogrifiers, Mapping):
+                version.steps.append(mogrifiers)
+            else:
+                version.steps.extend(mogrifiers)
+
+        pkg_type_mogrifier = self.get_pkg_content_mogrify(source_details, version)
+        if pkg_type_mogrifier:
+            if isinstance(pkg_type_mogrifier, Mapping):
+                version.steps.append(pkg_type_mogrifier)
+            else:
+                raise NotImplementedError()
+                # version["_mogrify"]
+
+        mog = version.steps
+        var_names = find_var_names_in_obj(mog)
+        if var_names:
+            vars = {}
+            for k, v in version.vars.items():
+                if k.startswith("_"):
+                    continue
+                vars[k] = v
+            version.steps = replace_var_names_in_obj(mog, vars)
+
+        return version
+
+    def _bind_metadata(self, metadata: PkgMetadata) -> PkgMetadata:
+
+        metadata.set_version_finalizer(
+            functools.partial(self.finalize_version, metadata.source_details)
+        )
+        return metadata
 
     async def write_metadata(self, source_id: str, metadata: PkgMetadata):
 
         metadata_file = self._get_cache_path(_source_id=source_id)
-        temp_file = tempfile.mkstemp(dir=BRING_TEMP_CACHE)[1]
 
-        pickled = pickle.dumps(metadata)
-        try:
-            async with await aopen(temp_file, "wb") as f:
-                await f.write(pickled)
-
-            ensure_folder(os.path.dirname(metadata_file))
-            shutil.move(temp_file, metadata_file)
-        finally:
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
+        # the versions are stored separately, so they only need to be loaded if actually used
+        header, body = metadata.split()
+        ensure_folder(os.path.dirname(metadata_file))
+        for path, pickled in [
+            (f"{metadata_file}{METADATA_VERSIONS_FILE_SUFFIX}", body),
+            (metadata_file, pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL)),
+        ]:
+            temp_file = tempfile.mkstemp(dir=BRING_TEMP_CACHE)[1]
+            try:
+                async with await aopen(temp_file, "wb") as f:
+                    await f.write(pickled)
+
+                shutil.move(temp_file, path)
+            finally:
+                if os.path.exists(temp_file):
+                    os.unlink(temp_file)
 
     def get_pkg_content_mogrify(
         self, source_details: Mapping[str, Any], version: PkgVersion
@@ -554,6 +1371,26 @@ class PkgType(metaclass=ABCMeta):
         versions: List[PkgVersion],
         aliases: Mapping[str, Mapping[str, str]],
     ) -> Mapping[str, Any]:
+
+        return self.calculate_vars(
+            source_args=source_args,
+            pkg_args=pkg_args,
+            mogrifiers=mogrifiers,
+            source_vars=source_vars,
+            versions=versions,
+            aliases=aliases,
+        )
+
+    def calculate_vars(
+        self,
+        source_args: Mapping[str, Any],
+        pkg_args: Mapping[str, Any],
+        mogrifiers: Union[Iterable, Mapping],
+        source_vars: Mapping[str, Any],
+        versions: List[PkgVersion],
+        aliases: Mapping[str, Mapping[str, str]],
+        version_index: Optional[Union[PkgVersionIndex, PkgVersionMatrix]] = None,
+    ) -> Mapping[str, Any]:
         """Return the (remaining) args a user can specify to select a version or mogrify options.
 
         Source args can contain more arguments than will eventually be used/displayed to the user.
@@ -565,6 +1402,7 @@ class PkgType(metaclass=ABCMeta):
             - *source_vars*: vars that are hardcoded in the 'source' section of a package, can also contain templates
             - *versions*: all avaailable versions of a package
             - *aliases*: a dictionary of value aliases that can be used by the user instead of the 'real' ones. Aliases are per arg name.
+            - *version_index*: the index of the versions, created from 'versions' if not provided
 
         Returns:
             a dictionary with 3 keys: args, version_vars, mogrify_vars
@@ -573,37 +1411,42 @@ class PkgType(metaclass=ABCMeta):
         # calculate args to select version
         version_vars: MutableMapping[str, Mapping] = {}
 
-        for version in versions:
-            for k in version.vars.keys():
-                if k.startswith("_"):
-                    continue
-                elif k in version_vars.keys():
-                    val = version.vars[k]
-                    if val not in version_vars[k]["allowed"]:
-                        version_vars[k]["allowed"].append(val)
-                    continue
+        if version_index is None:
+            version_index = get_version_index(versions)
+        allowed_values: Dict[str, Collection] = {}
+        for k in version_index.var_names:
+            if k.startswith("_"):
+                continue
+            allowed = version_index.get_values(k)
+            version_vars[k] = {
+                # "default": version[k],
+                "allowed": allowed,
+                "type": "string",
+            }
+            try:
+                allowed_values[k] = set(allowed)
+            except TypeError:
+                # same list object, so added aliases are picked up
+                allowed_values[k] = allowed
 
-                version_vars[k] = {
-                    # "default": version[k],
-                    "allowed": [version.vars[k]],
-                    "type": "string",
-                }
         # add aliases to 'allowed' values in version select args
         for var_name, alias_details in aliases.items():
 
             for alias, value in alias_details.items():
                 if var_name in version_vars.keys():
-                    if value not in version_vars[var_name]["allowed"]:
+                    if value not in allowed_values[var_name]:
                         log.debug(
                             f"Alias '{alias}' does not have a corresponding value registered ('{value}'). Ignoring it..."
                         )
                         continue
-                    if alias in version_vars[var_name]["allowed"]:
+                    if alias in allowed_values[var_name]:
                         log.debug(
                             f"Alias '{alias}' (for value '{value}') already in possible values for key '{var_name}'. It'll be ignored if specified by the user."
                         )
                     else:
                         version_vars[var_name]["allowed"].append(alias)
+                        if isinstance(allowed_values[var_name], set):
+                            allowed_values[var_name].add(alias)  # type: ignore
 
         mogrify_vars: Mapping[str, Mapping]
         duplicates = {}
@@ -701,3 +1544,19 @@ class PkgType(metaclass=ABCMeta):
         yaml = YAML()
         pkg_desc = yaml.load(pkg_desc_str)
         return pkg_desc
+
+
+def _create_pkg_metadata(
+    pkg_type: PkgType,
+    source_details: Mapping[str, Any],
+    versions: Iterable[PkgVersion],
+    aliases: Optional[MutableMapping[str, Any]],
+    pkg_args: Mapping[str, Mapping],
+) -> PkgMetadata:
+
+    return pkg_type.create_pkg_metadata(
+        source_details=source_details,
+        versions=versions,
+        aliases=aliases,
+        pkg_args=pkg_args,
+    )
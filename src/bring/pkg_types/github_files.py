@@ -2,9 +2,14 @@
 import re
 from typing import Any, Dict, Iterable, List, Mapping, Optional
 
-from bring.pkg_types import PkgType, PkgVersion
+from bring.pkg_types import (
+    SOURCE_ID_HASH_VERSION,
+    PkgType,
+    PkgVersion,
+    get_legacy_deep_hash,
+)
 from bring.utils.github import get_list_data_from_github
-from deepdiff import DeepHash
+from bring.utils.hashing import hash_content
 
 
 class GitFiles(PkgType):
@@ -52,12 +57,18 @@ class GitFiles(PkgType):
         repo_name = source_details.get("repo_name")
         files: Iterable[str] = source_details.get("files")  # type: ignore
 
-        files = sorted(files)
+        hash_str = hash_content(sorted(files))
 
-        hashes = DeepHash(files)
-        hash_str = hashes[files]
+        return f"{github_user}_{repo_name}_v{SOURCE_ID_HASH_VERSION}_{hash_str}"
 
-        return f"{github_user}_{repo_name}_{hash_str}"
+    def _get_legacy_source_type_id(self, source_details: Mapping) -> Optional[str]:
+
+        files: Iterable[str] = source_details.get("files")  # type: ignore
+        hash_str = get_legacy_deep_hash(sorted(files))
+        if hash_str is None:
+            return None
+
+        return f"{source_details.get('user_name')}_{source_details.get('repo_name')}_{hash_str}"
 
     # def get_artefact_mogrify(
     #     self, source_details: Mapping[str, Any], version: PkgVersion
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
 import pathlib
-import re
 import time
 from typing import (
     Any,
@@ -19,7 +18,13 @@ import arrow
 import httpx
 from bring.defaults import BRING_RESOURCES_FOLDER
 from bring.pkg_types import PkgType, PkgVersion
-from bring.utils.github import get_data_from_github, get_list_data_from_github
+from bring.utils.concurrency import run_cpu_bound
+from bring.utils.github import (
+    get_data_from_github,
+    get_github_url,
+    get_list_data_from_github,
+)
+from bring.utils.regexes import get_matcher
 from frkl.common.formats.serialize import serialize
 from frkl.common.jinja_templating import process_string_template
 
@@ -81,7 +86,7 @@ class GithubRelease(PkgType):
     @classmethod
     def get_github_limits(cls) -> Mapping[str, Any]:
 
-        r = httpx.get("https://api.github.com/rate_limit")
+        r = httpx.get(get_github_url("/rate_limit"))
         data = r.json()
 
         if not isinstance(data, Mapping):
@@ -185,13 +190,22 @@ class GithubRelease(PkgType):
             github_token=self._github_token,
         )
 
+        # matching every asset against every regex is cpu-bound, so it might be done in a separate process
+        return await run_cpu_bound(_parse_releases, self, source_details, releases)
+
+    def parse_releases(
+        self, source_details: Mapping[str, Any], releases: Iterable[Mapping[str, Any]]
+    ) -> Mapping[str, Any]:
+
         url_regexes: Iterable[str] = source_details.get("url_regex", None)
         if not url_regexes:
             url_regexes = DEFAULT_URL_REGEXES
         elif isinstance(url_regexes, str):
             url_regexes = [url_regexes]
 
-        log.debug(f"Regexes for {github_user}/{repo_name}: {url_regexes}")
+        log.debug(
+            f"Regexes for {source_details.get('user_name')}/{source_details.get('repo_name')}: {url_regexes}"
+        )
 
         result: List[PkgVersion] = []
         prereleases: List[PkgVersion] = []
@@ -233,15 +247,11 @@ class GithubRelease(PkgType):
             "release_date": created_at,
         }
 
+        matcher = get_matcher(url_regexes)
         for asset in data["assets"]:
             browser_download_url = asset["browser_download_url"]
             log.debug(f"trying url: {browser_download_url}")
-            vars = None
-            for regex in url_regexes:
-                match = re.search(regex, browser_download_url)
-                if match is not None:
-                    vars = match.groupdict()
-                    break
+            vars = matcher.match(browser_download_url)
 
             if vars is None:
                 log.debug("No match")
@@ -410,3 +420,12 @@ async def get_github_project_data(user: str, repo: str) -> Mapping[str, Any]:
         result.setdefault("labels", {})["language"] = language
 
     return result
+
+
+def _parse_releases(
+    pkg_type: GithubRelease,
+    source_details: Mapping[str, Any],
+    releases: Iterable[Mapping[str, Any]],
+) -> Mapping[str, Any]:
+
+    return pkg_type.parse_releases(source_details=source_details, releases=releases)
@@ -1,20 +1,24 @@
 # -*- coding: utf-8 -*-
-import copy
-import itertools
-import os
-from typing import Any, Dict, Iterable, List, Mapping, Union
+import logging
+from typing import Any, Iterable, Mapping, Union
 
-from bring.pkg_types import PkgType, PkgVersion
+from bring.pkg_types import PkgType, PkgVersion, PkgVersionMatrix
+from bring.utils.url_probe import probe_urls
 from frkl.common.downloads.cache import calculate_cache_location_for_url
-from frkl.common.jinja_templating import process_string_template
+
+
+log = logging.getLogger("bring")
 
 
 class TemplateUrlResolver(PkgType):
     """A package type to resolve packages whose artifacts are published with static urls that can be templated.
 
     All values of all template variables are combined with each of the other template variables to create a matrix of possible combinations.
-    In some cases some of those combinations are not valid, and lead to a url that does not resolve to a file to download. At this time,
-    there is nothing that can be done about it and the user will see an error message.
+    Versions are only created for the combinations that are actually used, so large matrixes are cheap.
+
+    In some cases some of those combinations are not valid, and lead to a url that does not resolve to a file to download. If
+    '*probe_urls*' is set to '*true*', all urls are checked (via 'HEAD' requests) when the package metadata is retrieved, and
+    combinations with urls that don't exist are not offered for install. Otherwise the user will see an error message when trying to install one of those.
 
     Examples:
         - binaries.kubectl
@@ -48,32 +52,32 @@ class TemplateUrlResolver(PkgType):
                 "required": True,
                 "doc": "The templated url string, using '{{' and '}}' as template markers.",
             },
+            "probe_urls": {
+                "type": "boolean",
+                "required": False,
+                "default": False,
+                "doc": "Whether to check which urls exist, and exclude combinations that don't.",
+            },
         }
 
     async def _process_pkg_versions(
         self, source_details: Mapping[str, Any]
     ) -> Mapping[str, Any]:
 
-        vars = source_details["template_vars"]
-
-        keys, values = zip(*vars.items())
-
-        versions = [dict(zip(keys, v)) for v in itertools.product(*values)]
-
-        _version_list: List[PkgVersion] = []
-        for version in versions:
-            url = process_string_template(source_details["url"], copy.copy(version))
-            target_file_name = os.path.basename(url)
+        versions = PkgVersionMatrix(
+            template_vars=source_details["template_vars"], url=source_details["url"]
+        )
 
-            _vd: Dict[str, Any] = {}
-            _vd["vars"] = version
-            _vd["metadata"] = {"url": url}
-            _vd["steps"] = [
-                {"type": "download", "url": url, "target_file_name": target_file_name}
-            ]
-            _version_list.append(PkgVersion(**_vd))
+        if source_details.get("probe_urls", False):
+            urls = [versions.get_url(c) for c in range(versions.combination_count)]
+            existing = await probe_urls(urls)
+            missing = [c for c, url in enumerate(urls) if not existing[url]]
+            log.debug(
+                f"Url probe for '{source_details['url']}': {len(missing)} of {len(urls)} combinations missing"
+            )
+            versions.set_missing(missing)
 
-        return {"versions": _version_list}
+        return {"versions": versions}
 
     def get_artefact_mogrify(
         self, source_details: Mapping[str, Any], version: PkgVersion
@@ -120,6 +120,10 @@ def find_versions(
     if not vars:
         return [(x, 0) for x in versions]
 
+    indexed = metadata.version_index.find(vars)
+    if indexed is not None:
+        return [(metadata.versions[pos], matched_keys) for pos, matched_keys in indexed]
+
     matches = []
     for version in versions:
 
@@ -165,9 +169,21 @@ def find_version(
             - *metadata*: the package metadata
         """
 
-    matches = find_versions(
-        vars=vars, metadata=metadata, var_aliases_replaced=var_aliases_replaced
-    )
+    if not var_aliases_replaced:
+        vars = replace_var_aliases(vars=vars, metadata=metadata)
+
+    # only create the version object that is returned
+    indexed = metadata.version_index.find(vars)
+    if indexed is not None:
+        if not indexed:
+            return None
+        best = indexed[0]
+        for m in indexed[1:]:
+            if m[1] > best[1]:
+                best = m
+        return metadata.versions[best[0]]
+
+    matches = find_versions(vars=vars, metadata=metadata, var_aliases_replaced=True)
 
     if not matches:
         return None
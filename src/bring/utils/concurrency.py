@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""Shared limits for the number of concurrent operations, per resource class.
+
+Code that fans out (one task per package, index, ...) wraps the work for every item in 'limit(<resource_class>)',
+so that at most a configured number of those run at the same time. Limits are shared within the process (per event
+loop), and can be configured via environment variables ('BRING_MAX_CONCURRENT_<RESOURCE_CLASS>'), or 'set_limit'.
+
+Limits are re-entrant: code that already holds a slot of a resource class (for example a package metadata request,
+which downloads a file) doesn't need another one of the same class. Tasks spawned by such code (a nested fan-out)
+are limited again, but to prevent dead-locks (all slots held by tasks that wait for their children), a child that
+can't get a free slot borrows the slot of the task that spawned it, one child at a time.
+
+CPU-bound work (e.g. processing package metadata) can be offloaded to a shared process pool with 'run_cpu_bound',
+if the pool is enabled (via 'enable_process_pool', or the 'BRING_PROCESS_POOL' environment variable). Metrics that are
+recorded in a pool worker are sent back with the result, and added to the metrics of this process.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+from anyio import (
+    CapacityLimiter,
+    create_capacity_limiter,
+    get_current_task,
+)
+from anyio.exceptions import WouldBlock
+from bring.defaults import BRING_CONCURRENCY_LIMITS
+from bring.utils.metrics import METRICS
+
+
+log = logging.getLogger("bring")
+
+_LIMITERS: Dict[Tuple[str, Optional[int]], CapacityLimiter] = {}
+_CONFIGURED_LIMITS: Dict[str, int] = {}
+
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+_PROCESS_POOL_ENABLED: Optional[bool] = None
+
+_HELD_LIMITS: ContextVar[Mapping[str, "_HeldSlot"]] = ContextVar(
+    "bring_held_concurrency_limits", default={}
+)
+_LIMIT_OVERRIDES: ContextVar[Mapping[str, CapacityLimiter]] = ContextVar(
+    "bring_concurrency_limit_overrides", default={}
+)
+
+
+def get_limit(resource_class: str) -> int:
+    """Return the max number of concurrent operations for a resource class."""
+
+    if resource_class in _CONFIGURED_LIMITS.keys():
+        return _CONFIGURED_LIMITS[resource_class]
+
+    env_value = os.environ.get(f"BRING_MAX_CONCURRENT_{resource_class.upper()}", None)
+    if env_value:
+        try:
+            return max(1, int(env_value))
+        except ValueError:
+            log.warning(
+                f"Invalid concurrency limit for '{resource_class}', ignoring: {env_value}"
+            )
+
+    if resource_class not in BRING_CONCURRENCY_LIMITS.keys():
+        raise ValueError(
+            f"Invalid resource class '{resource_class}', allowed: {', '.join(BRING_CONCURRENCY_LIMITS.keys())}"
+        )
+    return BRING_CONCURRENCY_LIMITS[resource_class]
+
+
+def set_limit(resource_class: str, max_concurrent: Optional[int]) -> None:
+    """Set the max number of concurrent operations for a resource class (for this process).
+
+    If 'max_concurrent' is 'None', the configured value is removed, and the default (or environment variable) is
+    used again.
+    """
+
+    if max_concurrent is None:
+        _CONFIGURED_LIMITS.pop(resource_class, None)
+    elif max_concurrent < 1:
+        raise ValueError(f"Invalid concurrency limit: {max_concurrent}")
+    else:
+        _CONFIGURED_LIMITS[resource_class] = max_concurrent
+
+    for key in [k for k in _LIMITERS.keys() if k[0] == resource_class]:
+        _LIMITERS.pop(key)
+
+
+def _loop_id() -> Optional[int]:
+
+    try:
+        return id(asyncio.get_event_loop())
+    except RuntimeError:
+        return None
+
+
+def get_limiter(resource_class: str) -> CapacityLimiter:
+
+    override = _LIMIT_OVERRIDES.get().get(resource_class, None)
+    if override is not None:
+        return override
+
+    # limiters are bound to the event loop they were created in
+    key = (resource_class, _loop_id())
+    limiter = _LIMITERS.get(key, None)
+    if limiter is None:
+        limiter = create_capacity_limiter(get_limit(resource_class))
+        _LIMITERS[key] = limiter
+    return limiter
+
+
+class _HeldSlot(object):
+    """A slot of a resource class, held by a task (directly, or borrowed from the task that spawned it)."""
+
+    def __init__(self, task_id: int):
+
+        self.task_id: int = task_id
+        # children of the holding task that borrow this slot take turns
+        self.borrow_limiter: CapacityLimiter = create_capacity_limiter(1)
+
+
+class limit(object):
+    """Async context manager that holds one slot of a resource class while active."""
+
+    def __init__(self, resource_class: str):
+
+        self._resource_class: str = resource_class
+        self._limiter: Optional[CapacityLimiter] = None
+        self._borrowed: Optional[_HeldSlot] = None
+        self._token: Any = None
+
+    async def __aenter__(self) -> None:
+
+        task_id = (await get_current_task()).id
+
+        held = _HELD_LIMITS.get()
+        parent_slot = held.get(self._resource_class, None)
+        if parent_slot is not None and parent_slot.task_id == task_id:
+            return
+
+        limiter = get_limiter(self._resource_class)
+        if parent_slot is None:
+            await limiter.acquire()
+            self._limiter = limiter
+        else:
+            try:
+                await limiter.acquire_nowait()
+                self._limiter = limiter
+            except WouldBlock:
+                await parent_slot.borrow_limiter.acquire()
+                self._borrowed = parent_slot
+
+        slots = dict(held)
+        slots[self._resource_class] = _HeldSlot(task_id)
+        self._token = _HELD_LIMITS.set(slots)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+
+        if self._token is None:
+            return
+
+        _HELD_LIMITS.reset(self._token)
+        self._token = None
+        if self._limiter is not None:
+            await self._limiter.release()
+            self._limiter = None
+        if self._borrowed is not None:
+            await self._borrowed.borrow_limiter.release()
+            self._borrowed = None
+
+
+class override_limit(object):
+    """Use a separate limit for a resource class, for all code that runs (or is spawned) within this context.
+
+    This is used if a single operation wants to enforce its own limit, e.g. the max number of packages of an
+    assembly that are installed in parallel.
+    """
+
+    def __init__(self, resource_class: str, max_concurrent: int):
+
+        self._resource_class: str = resource_class
+        self._max_concurrent: int = max_concurrent
+        self._token: Any = None
+
+    def __enter__(self) -> None:
+
+        overrides = dict(_LIMIT_OVERRIDES.get())
+        overrides[self._resource_class] = create_capacity_limiter(self._max_concurrent)
+        self._token = _LIMIT_OVERRIDES.set(overrides)
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+
+        _LIMIT_OVERRIDES.reset(self._token)
+
+
+async def run_limited(
+    resource_class: str, func: Callable[..., Awaitable[Any]], *args: Any
+) -> Any:
+    """Run a coroutine function while holding a slot of the provided resource class.
+
+    Meant to be used with task groups: 'await tg.spawn(run_limited, "network", func, arg1, arg2)'.
+    """
+
+    async with limit(resource_class):
+        return await func(*args)
+
+
+def enable_process_pool(enabled: bool = True) -> None:
+    """Enable (or disable) offloading cpu-bound work to a process pool, for this process."""
+
+    global _PROCESS_POOL_ENABLED
+    _PROCESS_POOL_ENABLED = enabled
+    if not enabled:
+        shutdown_process_pool()
+
+
+def process_pool_enabled() -> bool:
+
+    if _PROCESS_POOL_ENABLED is not None:
+        return _PROCESS_POOL_ENABLED
+    return os.environ.get("BRING_PROCESS_POOL", "").lower() in ["1", "true", "yes"]
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+
+    global _PROCESS_POOL
+    if _PROCESS_POOL is None:
+        _PROCESS_POOL = ProcessPoolExecutor(max_workers=get_limit("cpu"))
+    return _PROCESS_POOL
+
+
+@atexit.register
+def shutdown_process_pool() -> None:
+
+    global _PROCESS_POOL
+    if _PROCESS_POOL is not None:
+        _PROCESS_POOL.shutdown(wait=False)
+        _PROCESS_POOL = None
+
+
+def _run_in_worker(
+    func: Callable[..., Any], *args: Any
+) -> Tuple[Any, Mapping[str, Any]]:
+    """Run a function in a process pool worker, and return its result along with the metrics it recorded."""
+
+    METRICS.clear()
+    result = func(*args)
+    return (result, METRICS.export_values())
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a (synchronous) cpu-bound function, in the process pool if enabled.
+
+    The function and all its arguments must be picklable for that to work, otherwise (or if the pool broke) the
+    function is run in the current process, on the event loop. Exceptions raised by the function itself are not
+    caught.
+    """
+
+    if not process_pool_enabled():
+        return func(*args)
+
+    try:
+        # pool workers only report pickling errors as the result of the call, where they can't be told apart
+        pickle.dumps((func, args))
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        log.debug(f"Can't run '{func.__name__}' in process pool, running inline: {e}")
+        return func(*args)
+
+    async with limit("cpu"):
+        try:
+            result, metric_values = await asyncio.get_event_loop().run_in_executor(
+                get_process_pool(), _run_in_worker, func, *args
+            )
+        except BrokenProcessPool as e:
+            log.debug(f"Process pool broken, running '{func.__name__}' inline: {e}")
+            shutdown_process_pool()
+            return func(*args)
+
+    METRICS.merge_values(metric_values)
+    return result
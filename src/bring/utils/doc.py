@@ -4,6 +4,7 @@ from typing import Any, Dict, Mapping, Optional
 from anyio import create_task_group
 from bring.bring import Bring
 from bring.pkg_types import PkgType
+from bring.utils.plugins import load_plugin_modules
 from frkl.common.doc import Doc
 from frkl.common.exceptions import FrklException
 from frkl.common.formats.serialize import serialize
@@ -41,6 +42,7 @@ async def create_mogrifier_markdown_string(
 
 async def create_pkg_type_markdown_string_from_plugin_name(bring: Bring, name: str):
 
+    load_plugin_modules("pkg_types")
     pm = bring.typistry.get_plugin_manager(
         PkgType, plugin_config={"arg_hive": bring.arg_hive}
     )
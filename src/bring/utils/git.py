@@ -3,6 +3,7 @@ import os
 import shutil
 
 from bring.defaults import BRING_GIT_CHECKOUT_CACHE
+from bring.utils.concurrency import limit
 from frkl.common.downloads.cache import calculate_cache_path
 from frkl.common.filesystem import ensure_folder
 from frkl.common.strings import generate_valid_identifier
@@ -11,6 +12,12 @@ from frkl.common.subprocesses import GitProcess
 
 async def ensure_repo_cloned(url, update=False) -> str:
 
+    async with limit("git"):
+        return await _ensure_repo_cloned(url=url, update=update)
+
+
+async def _ensure_repo_cloned(url, update=False) -> str:
+
     path = calculate_cache_path(base_path=BRING_GIT_CHECKOUT_CACHE, url=url)
     parent_folder = os.path.dirname(path)
 
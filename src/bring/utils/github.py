@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 import logging
+import os
 from typing import Any, List, Mapping, Optional
 
 import gidgethub
 import gidgethub.httpx
 import httpx
+from bring.utils.concurrency import limit
+from bring.utils.metrics import record_api_call
 from frkl.common.environment import get_var_value_from_env
 from frkl.common.exceptions import FrklException
 from gidgethub.abc import GitHubAPI
@@ -13,6 +16,28 @@ from gidgethub.sansio import RateLimit
 
 log = logging.getLogger("bring")
 
+DEFAULT_GITHUB_API_URL = "https://api.github.com"
+
+
+def get_github_api_url() -> str:
+    """Return the base url of the GitHub API.
+
+    Can be overridden with the 'BRING_GITHUB_API_URL' environment variable (e.g. to use a GitHub Enterprise instance,
+    or a local stand-in for benchmarks and tests).
+    """
+
+    return os.environ.get("BRING_GITHUB_API_URL", DEFAULT_GITHUB_API_URL).rstrip("/")
+
+
+def get_github_url(path: str) -> str:
+
+    if path.startswith("http://") or path.startswith("https://"):
+        return path
+
+    if not path.startswith("/"):
+        path = f"/{path}"
+    return f"{get_github_api_url()}{path}"
+
 
 async def get_list_data_from_github(
     path: str, github_username: Optional[str] = None, github_token: Optional[str] = None
@@ -32,14 +57,18 @@ async def get_list_data_from_github(
     try:
         result_list: List[Mapping[str, Any]] = []
 
-        async with httpx.AsyncClient() as client:
+        async with limit("network"), httpx.AsyncClient() as client:
             gh: GitHubAPI = gidgethub.httpx.GitHubAPI(
                 client, github_username, oauth_token=github_token
             )
-            data = gh.getiter(path)
+            data = gh.getiter(get_github_url(path))
             async for i in data:
                 result_list.append(i)
 
+            record_api_call(
+                "github",
+                rate_limit_remaining=gh.rate_limit.remaining if gh.rate_limit else None,
+            )
             if gh.rate_limit:
                 log.debug(
                     f"github requests remaining: {gh.rate_limit.remaining}, reset: {gh.rate_limit.reset_datetime}"
@@ -83,12 +112,16 @@ async def get_data_from_github(
         github_username = ""
     try:
 
-        async with httpx.AsyncClient() as client:
+        async with limit("network"), httpx.AsyncClient() as client:
             gh: GitHubAPI = gidgethub.httpx.GitHubAPI(
                 client, github_username, oauth_token=github_token
             )
-            data = await gh.getitem(path)
+            data = await gh.getitem(get_github_url(path))
 
+            record_api_call(
+                "github",
+                rate_limit_remaining=gh.rate_limit.remaining if gh.rate_limit else None,
+            )
             if gh.rate_limit:
                 log.debug(
                     f"github requests remaining: {gh.rate_limit.remaining}, reset: {gh.rate_limit.reset_datetime}"
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 import logging
+import os
 from typing import Any, List, Mapping, Optional
 
 import gidgetlab
 import gidgetlab.httpx
 import httpx
+from bring.utils.concurrency import limit
+from bring.utils.metrics import record_api_call
 from frkl.common.environment import get_var_value_from_env
 from frkl.common.exceptions import FrklException
 from gidgetlab.abc import GitLabAPI
@@ -13,6 +16,18 @@ from gidgetlab.sansio import RateLimit
 
 log = logging.getLogger("bring")
 
+DEFAULT_GITLAB_URL = "https://gitlab.com"
+
+
+def get_gitlab_url() -> str:
+    """Return the base url of the GitLab instance to use.
+
+    Can be overridden with the 'BRING_GITLAB_URL' environment variable (e.g. to use a self-hosted GitLab instance,
+    or a local stand-in for benchmarks and tests).
+    """
+
+    return os.environ.get("BRING_GITLAB_URL", DEFAULT_GITLAB_URL).rstrip("/")
+
 
 async def get_data_from_gitlab(
     path: str, gitlab_username: Optional[str] = None, gitlab_token: Optional[str] = None
@@ -32,14 +47,21 @@ async def get_data_from_gitlab(
     try:
 
         result_list: List[Mapping[str, Any]] = []
-        async with httpx.AsyncClient() as client:
+        async with limit("network"), httpx.AsyncClient() as client:
             gh: GitLabAPI = gidgetlab.httpx.GitLabAPI(
-                client, gitlab_username, access_token=gitlab_token
+                client,
+                gitlab_username,
+                access_token=gitlab_token,
+                url=get_gitlab_url(),
             )
             data = gh.getiter(path)
             async for i in data:
                 result_list.append(i)
 
+            record_api_call(
+                "gitlab",
+                rate_limit_remaining=gh.rate_limit.remaining if gh.rate_limit else None,
+            )
             if gh.rate_limit:
                 log.debug(
                     f"gitlab requests remaining: {gh.rate_limit.remaining}, reset: {gh.rate_limit.reset_datetime}"
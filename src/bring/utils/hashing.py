@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Stable content hashes for json-compatible data (package records, index manifests, ...)."""
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Tuple
+
+
+DEFAULT_DIGEST_SIZE = 16
+
+MEMO_MAX_SIZE = 1024
+
+_MEMO: "OrderedDict[Tuple[int, int], Tuple[Any, Any, str]]" = OrderedDict()
+
+
+def canonical_json(data: Any) -> bytes:
+    """Serialize data in a canonical way: sorted keys, no whitespace, utf-8."""
+
+    return json.dumps(
+        data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def hash_bytes(data: bytes, digest_size: int = DEFAULT_DIGEST_SIZE) -> str:
+
+    return hashlib.blake2b(data, digest_size=digest_size).hexdigest()
+
+
+def hash_content(data: Any, digest_size: int = DEFAULT_DIGEST_SIZE) -> str:
+    """Return a (hex) blake2b hash of the canonical json serialization of the provided data."""
+
+    return hash_bytes(canonical_json(data), digest_size=digest_size)
+
+
+def hash_content_memoized(data: Any, digest_size: int = DEFAULT_DIGEST_SIZE) -> str:
+    """Same as 'hash_content', but remembers the hashes of the most recently hashed objects (by identity).
+
+    A copy of the data is kept, so an object that was changed since it was hashed is hashed again.
+    """
+
+    key = (id(data), digest_size)
+    entry = _MEMO.get(key, None)
+    if entry is not None and entry[0] is data and entry[1] == data:
+        _MEMO.move_to_end(key)
+        return entry[2]
+
+    digest = hash_content(data, digest_size=digest_size)
+    _MEMO[key] = (data, copy.deepcopy(data), digest)
+    if len(_MEMO) > MEMO_MAX_SIZE:
+        _MEMO.popitem(last=False)
+    return digest
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""A small, process-global metrics registry (counters, gauges and histograms).
+
+Metrics are collected in memory, and, if the 'BRING_METRICS_FILE' environment variable is set, written to that file
+when the process exits. The output format is either json (default), or a Prometheus (node-exporter) textfile, if
+the file name ends with '.prom', or the 'BRING_METRICS_FORMAT' environment variable is set to 'prometheus'.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+
+if TYPE_CHECKING:
+    from bring.utils.profiling import StepProfile
+
+
+log = logging.getLogger("bring")
+
+DEFAULT_HISTOGRAM_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+METRICS_FORMATS = ["json", "prometheus"]
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels_key(labels: Mapping[str, Any]) -> LabelsKey:
+
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_prometheus_labels(
+    labels: Iterable[Tuple[str, str]], extra: Optional[Tuple[str, str]] = None
+) -> str:
+
+    items = list(labels)
+    if extra is not None:
+        items.append(extra)
+    if not items:
+        return ""
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in items) + "}"
+
+
+class Histogram(object):
+    def __init__(self, buckets: Iterable[float] = DEFAULT_HISTOGRAM_BUCKETS):
+
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self.bucket_counts: List[int] = [0] * len(self.buckets)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+
+        self.count = self.count + 1
+        self.sum = self.sum + value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] = self.bucket_counts[i] + 1
+
+    def merge(self, other: "Histogram") -> None:
+
+        if other.buckets != self.buckets:
+            raise ValueError("Can't merge histograms with different buckets.")
+
+        self.count = self.count + other.count
+        self.sum = self.sum + other.sum
+        for i, count in enumerate(other.bucket_counts):
+            self.bucket_counts[i] = self.bucket_counts[i] + count
+
+    def to_dict(self) -> Dict[str, Any]:
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {str(b): c for b, c in zip(self.buckets, self.bucket_counts)},
+        }
+
+
+class MetricsRegistry(object):
+    def __init__(self):
+
+        self._counters: Dict[str, Dict[LabelsKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelsKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelsKey, Histogram]] = {}
+        self._docs: Dict[str, str] = {}
+
+    def describe(self, name: str, doc: str) -> None:
+
+        self._docs[name] = doc
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+
+        values = self._counters.setdefault(name, {})
+        key = _labels_key(labels)
+        values[key] = values.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+
+        self._gauges.setdefault(name, {})[_labels_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+
+        values = self._histograms.setdefault(name, {})
+        key = _labels_key(labels)
+        histogram = values.get(key, None)
+        if histogram is None:
+            histogram = Histogram()
+            values[key] = histogram
+        histogram.observe(value)
+
+    def get_counter(self, name: str, **labels: Any) -> float:
+
+        return self._counters.get(name, {}).get(_labels_key(labels), 0)
+
+    def clear(self) -> None:
+
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+
+    def export_values(self) -> Dict[str, Dict[str, Dict[LabelsKey, Any]]]:
+        """Return a (picklable) copy of all recorded values, to be merged into another registry."""
+
+        return {
+            "counters": {k: dict(v) for k, v in self._counters.items()},
+            "gauges": {k: dict(v) for k, v in self._gauges.items()},
+            "histograms": {k: dict(v) for k, v in self._histograms.items()},
+        }
+
+    def merge_values(self, values: Mapping[str, Mapping[str, Mapping[LabelsKey, Any]]]):
+        """Add values exported from another registry (e.g. in a process pool worker) to this one."""
+
+        for name, counters in values.get("counters", {}).items():
+            target = self._counters.setdefault(name, {})
+            for key, amount in counters.items():
+                target[key] = target.get(key, 0) + amount
+
+        for name, gauges in values.get("gauges", {}).items():
+            self._gauges.setdefault(name, {}).update(gauges)
+
+        for name, histograms in values.get("histograms", {}).items():
+            target_hists = self._histograms.setdefault(name, {})
+            for key, hist in histograms.items():
+                existing = target_hists.get(key, None)
+                if existing is None:
+                    existing = Histogram(buckets=hist.buckets)
+                    target_hists[key] = existing
+                existing.merge(hist)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def convert(values: Mapping[LabelsKey, Any], hist: bool = False):
+            result = []
+            for key, value in values.items():
+                result.append(
+                    {"labels": dict(key), "value": value.to_dict() if hist else value}
+                )
+            return result
+
+        return {
+            "timestamp": time.time(),
+            "counters": {k: convert(v) for k, v in self._counters.items()},
+            "gauges": {k: convert(v) for k, v in self._gauges.items()},
+            "histograms": {
+                k: convert(v, hist=True) for k, v in self._histograms.items()
+            },
+        }
+
+    def to_prometheus(self) -> str:
+
+        lines: List[str] = []
+
+        def header(name: str, metric_type: str):
+            if name in self._docs.keys():
+                lines.append(f"# HELP {name} {self._docs[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        for name in sorted(self._counters.keys()):
+            header(name, "counter")
+            for key, value in self._counters[name].items():
+                lines.append(f"{name}{_format_prometheus_labels(key)} {value}")
+
+        for name in sorted(self._gauges.keys()):
+            header(name, "gauge")
+            for key, value in self._gauges[name].items():
+                lines.append(f"{name}{_format_prometheus_labels(key)} {value}")
+
+        for name in sorted(self._histograms.keys()):
+            header(name, "histogram")
+            for key, hist in self._histograms[name].items():
+                for bound, count in zip(hist.buckets, hist.bucket_counts):
+                    labels = _format_prometheus_labels(key, ("le", str(bound)))
+                    lines.append(f"{name}_bucket{labels} {count}")
+                labels = _format_prometheus_labels(key, ("le", "+Inf"))
+                lines.append(f"{name}_bucket{labels} {hist.count}")
+                lines.append(f"{name}_sum{_format_prometheus_labels(key)} {hist.sum}")
+                lines.append(
+                    f"{name}_count{_format_prometheus_labels(key)} {hist.count}"
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, metrics_format: Optional[str] = None) -> None:
+        """Write the current metrics to a file.
+
+        The file is written atomically, so a Prometheus node-exporter never picks up a half-written file.
+        """
+
+        if metrics_format is None:
+            if path.endswith(".prom"):
+                metrics_format = "prometheus"
+            else:
+                metrics_format = "json"
+
+        if metrics_format not in METRICS_FORMATS:
+            raise ValueError(
+                f"Invalid metrics format '{metrics_format}', allowed: {', '.join(METRICS_FORMATS)}"
+            )
+
+        if metrics_format == "prometheus":
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2)
+
+        path = os.path.abspath(os.path.expanduser(path))
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(prefix=".bring_metrics_", dir=folder)
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+
+METRICS = MetricsRegistry()
+
+METRICS.describe("bring_cache_requests_total", "Cache lookups, by cache and result.")
+METRICS.describe(
+    "bring_api_calls_total", "Calls to remote (GitHub/GitLab) APIs, by service."
+)
+METRICS.describe(
+    "bring_api_rate_limit_remaining", "Remaining API requests, as reported last."
+)
+METRICS.describe("bring_downloaded_bytes_total", "Bytes downloaded by install steps.")
+METRICS.describe("bring_files_touched_total", "Files moved or copied by install steps.")
+METRICS.describe(
+    "bring_step_duration_seconds", "Duration of mogrifier steps, by step type."
+)
+METRICS.describe("bring_phase_duration_seconds", "Duration of bring phases.")
+METRICS.describe("bring_phase_total", "Finished bring phases, by phase and result.")
+
+_EXPORT_REGISTERED = False
+
+
+def record_step_profile(profile: "StepProfile") -> None:
+
+    METRICS.observe(
+        "bring_step_duration_seconds", profile.wall_time, step_type=profile.step_type
+    )
+    if profile.network_bytes:
+        METRICS.inc("bring_downloaded_bytes_total", profile.network_bytes)
+    if profile.files_touched:
+        METRICS.inc("bring_files_touched_total", profile.files_touched)
+
+
+def record_cache_access(cache: str, hit: bool) -> None:
+
+    METRICS.inc(
+        "bring_cache_requests_total", cache=cache, result="hit" if hit else "miss"
+    )
+
+
+def record_api_call(service: str, rate_limit_remaining: Optional[int] = None) -> None:
+
+    METRICS.inc("bring_api_calls_total", service=service)
+    if rate_limit_remaining is not None:
+        METRICS.set_gauge(
+            "bring_api_rate_limit_remaining", rate_limit_remaining, service=service
+        )
+
+
+@contextmanager
+def measure_phase(phase: str) -> Iterator[None]:
+    """Record the duration, and the result, of the code that runs within this context."""
+
+    start = time.perf_counter()
+    success = False
+    try:
+        yield
+        success = True
+    finally:
+        METRICS.observe(
+            "bring_phase_duration_seconds", time.perf_counter() - start, phase=phase
+        )
+        METRICS.inc(
+            "bring_phase_total", phase=phase, result="success" if success else "failed"
+        )
+
+
+def write_metrics_from_env() -> None:
+
+    path = os.environ.get("BRING_METRICS_FILE", None)
+    if not path:
+        return
+
+    metrics_format = os.environ.get("BRING_METRICS_FORMAT", None)
+    try:
+        METRICS.write(path, metrics_format=metrics_format)
+    except Exception as e:
+        log.warning(f"Could not write metrics to '{path}': {e}")
+
+
+def init_metrics() -> None:
+    """Register the metrics export at process exit (if configured)."""
+
+    global _EXPORT_REGISTERED
+    if _EXPORT_REGISTERED:
+        return
+
+    atexit.register(write_metrics_from_env)
+    _EXPORT_REGISTERED = True
@@ -3,8 +3,9 @@ import logging
 import os
 import shutil
 import tempfile
-from typing import Any, Iterable, Mapping, Optional, Union
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
 
+from bring.utils.profiling import record_step_value
 from frkl.common.filesystem import ensure_folder
 from pathspec import PathSpec, patterns
 
@@ -74,6 +75,8 @@ def copy_filtered_files(
         else:
             shutil.copy2(source_file, target_file)
 
+    record_step_value("files_touched", len(matches))
+
     return target
 
 
@@ -93,3 +96,54 @@ def flatten_folder(
             else:
                 raise NotImplementedError()
         shutil.move(f, target)
+        record_step_value("files_touched")
+
+
+def merge_folders(
+    target_path: str,
+    *source_paths: str,
+    move_method: str = "move",
+    overwrite: bool = False,
+) -> Mapping[str, str]:
+    """Merge the files of several source folders into a target folder.
+
+    Files are merged in the order of the provided source folders. If a file already exists in the target, it is either
+    ignored (default) or overwritten, depending on the value of the 'overwrite' argument.
+
+    Returns:
+        a map with the relative path of every merged file as key, and the source folder it came from as value
+    """
+
+    if move_method not in ["move", "copy"]:
+        raise ValueError(f"Invalid 'move_method' value: {move_method}")
+
+    ensure_folder(target_path)
+
+    merged: Dict[str, str] = {}
+    for source_path in source_paths:
+        for rel_path in find_matches(source_path):
+            source_file = os.path.join(source_path, rel_path)
+            target_file = os.path.join(target_path, rel_path)
+
+            if rel_path in merged.keys() or os.path.exists(target_file):
+                if not overwrite:
+                    log.info(f"Duplicate file '{rel_path}', ignoring...")
+                    continue
+                if os.path.isdir(target_file) and not os.path.islink(target_file):
+                    # files of an earlier source live in there, so we can't replace it
+                    log.warning(
+                        f"Can't overwrite folder '{rel_path}' with a file, ignoring..."
+                    )
+                    continue
+                os.unlink(target_file)
+
+            ensure_folder(os.path.dirname(target_file))
+            if move_method == "move":
+                shutil.move(source_file, target_file)
+            else:
+                shutil.copy2(source_file, target_file)
+            merged[rel_path] = source_path
+
+    record_step_value("files_touched", len(merged))
+
+    return merged
@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Mapping, Optional, Union
 
 from anyio import create_task_group
 from bring.pkg import PkgTing
+from bring.utils.concurrency import run_limited
 from colorama import Fore, Style
 from frkl.common.cli.output_utils import create_two_column_table
 from sortedcontainers import SortedDict
@@ -33,7 +34,7 @@ async def get_values_for_pkgs(
 
     async with create_task_group() as tg:
         for pkg_name, pkg in pkgs.items():
-            await tg.spawn(get_values, pkg_name, pkg)
+            await tg.spawn(run_limited, "network", get_values, pkg_name, pkg)
 
     return result
 
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Lazy loading of bring's built-in plugins (mogrifiers and package types).
+
+Importing all plugin modules up front pulls in a lot of (heavy) third-party dependencies (git libraries, http clients,
+templating, ...), most of which are not needed for any given command. Instead, a manifest maps every plugin name to
+the module and class that implements it, so a plugin module is only imported when that plugin is first used.
+
+The manifest is generated from the source tree (by looking for '_plugin_name' class attributes), and needs to be
+re-generated whenever a built-in plugin is added, removed or renamed:
+
+    python -m bring.utils.plugins
+"""
+import ast
+import importlib
+import json
+import logging
+import os
+import sys
+from typing import Dict, Iterable, List, Mapping, Optional, Type
+
+from bring.defaults import BRING_MODULE_BASE_FOLDER, BRING_PLUGIN_MANIFEST_FILE
+
+
+log = logging.getLogger("bring")
+
+PLUGIN_PACKAGES: Mapping[str, str] = {
+    "mogrifiers": "bring.mogrify",
+    "pkg_types": "bring.pkg_types",
+}
+"""The plugin types bring loads lazily, and the package their implementations live in."""
+
+_PLUGIN_MANIFEST: Optional[Mapping[str, Mapping[str, str]]] = None
+
+
+def load_plugin_manifest() -> Mapping[str, Mapping[str, str]]:
+
+    global _PLUGIN_MANIFEST
+
+    if _PLUGIN_MANIFEST is None:
+        try:
+            with open(BRING_PLUGIN_MANIFEST_FILE, "r") as f:
+                _PLUGIN_MANIFEST = json.load(f)
+        except Exception as e:
+            log.debug(
+                f"Could not load plugin manifest '{BRING_PLUGIN_MANIFEST_FILE}': {e}"
+            )
+            _PLUGIN_MANIFEST = {}
+
+    return _PLUGIN_MANIFEST  # type: ignore
+
+
+def get_plugin_names(plugin_type: str) -> List[str]:
+
+    return sorted(load_plugin_manifest().get(plugin_type, {}).keys())
+
+
+def get_plugin_class(plugin_type: str, plugin_name: str) -> Optional[Type]:
+    """Import (only) the module that contains the requested plugin, and return the plugin class.
+
+    Returns 'None' if the plugin is not in the manifest.
+    """
+
+    target = load_plugin_manifest().get(plugin_type, {}).get(plugin_name, None)
+    if target is None:
+        return None
+
+    module_name, class_name = target.split(":", maxsplit=1)
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def load_plugin_modules(plugin_type: str) -> None:
+    """Import all modules that contain plugins of the specified type."""
+
+    modules = set()
+    for target in load_plugin_manifest().get(plugin_type, {}).values():
+        modules.add(target.split(":", maxsplit=1)[0])
+
+    for module_name in sorted(modules):
+        importlib.import_module(module_name)
+
+
+def _find_plugin_classes(path: str) -> Iterable[Mapping[str, str]]:
+
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+
+        for item in node.body:
+            if isinstance(item, ast.Assign):
+                targets = item.targets
+                value = item.value
+            elif isinstance(item, ast.AnnAssign) and item.value is not None:
+                targets = [item.target]
+                value = item.value
+            else:
+                continue
+
+            if not any(
+                isinstance(t, ast.Name) and t.id == "_plugin_name" for t in targets
+            ):
+                continue
+
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                yield {"plugin_name": value.value, "class_name": node.name}
+
+
+def generate_plugin_manifest(
+    base_folder: str = BRING_MODULE_BASE_FOLDER,
+) -> Dict[str, Dict[str, str]]:
+    """Create the plugin manifest by parsing (not importing) the modules in the plugin packages."""
+
+    result: Dict[str, Dict[str, str]] = {}
+    root = os.path.dirname(base_folder)
+
+    for plugin_type, package in PLUGIN_PACKAGES.items():
+        plugins: Dict[str, str] = {}
+        package_folder = os.path.join(root, *package.split("."))
+        for file_name in sorted(os.listdir(package_folder)):
+            if not file_name.endswith(".py") or file_name == "__init__.py":
+                continue
+            module_name = f"{package}.{file_name[0:-3]}"
+            for details in _find_plugin_classes(
+                os.path.join(package_folder, file_name)
+            ):
+                name = details["plugin_name"]
+                if name in plugins.keys():
+                    raise Exception(
+                        f"Duplicate {plugin_type} plugin name '{name}': {plugins[name]}, {module_name}:{details['class_name']}"
+                    )
+                plugins[name] = f"{module_name}:{details['class_name']}"
+        result[plugin_type] = plugins
+
+    return result
+
+
+def write_plugin_manifest(path: str = BRING_PLUGIN_MANIFEST_FILE) -> None:
+
+    manifest = generate_plugin_manifest()
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+
+    target = sys.argv[1] if len(sys.argv) > 1 else BRING_PLUGIN_MANIFEST_FILE
+    write_plugin_manifest(target)
+    print(f"plugin manifest written to: {target}")
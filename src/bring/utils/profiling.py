@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""Helpers to record what a single (mogrifier) step costs.
+
+Every step that is run within 'profile_step' gets a 'StepProfile', which records wall time, cpu time and bytes
+read/written by the process. Code that runs within a step can add additional values to the current profile using
+'record_step_value' (for example the number of files touched, or the number of bytes downloaded).
+
+Once a step is finished, its profile is added to the process metrics (see 'bring.utils.metrics'), and sent to the
+listeners registered (via 'collect_step_profiles') in the context the step runs in. Listeners are scoped to a context
+instead of being registered globally, so concurrent runs (and tests) don't see each others profiles.
+
+Cpu time and bytes read/written are measured for the whole process, so if steps run concurrently, their values
+overlap.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from bring.utils.metrics import record_step_profile
+
+
+if TYPE_CHECKING:
+    from rich.console import Console, ConsoleOptions, RenderResult
+
+
+log = logging.getLogger("bring")
+
+_PROFILE_LISTENERS: ContextVar[Tuple[Callable[["StepProfile"], Any], ...]] = ContextVar(
+    "bring_step_profile_listeners", default=()
+)
+
+_CURRENT_PROFILE: ContextVar[Optional["StepProfile"]] = ContextVar(
+    "bring_current_step_profile", default=None
+)
+
+
+def read_process_io() -> Optional[Tuple[int, int]]:
+    """Return the number of bytes read and written by this process so far, if the platform supports it."""
+
+    try:
+        with open("/proc/self/io", "r") as f:
+            content = f.read()
+    except Exception:
+        return None
+
+    values: Dict[str, int] = {}
+    for line in content.splitlines():
+        key, _, value = line.partition(":")
+        try:
+            values[key.strip()] = int(value.strip())
+        except ValueError:
+            continue
+
+    if "rchar" not in values.keys() or "wchar" not in values.keys():
+        return None
+
+    return (values["rchar"], values["wchar"])
+
+
+class StepProfile(object):
+    def __init__(
+        self,
+        step_id: str,
+        step_type: str,
+        pipeline_id: Optional[str] = None,
+        parent: Optional["StepProfile"] = None,
+    ):
+
+        self.step_id: str = step_id
+        self.step_type: str = step_type
+        self.pipeline_id: Optional[str] = pipeline_id
+        self.parent: Optional[StepProfile] = parent
+
+        self.wall_time: float = 0.0
+        self.cpu_time: float = 0.0
+        self.bytes_read: Optional[int] = None
+        self.bytes_written: Optional[int] = None
+        self.files_touched: int = 0
+        self.network_bytes: int = 0
+        self.success: Optional[bool] = None
+
+        self.values: Dict[str, int] = {}
+
+    def add_value(self, key: str, amount: int = 1) -> None:
+
+        if key == "files_touched":
+            self.files_touched = self.files_touched + amount
+        elif key == "network_bytes":
+            self.network_bytes = self.network_bytes + amount
+        else:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+
+        result: Dict[str, Any] = {
+            "step_id": self.step_id,
+            "step_type": self.step_type,
+            "pipeline_id": self.pipeline_id,
+            "parent": self.parent.step_id if self.parent is not None else None,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "files_touched": self.files_touched,
+            "network_bytes": self.network_bytes,
+            "success": self.success,
+        }
+        if self.values:
+            result["values"] = dict(self.values)
+        return result
+
+    def __repr__(self):
+
+        return f"StepProfile(step_id={self.step_id} step_type={self.step_type} wall_time={self.wall_time:.3f})"
+
+
+@contextmanager
+def collect_step_profiles(
+    listener: Callable[[StepProfile], Any]
+) -> Iterator[Callable[[StepProfile], Any]]:
+    """Send the profiles of all steps that run within this context (including tasks spawned from it) to the listener."""
+
+    token = _PROFILE_LISTENERS.set(_PROFILE_LISTENERS.get() + (listener,))
+    try:
+        yield listener
+    finally:
+        _PROFILE_LISTENERS.reset(token)
+
+
+def publish_step_profile(profile: StepProfile) -> None:
+
+    log.debug(f"step profile: {profile.to_dict()}")
+    record_step_profile(profile)
+    for listener in _PROFILE_LISTENERS.get():
+        try:
+            listener(profile)
+        except Exception as e:
+            log.debug(f"Error in profile listener: {e}", exc_info=True)
+
+
+def get_current_step_profile() -> Optional[StepProfile]:
+
+    return _CURRENT_PROFILE.get()
+
+
+def record_step_value(key: str, amount: int = 1) -> None:
+    """Add a value to the profile of the step that is currently running (if any)."""
+
+    profile = _CURRENT_PROFILE.get()
+    if profile is not None:
+        profile.add_value(key, amount)
+
+
+@contextmanager
+def profile_step(
+    step_id: str, step_type: str, pipeline_id: Optional[str] = None
+) -> Iterator[StepProfile]:
+    """Measure the code that runs within this context, and publish the resulting profile once it is finished."""
+
+    profile = StepProfile(
+        step_id=step_id,
+        step_type=step_type,
+        pipeline_id=pipeline_id,
+        parent=_CURRENT_PROFILE.get(),
+    )
+    token = _CURRENT_PROFILE.set(profile)
+
+    io_start = read_process_io()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.wall_time = time.perf_counter() - wall_start
+        profile.cpu_time = time.process_time() - cpu_start
+        io_end = read_process_io()
+        if io_start is not None and io_end is not None:
+            profile.bytes_read = io_end[0] - io_start[0]
+            profile.bytes_written = io_end[1] - io_start[1]
+
+        _CURRENT_PROFILE.reset(token)
+        publish_step_profile(profile)
+
+
+def format_bytes(amount: Optional[int]) -> str:
+
+    if amount is None:
+        return "n/a"
+
+    value = float(amount)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if value < 1024 or unit == "GB":
+            if unit == "B":
+                return f"{int(value)} {unit}"
+            return f"{value:.1f} {unit}"
+        value = value / 1024
+
+    return f"{amount} B"
+
+
+class ProfileSummary(object):
+    """Collects step profiles (when used with 'collect_step_profiles'), and renders a summary of them."""
+
+    def __init__(self):
+
+        self._profiles: List[StepProfile] = []
+
+    def __call__(self, profile: StepProfile) -> None:
+
+        self._profiles.append(profile)
+
+    @property
+    def profiles(self) -> List[StepProfile]:
+        return self._profiles
+
+    def get_totals_by_type(self) -> Mapping[str, Mapping[str, Any]]:
+        """Sum up the values of all top-level steps, grouped by step type."""
+
+        result: Dict[str, Dict[str, Any]] = {}
+        for p in self._profiles:
+            if p.parent is not None:
+                continue
+            totals = result.setdefault(
+                p.step_type,
+                {
+                    "steps": 0,
+                    "wall_time": 0.0,
+                    "cpu_time": 0.0,
+                    "files_touched": 0,
+                    "network_bytes": 0,
+                },
+            )
+            totals["steps"] = totals["steps"] + 1
+            totals["wall_time"] = totals["wall_time"] + p.wall_time
+            totals["cpu_time"] = totals["cpu_time"] + p.cpu_time
+            totals["files_touched"] = totals["files_touched"] + p.files_touched
+            totals["network_bytes"] = totals["network_bytes"] + p.network_bytes
+
+        return result
+
+    def __rich_console__(
+        self, console: "Console", options: "ConsoleOptions"
+    ) -> "RenderResult":
+
+        from rich import box
+        from rich.table import Table
+
+        yield "[title]Profile[/title]"
+        yield ""
+
+        if not self._profiles:
+            yield "  no steps recorded"
+            return
+
+        table = Table(box=box.SIMPLE)
+        table.add_column("step")
+        table.add_column("type")
+        table.add_column("wall", justify="right")
+        table.add_column("cpu", justify="right")
+        table.add_column("read", justify="right")
+        table.add_column("written", justify="right")
+        table.add_column("files", justify="right")
+        table.add_column("network", justify="right")
+
+        for p in self._profiles:
+            depth = 0
+            parent = p.parent
+            while parent is not None:
+                depth = depth + 1
+                parent = parent.parent
+
+            table.add_row(
+                ("  " * depth) + p.step_id,
+                p.step_type,
+                f"{p.wall_time:.3f}s",
+                f"{p.cpu_time:.3f}s",
+                format_bytes(p.bytes_read),
+                format_bytes(p.bytes_written),
+                str(p.files_touched),
+                format_bytes(p.network_bytes),
+            )
+
+        yield table
+
+        totals_table = Table(box=box.SIMPLE)
+        totals_table.add_column("type")
+        totals_table.add_column("steps", justify="right")
+        totals_table.add_column("wall", justify="right")
+        totals_table.add_column("cpu", justify="right")
+        totals_table.add_column("files", justify="right")
+        totals_table.add_column("network", justify="right")
+
+        totals = self.get_totals_by_type()
+        for step_type in sorted(
+            totals.keys(), key=lambda x: totals[x]["wall_time"], reverse=True
+        ):
+            t = totals[step_type]
+            totals_table.add_row(
+                step_type,
+                str(t["steps"]),
+                f"{t['wall_time']:.3f}s",
+                f"{t['cpu_time']:.3f}s",
+                str(t["files_touched"]),
+                format_bytes(t["network_bytes"]),
+            )
+
+        yield "[title]Totals (by step type)[/title]"
+        yield totals_table
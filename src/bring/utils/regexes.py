@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Pattern, Tuple
+
+
+class MultiRegexMatcher(object):
+    """Match strings against a list of regexes, returning the named groups of the first one that matches.
+
+    All regexes are compiled once, when the matcher is created.
+    """
+
+    def __init__(self, regexes: Iterable[str]):
+
+        self._regexes: Tuple[str, ...] = tuple(regexes)
+        self._patterns: Tuple[Pattern, ...] = tuple(
+            re.compile(r) for r in self._regexes
+        )
+
+    @property
+    def regexes(self) -> Tuple[str, ...]:
+        return self._regexes
+
+    def match(self, value: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return the named groups of the first regex that matches (anywhere in) the value, or 'None'."""
+
+        for pattern in self._patterns:
+            m = pattern.search(value)
+            if m is not None:
+                return m.groupdict()
+        return None
+
+
+@lru_cache(maxsize=256)
+def _get_matcher(regexes: Tuple[str, ...]) -> MultiRegexMatcher:
+
+    return MultiRegexMatcher(regexes)
+
+
+def get_matcher(regexes: Iterable[str]) -> MultiRegexMatcher:
+    """Return a matcher for the provided list of regexes, cached so packages using the same regexes share it."""
+
+    return _get_matcher(tuple(regexes))
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Check whether urls exist (via 'HEAD' requests), with results cached on disk."""
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from anyio import create_task_group
+from bring.defaults import BRING_URL_PROBE_CACHE_FILE, BRING_URL_PROBE_MAX_AGE
+from bring.utils.concurrency import limit
+from frkl.common.filesystem import ensure_folder
+
+
+log = logging.getLogger("bring")
+
+URL_PROBE_CACHE_FORMAT = 1
+
+# responses that don't say anything about whether the url exists ('Method Not Allowed', 'Not Implemented')
+UNKNOWN_STATUS_CODES = [405, 501]
+
+
+class UrlProbeCache(object):
+    """Results of url probes, as a map of urls to a tuple of timestamp and whether the url exists."""
+
+    def __init__(
+        self,
+        cache_file: Optional[str] = BRING_URL_PROBE_CACHE_FILE,
+        max_age: int = BRING_URL_PROBE_MAX_AGE,
+    ):
+
+        self._cache_file: Optional[str] = cache_file
+        self._max_age: int = max_age
+        self._entries: Optional[Dict[str, Tuple[float, bool]]] = None
+        self._changed: bool = False
+
+    def _get_entries(self) -> Dict[str, Tuple[float, bool]]:
+
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+        if self._cache_file and os.path.exists(self._cache_file):
+            try:
+                with open(self._cache_file, "r") as f:
+                    data = json.load(f)
+                if data.get("format", None) == URL_PROBE_CACHE_FORMAT:
+                    self._entries = {k: (v[0], v[1]) for k, v in data["urls"].items()}
+            except Exception as e:
+                log.debug(f"Can't read url probe cache, ignoring: {e}")
+
+        return self._entries
+
+    def get(self, url: str) -> Optional[bool]:
+
+        entry = self._get_entries().get(url, None)
+        if entry is None or time.time() - entry[0] > self._max_age:
+            return None
+        return entry[1]
+
+    def set(self, url: str, exists: bool) -> None:
+
+        self._get_entries()[url] = (time.time(), exists)
+        self._changed = True
+
+    def save(self) -> None:
+
+        if not self._changed or not self._cache_file:
+            return
+
+        now = time.time()
+        entries = {
+            k: v for k, v in self._get_entries().items() if now - v[0] <= self._max_age
+        }
+        ensure_folder(os.path.dirname(self._cache_file))
+        temp_file = f"{self._cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump({"format": URL_PROBE_CACHE_FORMAT, "urls": entries}, f)
+        os.replace(temp_file, self._cache_file)
+        self._changed = False
+
+
+async def probe_urls(
+    urls: Iterable[str], cache: Optional[UrlProbeCache] = None
+) -> Dict[str, bool]:
+    """Check which of the provided urls exist, concurrently.
+
+    Urls that can't be reached (network errors), or that don't support 'HEAD' requests, are treated as existing, so
+    they are not excluded because of a temporary problem (or a server limitation), those results are not cached.
+    """
+
+    if cache is None:
+        cache = UrlProbeCache()
+
+    result: Dict[str, bool] = {}
+    to_probe: List[str] = []
+    for url in urls:
+        if url in result.keys():
+            continue
+        cached = cache.get(url)
+        if cached is None:
+            to_probe.append(url)
+            # placeholder, to de-duplicate
+            result[url] = True
+        else:
+            result[url] = cached
+
+    if not to_probe:
+        return result
+
+    log.debug(f"Probing {len(to_probe)} urls...")
+
+    async with httpx.AsyncClient() as client:
+
+        async def probe(_url: str):
+
+            async with limit("network"):
+                try:
+                    response = await client.head(_url)
+                except Exception as e:
+                    log.debug(f"Can't probe url '{_url}': {e}")
+                    return
+
+            if response.status_code in UNKNOWN_STATUS_CODES:
+                # the server doesn't support 'HEAD' requests, so we can't tell
+                log.debug(
+                    f"Can't probe url '{_url}': status code {response.status_code}"
+                )
+                return
+
+            # redirects (e.g. to a cdn) count as existing
+            exists = response.status_code < 400
+            result[_url] = exists
+            cache.set(_url, exists)  # type: ignore
+
+        async with create_task_group() as tg:
+            for url in to_probe:
+                await tg.spawn(probe, url)
+
+    cache.save()
+    return result
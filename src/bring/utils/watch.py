@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""Detect changes to files and folders on disk (used by long-running bring processes, like the daemon).
+
+On Linux, changes are reported by the kernel (inotify), everywhere else (or if inotify is not available) snapshots of
+modification times and file sizes are compared.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+
+log = logging.getLogger("bring")
+
+FileState = Tuple[int, int]
+"""Modification time (in ns) and size of a file."""
+
+
+class FileChange(object):
+    def __init__(self, path: str, change_type: str, watched_path: str):
+
+        self.path: str = path
+        self.change_type: str = change_type
+        """One of 'added', 'changed', 'deleted'."""
+        self.watched_path: str = watched_path
+        """The watched file or folder this change belongs to."""
+
+    def __repr__(self):
+
+        return f"FileChange(path={self.path}, change_type={self.change_type})"
+
+
+def snapshot_path(path: str) -> Dict[str, FileState]:
+    """Record the state of a file, or of all files (recursively) within a folder."""
+
+    result: Dict[str, FileState] = {}
+
+    if os.path.isfile(path):
+        try:
+            st = os.stat(path)
+            result[path] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        return result
+
+    for root, dirnames, filenames in os.walk(path):
+        dirnames[:] = [d for d in dirnames if d != ".git"]
+        for f in filenames:
+            file_path = os.path.join(root, f)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            result[file_path] = (st.st_mtime_ns, st.st_size)
+
+    return result
+
+
+def diff_snapshots(
+    old: Mapping[str, FileState], new: Mapping[str, FileState], watched_path: str
+) -> List[FileChange]:
+
+    changes: List[FileChange] = []
+    for path, state in new.items():
+        old_state = old.get(path, None)
+        if old_state is None:
+            changes.append(FileChange(path, "added", watched_path))
+        elif old_state != state:
+            changes.append(FileChange(path, "changed", watched_path))
+
+    for path in old.keys():
+        if path not in new.keys():
+            changes.append(FileChange(path, "deleted", watched_path))
+
+    return changes
+
+
+class PollingWatcher(object):
+    """Watch files and folders by comparing snapshots of their content's modification times and sizes."""
+
+    def __init__(self, paths: Optional[Iterable[str]] = None):
+
+        self._snapshots: Dict[str, Dict[str, FileState]] = {}
+        if paths:
+            for path in paths:
+                self.add_path(path)
+
+    @property
+    def paths(self) -> Iterable[str]:
+
+        return self._snapshots.keys()
+
+    def add_path(self, path: str) -> None:
+
+        path = os.path.realpath(os.path.expanduser(path))
+        if path in self._snapshots.keys():
+            return
+        self._snapshots[path] = snapshot_path(path)
+
+    def remove_path(self, path: str) -> None:
+
+        path = os.path.realpath(os.path.expanduser(path))
+        self._snapshots.pop(path, None)
+
+    def check(self) -> List[FileChange]:
+        """Return all changes since the last check."""
+
+        changes: List[FileChange] = []
+        for path, old in self._snapshots.items():
+            new = snapshot_path(path)
+            changes.extend(diff_snapshots(old, new, watched_path=path))
+            self._snapshots[path] = new
+
+        return changes
+
+    def close(self) -> None:
+
+        pass
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+INOTIFY_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+
+def merge_changes(changes: Iterable[FileChange]) -> List[FileChange]:
+    """Merge several changes to the same file into (at most) one, keeping the order of first occurence."""
+
+    merged: Dict[Tuple[str, str], FileChange] = {}
+    for change in changes:
+        key = (change.watched_path, change.path)
+        previous = merged.get(key, None)
+        if previous is None:
+            merged[key] = change
+            continue
+
+        if previous.change_type == "added":
+            if change.change_type == "deleted":
+                merged.pop(key)
+        elif previous.change_type == "deleted":
+            if change.change_type != "deleted":
+                previous.change_type = "changed"
+        elif change.change_type == "deleted":
+            previous.change_type = "deleted"
+
+    return list(merged.values())
+
+
+class InotifyWatcher(object):
+    """Watch files and folders using the Linux inotify api.
+
+    Folders are watched recursively. Files are watched via their parent folder.
+    """
+
+    def __init__(self, paths: Optional[Iterable[str]] = None):
+
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Can't initialize inotify: {os.strerror(errno)}")
+
+        self._watched: Dict[str, bool] = {}
+        """All watched paths, and whether they are folders."""
+        self._wds: Dict[str, int] = {}
+        self._wd_paths: Dict[int, str] = {}
+
+        if paths:
+            for path in paths:
+                self.add_path(path)
+
+    @property
+    def paths(self) -> Iterable[str]:
+
+        return self._watched.keys()
+
+    def fileno(self) -> int:
+
+        return self._fd
+
+    def _add_watch(self, folder: str) -> None:
+
+        if folder in self._wds.keys():
+            return
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(folder), INOTIFY_WATCH_MASK
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            log.debug(f"Can't watch folder '{folder}': {os.strerror(errno)}")
+            return
+        self._wds[folder] = wd
+        self._wd_paths[wd] = folder
+
+    def _add_watches(self, folder: str) -> None:
+
+        for root, dirnames, _ in os.walk(folder):
+            dirnames[:] = [d for d in dirnames if d != ".git"]
+            self._add_watch(root)
+
+    def add_path(self, path: str) -> None:
+
+        path = os.path.realpath(os.path.expanduser(path))
+        if path in self._watched.keys():
+            return
+
+        is_folder = os.path.isdir(path)
+        self._watched[path] = is_folder
+        if is_folder:
+            self._add_watches(path)
+        else:
+            self._add_watch(os.path.dirname(path))
+
+    def _remove_watches(self, folder: str) -> None:
+
+        for watched_folder, wd in list(self._wds.items()):
+            if watched_folder == folder or watched_folder.startswith(
+                folder + os.path.sep
+            ):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                self._wds.pop(watched_folder)
+                self._wd_paths.pop(wd, None)
+
+    def _is_needed(self, folder: str) -> bool:
+
+        for path, is_folder in self._watched.items():
+            if is_folder:
+                if folder == path or folder.startswith(path + os.path.sep):
+                    return True
+            elif folder == os.path.dirname(path):
+                return True
+        return False
+
+    def remove_path(self, path: str) -> None:
+
+        path = os.path.realpath(os.path.expanduser(path))
+        if self._watched.pop(path, None) is None:
+            return
+
+        for folder, wd in list(self._wds.items()):
+            if self._is_needed(folder):
+                continue
+            self._libc.inotify_rm_watch(self._fd, wd)
+            self._wds.pop(folder)
+            self._wd_paths.pop(wd, None)
+
+    def _get_watched_paths(self, path: str) -> List[str]:
+
+        result = []
+        for watched_path, is_folder in self._watched.items():
+            if is_folder:
+                if path.startswith(watched_path + os.path.sep):
+                    result.append(watched_path)
+            elif path == watched_path:
+                result.append(watched_path)
+        return result
+
+    def _read_events(self) -> List[Tuple[int, int, str]]:
+
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data = data + chunk
+
+        events = []
+        offset = 0
+        while offset + INOTIFY_EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+            offset = offset + INOTIFY_EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset = offset + length
+            events.append((wd, mask, name))
+
+        return events
+
+    def check(self) -> List[FileChange]:
+        """Return all changes since the last check."""
+
+        changes: List[FileChange] = []
+
+        for wd, mask, name in self._read_events():
+
+            if mask & IN_Q_OVERFLOW:
+                # events got lost, so we can only say that something changed
+                log.debug("inotify event queue overflow")
+                for watched_path in self._watched.keys():
+                    changes.append(FileChange(watched_path, "changed", watched_path))
+                continue
+
+            folder = self._wd_paths.get(wd, None)
+            if folder is None:
+                continue
+            if mask & IN_IGNORED:
+                # the folder was deleted
+                self._wds.pop(folder, None)
+                self._wd_paths.pop(wd, None)
+                continue
+            if not name:
+                continue
+
+            path = os.path.join(folder, name)
+            watched_paths = self._get_watched_paths(path)
+            if not watched_paths:
+                continue
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # new sub-folders need to be watched as well, and the files within are new
+                    self._add_watches(path)
+                    for file_path in snapshot_path(path).keys():
+                        for watched_path in self._get_watched_paths(file_path):
+                            changes.append(FileChange(file_path, "added", watched_path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    # the events don't say which files were in the folder, so the whole watched path needs a re-sync
+                    self._remove_watches(path)
+                    for watched_path in watched_paths:
+                        changes.append(
+                            FileChange(watched_path, "changed", watched_path)
+                        )
+                continue
+
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                change_type = "added"
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                change_type = "deleted"
+            else:
+                change_type = "changed"
+
+            for watched_path in watched_paths:
+                changes.append(FileChange(path, change_type, watched_path))
+
+        return merge_changes(changes)
+
+    def close(self) -> None:
+
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(
+    paths: Optional[Iterable[str]] = None, polling: Optional[bool] = None
+) -> Union[InotifyWatcher, PollingWatcher]:
+    """Create a file watcher, using inotify if available, otherwise polling.
+
+    Polling can be forced by setting the 'BRING_WATCH_POLLING' environment variable.
+    """
+
+    if polling is None:
+        polling = os.environ.get("BRING_WATCH_POLLING", "").lower() in [
+            "1",
+            "true",
+            "yes",
+        ]
+
+    if not polling:
+        try:
+            return InotifyWatcher(paths=paths)
+        except (OSError, AttributeError) as e:
+            log.debug(f"Can't use inotify, falling back to polling: {e}")
+
+    return PollingWatcher(paths=paths)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""Thin client for the bring daemon, and entry point of the 'bring' command.
+
+Commands a running daemon can answer are forwarded to it, everything else is handled by the full cli. This package
+lives outside of 'bring', so forwarding a command doesn't run 'bring/__init__' (and with it, all of bring's startup
+code). It must only ever depend on the standard library.
+
+Requests and responses are single lines of json:
+
+    request:  {"command": "list", "args": {"index": null}, "config": ["my_profile", {"indexes": ["binaries"]}],
+               "width": 120}
+    response: {"exit_code": 0, "output": "..."}
+"""
+import json
+import os
+import re
+import shutil
+import socket
+import sys
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+DEFAULT_CLIENT_TIMEOUT = 600.0
+
+ANSI_ESCAPE_REGEX = re.compile(r"\x1b\[[0-9;]*m")
+
+# same as 'BringSearchCommand'
+DEFAULT_SEARCH_LIMIT = 25
+
+# 'bring.defaults.DEFAULT_PKG_EXTENSION', and other formats 'bring explain package' reads from files
+PKG_FILE_EXTENSIONS = (".pkg.br", ".yaml", ".yml", ".json")
+
+
+def get_user_cache_dir() -> str:
+    """Return the same folder as 'appdirs.AppDirs("bring", "frkl").user_cache_dir' (on Linux and Mac OS X)."""
+
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches/bring")
+
+    cache_home = os.environ.get("XDG_CACHE_HOME", None)
+    if not cache_home or not cache_home.strip():
+        cache_home = os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "bring")
+
+
+BRING_DAEMON_SOCKET = os.environ.get(
+    "BRING_DAEMON_SOCKET",
+    os.path.join(get_user_cache_dir(), "workspace", "daemon.sock"),
+)
+
+
+class DaemonNotAvailable(Exception):
+    pass
+
+
+def encode_message(msg: Mapping[str, Any]) -> bytes:
+
+    return json.dumps(msg).encode("utf-8") + b"\n"
+
+
+def decode_message(line: bytes) -> Mapping[str, Any]:
+
+    return json.loads(line.decode("utf-8"))
+
+
+def send_request(
+    request: Mapping[str, Any],
+    socket_path: str = BRING_DAEMON_SOCKET,
+    timeout: float = DEFAULT_CLIENT_TIMEOUT,
+) -> Mapping[str, Any]:
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise DaemonNotAvailable(
+                f"No bring daemon listening on: {socket_path}: {e}"
+            )
+
+        sock.sendall(encode_message(request))
+
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size = size + len(chunk)
+            if chunk.endswith(b"\n") or size > MAX_MESSAGE_SIZE:
+                break
+    finally:
+        sock.close()
+
+    if not chunks:
+        raise DaemonNotAvailable("Bring daemon closed connection without response.")
+
+    return decode_message(b"".join(chunks))
+
+
+def parse_cli_args(argv: List[str]) -> Optional[Mapping[str, Any]]:
+    """Create a daemon request from cli arguments, or return 'None' if the daemon can't handle them."""
+
+    config: List[str] = []
+    indexes: List[str] = []
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ["-c", "--config", "-i", "--index"]:
+            if i + 1 >= len(argv):
+                return None
+            target = config if arg in ["-c", "--config"] else indexes
+            target.append(argv[i + 1])
+            i = i + 2
+        elif arg.startswith("--config="):
+            config.append(arg.split("=", maxsplit=1)[1])
+            i = i + 1
+        elif arg.startswith("--index="):
+            indexes.append(arg.split("=", maxsplit=1)[1])
+            i = i + 1
+        else:
+            break
+
+    rest = argv[i:]
+    if not rest:
+        return None
+
+    command = rest[0]
+    if command in ["explain", "exp", "x"]:
+        command = "explain"
+        args = _parse_explain_args(rest[1:])
+    elif command == "search":
+        args = _parse_search_args(rest[1:])
+    elif command == "list":
+        args = _parse_list_args(rest[1:])
+    else:
+        return None
+
+    if args is None:
+        return None
+
+    # same as 'BringCommandGroup.create_bring_config_list'
+    config_list: List[Union[str, Dict[str, Any]]] = list(config)
+    if indexes:
+        config_list.append({"indexes": indexes})
+
+    return {"command": command, "args": args, "config": config_list}
+
+
+def _parse_list_args(argv: List[str]) -> Optional[Dict[str, Any]]:
+
+    if len(argv) > 1 or (argv and argv[0].startswith("-")):
+        return None
+
+    return {"index": argv[0] if argv else None}
+
+
+def _parse_explain_args(argv: List[str]) -> Optional[Dict[str, Any]]:
+
+    if not argv:
+        return None
+
+    target = argv[0]
+    args = argv[1:]
+    if target in ["package", "pkg"]:
+        if len(args) != 1 or args[0].startswith("-"):
+            return None
+        # package description files are read relative to the current directory, the cli needs to handle those
+        if args[0].endswith(PKG_FILE_EXTENSIONS):
+            return None
+        return {"target": "package", "package": args[0]}
+
+    if target in ["index", "idx", "indexes"]:
+        update = False
+        index_names: List[str] = []
+        for arg in args:
+            if arg in ["-u", "--update"]:
+                update = True
+            elif arg.startswith("-"):
+                return None
+            else:
+                index_names.append(arg)
+        return {"target": "index", "indexes": index_names, "update": update}
+
+    return None
+
+
+def _parse_search_args(argv: List[str]) -> Optional[Dict[str, Any]]:
+
+    query: List[str] = []
+    limit = DEFAULT_SEARCH_LIMIT
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ["-l", "--limit"] or arg.startswith("--limit="):
+            if "=" in arg:
+                value = arg.split("=", maxsplit=1)[1]
+                i = i + 1
+            elif i + 1 < len(argv):
+                value = argv[i + 1]
+                i = i + 2
+            else:
+                return None
+            try:
+                limit = int(value)
+            except ValueError:
+                return None
+        elif arg.startswith("-"):
+            return None
+        else:
+            query.append(arg)
+            i = i + 1
+
+    if not query:
+        return None
+
+    return {"query": " ".join(query), "limit": limit}
+
+
+def get_console_width() -> Optional[int]:
+    """Return the width the daemon should render output with, the same the cli console would use."""
+
+    width = os.environ.get("CONSOLE_WIDTH", None)
+    if width is not None:
+        try:
+            return int(width)
+        except ValueError:
+            return None
+
+    if sys.stdout.isatty():
+        return shutil.get_terminal_size().columns
+
+    return None
+
+
+def forward_to_daemon(
+    argv: List[str], socket_path: str = BRING_DAEMON_SOCKET
+) -> Optional[int]:
+    """Let a running daemon handle a cli invocation.
+
+    Returns the exit code, or 'None' if there is no daemon running, or it can't handle the command (in which case
+    the cli should handle the command itself). Set the 'BRING_NO_DAEMON' environment variable to never use a daemon.
+    """
+
+    if os.environ.get("BRING_NO_DAEMON", None):
+        return None
+
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+
+    request = parse_cli_args(argv)
+    if request is None:
+        return None
+
+    request = dict(request, width=get_console_width())
+
+    try:
+        response = send_request(request, socket_path=socket_path)
+    except (DaemonNotAvailable, OSError, ValueError):
+        return None
+
+    output = response.get("output", None)
+    if output:
+        if not sys.stdout.isatty():
+            output = ANSI_ESCAPE_REGEX.sub("", output)
+        sys.stdout.write(output)
+        sys.stdout.flush()
+
+    error = response.get("error", None)
+    if error:
+        sys.stderr.write(f"{error}\n")
+
+    return response.get("exit_code", 1)
+
+
+def cli() -> None:
+    """Entry point of the 'bring' command."""
+
+    exit_code = forward_to_daemon(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from bring.interfaces.cli.cli import cli as bring_cli
+
+    sys.exit(bring_cli())
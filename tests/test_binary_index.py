@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+
+import pytest
+from bring.pkg_index.binary_index import (
+    BinaryIndexReader,
+    convert_index_file,
+    deserialize_binary_index,
+    is_binary_index_file,
+    serialize_binary_index,
+)
+from bring.pkg_index.static_index import BringIndexFile
+
+
+INDEX_DATA = {
+    "_bring_metadata_timestamp": "2020-06-01T00:00:00+00:00",
+    "fd": {"info": {"slug": "a find alternative"}, "aliases": {}},
+    "bat": {"info": {"slug": "a cat clone"}, "tags": ["cli"]},
+}
+
+
+def test_binary_index_roundtrip(tmp_path):
+
+    json_file = tmp_path / "index.idx.br"
+    with gzip.GzipFile(json_file, "w") as f:
+        f.write(json.dumps(INDEX_DATA).encode("utf-8"))
+
+    binary_file = tmp_path / "index.bin.idx.br"
+    convert_index_file(str(json_file), str(binary_file))
+    assert is_binary_index_file(str(binary_file))
+    assert not is_binary_index_file(str(json_file))
+
+    reader = BinaryIndexReader(str(binary_file))
+    assert sorted(reader) == ["bat", "fd"]
+    assert reader["fd"] == INDEX_DATA["fd"]
+    assert reader.metadata == {
+        "_bring_metadata_timestamp": INDEX_DATA["_bring_metadata_timestamp"]
+    }
+    reader.close()
+
+    assert deserialize_binary_index(serialize_binary_index(INDEX_DATA)) == INDEX_DATA
+
+
+@pytest.mark.anyio
+async def test_index_file_closes_reader(tmp_path):
+
+    binary_file = tmp_path / "index.bin.idx.br"
+    binary_file.write_bytes(serialize_binary_index(INDEX_DATA))
+
+    index_file = BringIndexFile(str(binary_file))
+    reader = await index_file.get_pkg_data()
+    assert isinstance(reader, BinaryIndexReader)
+
+    # reloading the index file must not leak the previous memory map
+    await index_file.update()
+    assert reader.closed
+    new_reader = await index_file.get_pkg_data()
+    assert new_reader is not reader
+    assert new_reader["fd"] == INDEX_DATA["fd"]
+
+    index_file.close()
+    assert new_reader.closed
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+from anyio import create_task_group, fail_after, sleep
+from bring.defaults import BRING_CONCURRENCY_LIMITS
+from bring.utils.concurrency import (
+    enable_process_pool,
+    get_limit,
+    limit,
+    run_cpu_bound,
+    run_limited,
+    set_limit,
+)
+
+
+@pytest.mark.anyio
+async def test_limit():
+
+    running = []
+    max_running = []
+
+    async def work():
+        running.append(1)
+        max_running.append(len(running))
+        # nested limits of the same resource class don't need another slot
+        async with limit("network"):
+            await sleep(0.01)
+        running.pop()
+
+    set_limit("network", 2)
+    try:
+        async with create_task_group() as tg:
+            for _ in range(6):
+                await tg.spawn(run_limited, "network", work)
+    finally:
+        set_limit("network", None)
+
+    assert len(max_running) == 6
+    assert max(max_running) == 2
+    # back to the default
+    assert get_limit("network") == BRING_CONCURRENCY_LIMITS["network"]
+
+
+@pytest.mark.anyio
+async def test_limit_nested_fan_out():
+
+    running = []
+    max_running = []
+
+    async def fetch():
+        running.append(1)
+        max_running.append(len(running))
+        await sleep(0.01)
+        running.pop()
+
+    async def process_pkg():
+        # holding a slot doesn't extend to the tasks spawned from here
+        async with create_task_group() as tg:
+            for _ in range(4):
+                await tg.spawn(run_limited, "network", fetch)
+
+    set_limit("network", 2)
+    try:
+        # all slots are held by tasks that wait for their children, which must not dead-lock
+        async with fail_after(5):
+            async with create_task_group() as tg:
+                for _ in range(3):
+                    await tg.spawn(run_limited, "network", process_pkg)
+    finally:
+        set_limit("network", None)
+
+    assert len(max_running) == 12
+    assert max(max_running) <= 2
+
+
+def _fail_with_pid():
+
+    raise TypeError(str(os.getpid()))
+
+
+@pytest.mark.anyio
+async def test_run_cpu_bound():
+
+    enable_process_pool()
+    try:
+        assert await run_cpu_bound(os.getpid) != os.getpid()
+        # not picklable, so run inline
+        assert await run_cpu_bound(lambda x: x * 2, 21) == 42
+        # errors raised in the worker are not a reason to run inline
+        with pytest.raises(TypeError) as e:
+            await run_cpu_bound(_fail_with_pid)
+        assert str(e.value) != str(os.getpid())
+    finally:
+        enable_process_pool(False)
+
+    assert await run_cpu_bound(os.getpid) == os.getpid()
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from bring.utils.watch import (
+    FileChange,
+    InotifyWatcher,
+    PollingWatcher,
+    merge_changes,
+)
+from bring_client import (
+    ANSI_ESCAPE_REGEX,
+    decode_message,
+    encode_message,
+    parse_cli_args,
+)
+
+
+# budget for forwarding a command to a running daemon, in seconds
+CLIENT_BUDGET = float(os.environ.get("BRING_CLIENT_BUDGET", "0.5"))
+
+CLIENT_SCRIPT = """
+import sys
+import bring_client
+
+exit_code = bring_client.forward_to_daemon(["list"])
+assert not [m for m in sys.modules if m == "bring" or m.startswith("bring.")]
+sys.exit(exit_code)
+"""
+
+
+def test_parse_cli_args():
+
+    assert parse_cli_args(["list"]) == {
+        "command": "list",
+        "args": {"index": None},
+        "config": [],
+    }
+    assert parse_cli_args(["-c", "prof", "--index=x", "list", "binaries"]) == {
+        "command": "list",
+        "args": {"index": "binaries"},
+        "config": ["prof", {"indexes": ["x"]}],
+    }
+
+    assert parse_cli_args(["x", "pkg", "fd"]) == {
+        "command": "explain",
+        "args": {"target": "package", "package": "fd"},
+        "config": [],
+    }
+    assert parse_cli_args(["explain", "index", "-u", "binaries"]) == {
+        "command": "explain",
+        "args": {"target": "index", "indexes": ["binaries"], "update": True},
+        "config": [],
+    }
+    assert parse_cli_args(["search", "file", "finder", "--limit=5"]) == {
+        "command": "search",
+        "args": {"query": "file finder", "limit": 5},
+        "config": [],
+    }
+
+    assert parse_cli_args(["install", "fd"]) is None
+    assert parse_cli_args(["list", "--help"]) is None
+    assert parse_cli_args(["explain", "package", "my.pkg.br"]) is None
+    assert parse_cli_args(["explain", "target"]) is None
+    assert parse_cli_args(["search", "fd", "--json"]) is None
+    assert parse_cli_args(["search", "-l", "x", "fd"]) is None
+    assert parse_cli_args(["--output", "x", "list"]) is None
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires unix sockets")
+def test_forward_to_daemon(tmp_path):
+
+    socket_path = str(tmp_path / "daemon.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(1)
+
+    requests = []
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            requests.append(decode_message(conn.makefile("rb").readline()))
+            conn.sendall(encode_message({"exit_code": 3, "output": "pkgs\n"}))
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+
+    env = dict(os.environ)
+    env["BRING_DAEMON_SOCKET"] = socket_path
+    env.pop("BRING_NO_DAEMON", None)
+    env.pop("CONSOLE_WIDTH", None)
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", CLIENT_SCRIPT],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    duration = time.perf_counter() - start
+    thread.join(timeout=5)
+    server.close()
+
+    assert proc.returncode == 3, proc.stderr.decode("utf-8", errors="replace")
+    assert proc.stdout == b"pkgs\n"
+    assert requests == [
+        {"command": "list", "args": {"index": None}, "config": [], "width": None}
+    ]
+    assert (
+        duration < CLIENT_BUDGET
+    ), f"forwarding to the daemon took {duration:.2f}s (budget: {CLIENT_BUDGET}s)"
+
+
+class _FakeBringConfigInput(object):
+    def set_config(self, *config):
+        pass
+
+
+class _FakeBring(object):
+    index_ids = ["binaries"]
+    config = _FakeBringConfigInput()
+
+    async def add_all_config_indexes(self):
+        pass
+
+    async def get_indexes(self):
+        return {}
+
+
+class _FakeBringConfig(object):
+    def get_bring(self):
+        return _FakeBring()
+
+
+@pytest.mark.anyio
+async def test_handle_request(tmp_path, monkeypatch):
+
+    from bring.daemon.server import BringDaemon
+
+    daemon = BringDaemon(
+        bring_config=_FakeBringConfig(),  # type: ignore
+        socket_path=str(tmp_path / "daemon.sock"),
+    )
+    daemon.start()
+
+    response = await daemon.handle_request({"command": "ping"})
+    assert response == {"exit_code": 0, "output": "pong\n"}
+
+    response = await daemon.handle_request({"command": "install"})
+    assert response["exit_code"] == 2
+    assert "install" in response["error"]
+
+    response = await daemon.handle_request({"command": "status"})
+    assert response["exit_code"] == 0
+    assert response["status"]["pid"] == os.getpid()
+    assert response["status"]["indexes"] == ["binaries"]
+
+    async def print_search_results(console, bring, query, limit=25):
+        console.print(f"{query}: {limit}")
+
+    monkeypatch.setattr(
+        "bring.daemon.server.print_search_results", print_search_results
+    )
+    response = await daemon.handle_request(
+        {"command": "search", "args": {"query": "fd", "limit": 3}, "width": 40}
+    )
+    assert response["exit_code"] == 0
+    assert ANSI_ESCAPE_REGEX.sub("", response["output"]) == "fd: 3\n"
+
+    response = await daemon.handle_request({"command": "shutdown"})
+    assert response["exit_code"] == 0
+    assert daemon._shutdown.is_set()  # type: ignore
+
+
+def test_polling_watcher(tmp_path):
+
+    (tmp_path / "a.bring").write_text("a")
+    watcher = PollingWatcher([str(tmp_path)])
+    assert watcher.check() == []
+
+    (tmp_path / "a.bring").write_text("changed")
+    (tmp_path / "b.bring").write_text("b")
+    changes = {c.path.rsplit("/", 1)[-1]: c.change_type for c in watcher.check()}
+    assert changes == {"a.bring": "changed", "b.bring": "added"}
+
+    (tmp_path / "a.bring").unlink()
+    changes = {c.path.rsplit("/", 1)[-1]: c.change_type for c in watcher.check()}
+    assert changes == {"a.bring": "deleted"}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="requires inotify")
+def test_inotify_watcher(tmp_path):
+
+    (tmp_path / "a.bring").write_text("a")
+    watcher = InotifyWatcher([str(tmp_path)])
+    assert watcher.check() == []
+
+    (tmp_path / "a.bring").write_text("changed")
+    (tmp_path / "b.bring").write_text("b")
+    (tmp_path / "c.bring").write_text("c")
+    (tmp_path / "c.bring").unlink()
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "d.bring").write_text("d")
+    changes = {c.path.rsplit("/", 1)[-1]: c.change_type for c in watcher.check()}
+    assert changes == {"a.bring": "changed", "b.bring": "added", "d.bring": "added"}
+
+    watcher.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="requires inotify")
+def test_inotify_watcher_folder_removed(tmp_path):
+
+    watched = tmp_path / "watched"
+    (watched / "sub" / "nested").mkdir(parents=True)
+    (watched / "sub" / "nested" / "a.bring").write_text("a")
+    (watched / "other").mkdir()
+    watcher = InotifyWatcher([str(watched)])
+
+    # a moved folder means a re-sync of the watched path, and its watches are dropped
+    os.rename(str(watched / "sub"), str(tmp_path / "moved"))
+    changes = [(c.path, c.change_type) for c in watcher.check()]
+    assert changes == [(str(watched), "changed")]
+    assert not [f for f in watcher._wds.keys() if "sub" in f]
+
+    (tmp_path / "moved" / "nested" / "a.bring").write_text("changed")
+    assert watcher.check() == []
+
+    os.rmdir(str(watched / "other"))
+    changes = [(c.path, c.change_type) for c in watcher.check()]
+    assert changes == [(str(watched), "changed")]
+    assert sorted(watcher._wds.keys()) == [str(watched)]
+
+    watcher.close()
+
+
+def test_merge_changes():
+
+    changes = [
+        FileChange("/x/a", "added", "/x"),
+        FileChange("/x/a", "changed", "/x"),
+        FileChange("/x/b", "deleted", "/x"),
+        FileChange("/x/b", "added", "/x"),
+        FileChange("/x/c", "added", "/x"),
+        FileChange("/x/c", "deleted", "/x"),
+    ]
+    merged = {c.path: c.change_type for c in merge_changes(changes)}
+    assert merged == {"/x/a": "added", "/x/b": "changed"}
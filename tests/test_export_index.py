@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+import arrow
+from bring.pkg_index.index import metadata_is_fresh
+
+
+def test_metadata_is_fresh():
+
+    now = str(arrow.utcnow())
+    old = str(arrow.utcnow().shift(days=-2))
+
+    assert metadata_is_fresh({"metadata": {"metadata_timestamp": now}}, 3600)
+    assert not metadata_is_fresh({"metadata": {"metadata_timestamp": old}}, 3600)
+    assert metadata_is_fresh({"metadata": {"metadata_timestamp": old}}, -1)
+    assert not metadata_is_fresh({"metadata": {}}, 3600)
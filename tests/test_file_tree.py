@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import stat
+
+import pytest
+from bring.mogrify.file_tree import FileTreePlan
+from bring.utils.paths import copy_filtered_files, find_matches, flatten_folder
+
+
+def _create_tree(base):
+
+    source = base / "source"
+    for rel_path in ["bin/tool", "bin/helper", "docs/readme.md", "share/x.so"]:
+        path = source / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel_path)
+    (source / "empty").mkdir()
+
+    # symlinked folder, pointing outside of the tree
+    outside = base / "outside"
+    (outside / "lib").mkdir(parents=True)
+    (outside / "lib" / "y.so").write_text("y.so")
+    os.symlink(str(outside), str(source / "linked"))
+
+    return str(source)
+
+
+def _run_unfused(steps, source, base):
+    """Run the steps the way the individual mogrifiers do."""
+
+    path = source
+    for i, step in enumerate(steps):
+        step_type = step["type"]
+        if step_type == "file_filter":
+            target = str(base / f"step_{i}")
+            copy_filtered_files(
+                orig=path,
+                include=step["include"],
+                target=target,
+                move_files=True,
+                flatten=step.get("flatten", False),
+            )
+            path = target
+        elif step_type == "flatten":
+            target = str(base / f"step_{i}")
+            os.makedirs(target)
+            flatten_folder(path, target, strategy=step.get("duplicate", "ignore"))
+            path = target
+        elif step_type == "set_mode":
+            for m in find_matches(
+                path, step.get("include", None), output_absolute_paths=True
+            ):
+                st = os.stat(m)
+                os.chmod(m, st.st_mode | stat.S_IEXEC | stat.S_IXGRP | stat.S_IXOTH)
+        elif step_type == "rename":
+            for s, t in step["rename_map"].items():
+                shutil.move(os.path.join(path, s), os.path.join(path, t))
+
+    return path
+
+
+def _list_tree(path):
+
+    result = {}
+    for root, dirs, files in os.walk(path):
+        for f in files:
+            full_path = os.path.join(root, f)
+            with open(full_path) as fh:
+                content = fh.read()
+            executable = bool(os.stat(full_path).st_mode & stat.S_IEXEC)
+            result[os.path.relpath(full_path, path)] = (content, executable)
+
+    return result
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [
+            {"type": "rename", "rename_map": {"docs": "bin", "empty": "renamed"}},
+            {"type": "file_filter", "include": ["*"]},
+            {"type": "set_mode", "set_executable": True, "include": ["bin/*"]},
+        ],
+        [
+            {"type": "file_filter", "include": ["*.so", "tool"], "flatten": True},
+            {"type": "set_mode", "set_executable": True},
+            {"type": "rename", "rename_map": {"x.so": "lib.so", "y.so": "tool"}},
+        ],
+        [
+            {"type": "flatten"},
+            {"type": "rename", "rename_map": {"readme.md": "README"}},
+        ],
+    ],
+)
+def test_file_tree_plan_matches_unfused(tmp_path, steps):
+
+    fused_base = tmp_path / "fused"
+    source = _create_tree(fused_base)
+    target = str(fused_base / "target")
+    FileTreePlan(steps).execute(source=source, target=target)
+
+    unfused_base = tmp_path / "unfused"
+    source = _create_tree(unfused_base)
+    unfused_target = _run_unfused(steps, source, unfused_base)
+
+    assert _list_tree(target) == _list_tree(unfused_target)
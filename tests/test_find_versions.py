@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+import pickle
+from datetime import datetime
+
+import pytest
+from bring.pkg_types import (
+    PkgMetadata,
+    PkgVersion,
+    PkgVersionList,
+    PkgVersionMatrix,
+)
+from bring.utils import find_version, find_versions
+from frkl.common.exceptions import FrklException
+
+
+def create_metadata() -> PkgMetadata:
+
+    versions = []
+    for version in ["1.1.0", "1.0.0"]:
+        for os in ["linux", "darwin"]:
+            for arch in ["x86_64", "aarch64"]:
+                versions.append(
+                    PkgVersion(
+                        steps=[], vars={"version": version, "os": os, "arch": arch}
+                    )
+                )
+    versions.append(PkgVersion(steps=[], vars={"version": "0.9.0", "os": "linux"}))
+
+    return PkgMetadata(
+        source_details={},
+        versions=versions,
+        vars={"version_vars": {}, "mogrify_vars": {}},
+        metadata_timestamp=datetime.now(),
+    )
+
+
+def test_find_versions():
+
+    metadata = create_metadata()
+
+    matches = find_versions(
+        {"os": "linux", "arch": "x86_64"}, metadata, var_aliases_replaced=True
+    )
+    assert [(m[0].vars["version"], m[1]) for m in matches] == [
+        ("1.1.0", 2),
+        ("1.0.0", 2),
+        ("0.9.0", 1),
+    ]
+
+    matches = find_versions(
+        {"version": ["1.0.0", "0.9.0"], "os": "linux", "arch": None, "other": "x"},
+        metadata,
+        var_aliases_replaced=True,
+    )
+    assert [m[0].vars["version"] for m in matches] == ["1.0.0", "1.0.0", "0.9.0"]
+
+    version = find_version(
+        {"version": "0.9.0", "os": "linux", "arch": "x86_64"},
+        metadata,
+        var_aliases_replaced=True,
+    )
+    assert version.vars == {"version": "0.9.0", "os": "linux"}
+    assert metadata.version_index.get_values("os") == ["linux", "darwin"]
+
+
+def test_version_list():
+
+    versions = [
+        PkgVersion(
+            steps=[{"type": "download", "url": "https://x.org/a-1.0.tar.gz"}],
+            vars={"version": "1.0", "os": "linux"},
+            metadata={"size": 10},
+        ),
+        PkgVersion(steps=[], vars={"os": "linux", "version": "0.9", "extra": [1]}),
+    ]
+    version_list = pickle.loads(pickle.dumps(PkgVersionList(versions)))
+
+    assert len(version_list) == 2
+    assert [v.to_dict() for v in version_list] == [v.to_dict() for v in versions]
+    assert list(version_list[1].vars.keys()) == ["os", "version", "extra"]
+    assert version_list[-1].metadata == {}
+
+
+def test_metadata_split(tmp_path):
+
+    metadata = create_metadata()
+    header, body = metadata.split()
+
+    versions_file = tmp_path / "metadata.versions"
+    versions_file.write_bytes(body)
+
+    header = pickle.loads(pickle.dumps(header))
+    assert not header.versions_loaded
+    assert header.version_count == 9
+    assert PkgMetadata.read_versions_token(str(versions_file)) == header.versions_token
+    header.set_versions_file(str(versions_file))
+
+    assert find_version({"version": "0.9.0"}, header, var_aliases_replaced=True)
+    assert header.versions_loaded
+    assert [v.to_dict() for v in header.versions] == [
+        v.to_dict() for v in metadata.versions
+    ]
+
+    # a body from another split doesn't belong to the header
+    stale_header = pickle.loads(pickle.dumps(metadata.split()[0]))
+    assert stale_header.versions_token != header.versions_token
+    assert PkgMetadata.read_versions_token(str(versions_file)) != (
+        stale_header.versions_token
+    )
+    stale_header.set_versions_file(str(versions_file))
+    with pytest.raises(FrklException):
+        stale_header.versions
+
+
+def test_version_matrix():
+
+    matrix = PkgVersionMatrix(
+        template_vars={
+            "version": ["1.1.0", "1.0.0"],
+            "os": ["linux", "darwin"],
+            "arch": ["x86_64", "aarch64"],
+        },
+        url="https://x.org/{{ version }}/tool-{{ os }}-{{ arch }}.tar.gz",
+    )
+    matrix.set_missing([0])
+    metadata = PkgMetadata(
+        source_details={},
+        versions=matrix,
+        vars={"version_vars": {}, "mogrify_vars": {}},
+        metadata_timestamp=datetime.now(),
+    )
+    metadata.set_version_finalizer(lambda v: v)
+
+    # missing combinations are not part of the sequence
+    assert len(metadata.versions) == 7
+    assert len(list(metadata.versions)) == 7
+    assert len(find_versions({}, metadata, var_aliases_replaced=True)) == 7
+    assert metadata.versions[1].vars == {
+        "version": "1.1.0",
+        "os": "darwin",
+        "arch": "x86_64",
+    }
+    assert [v.vars for v in metadata.versions[-2:]] == list(matrix.iter_vars())[-2:]
+
+    version = find_version(
+        {"os": "linux", "arch": "aarch64", "version": "1.0.0"},
+        metadata,
+        var_aliases_replaced=True,
+    )
+    assert version.metadata["url"] == "https://x.org/1.0.0/tool-linux-aarch64.tar.gz"
+    # missing combination
+    version = find_version({"os": "linux"}, metadata, var_aliases_replaced=True)
+    assert version.vars["arch"] == "aarch64"
+
+    # positions returned by 'find' are positions in the sequence
+    for pos, _ in matrix.find({"os": "darwin"}):
+        assert metadata.versions[pos].vars["os"] == "darwin"
+
+    # values that only appear in missing combinations are not allowed
+    matrix.set_missing([0, 1, 4, 5])
+    assert matrix.get_values("os") == ["darwin"]
+    assert matrix.get_values("version") == ["1.1.0", "1.0.0"]
+    assert [v["os"] for v in matrix.iter_vars()] == ["darwin"] * 4
+    assert matrix.combination_count == 8
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from bring.utils.hashing import hash_content, hash_content_memoized
+
+
+def test_hash_content_memoized():
+
+    source = {"type": "github_release", "user_name": "sharkdp", "repo_name": "fd"}
+
+    digest = hash_content_memoized(source)
+    assert digest == hash_content(source)
+    assert hash_content_memoized(source) == digest
+    # key order doesn't matter
+    assert hash_content_memoized(dict(reversed(list(source.items())))) == digest
+
+    # changed objects are hashed again
+    source["repo_name"] = "bat"
+    assert hash_content_memoized(source) == hash_content(source) != digest
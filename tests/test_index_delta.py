@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+from bring.pkg_index.delta import (
+    INDEX_DELTAS_SUFFIX,
+    INDEX_MANIFEST_SUFFIX,
+    apply_index_delta,
+    create_index_delta,
+    create_index_manifest,
+    write_index_deltas,
+)
+
+
+OLD_INDEX = {
+    "_bring_metadata_timestamp": "2020-06-01T00:00:00+00:00",
+    "fd": {"info": {"slug": "a find alternative"}},
+    "bat": {"info": {"slug": "a cat clone"}},
+    "exa": {"info": {"slug": "a ls replacement"}},
+}
+
+NEW_INDEX = {
+    "_bring_metadata_timestamp": "2020-06-02T00:00:00+00:00",
+    "fd": {"info": {"slug": "a find alternative"}},
+    "bat": {"info": {"slug": "a cat clone with wings"}},
+    "rg": {"info": {"slug": "ripgrep"}},
+}
+
+
+def test_index_delta():
+
+    old_manifest = create_index_manifest(OLD_INDEX)
+    new_manifest = create_index_manifest(NEW_INDEX)
+    assert old_manifest["version"] != new_manifest["version"]
+
+    delta = create_index_delta(old_manifest, new_manifest, NEW_INDEX)
+    assert sorted(delta["changed"].keys()) == ["bat", "rg"]
+    assert delta["removed"] == ["exa"]
+
+    assert apply_index_delta(dict(OLD_INDEX), delta) == NEW_INDEX
+
+
+def test_write_index_deltas(tmp_path):
+
+    index_file = str(tmp_path / "this.idx.br")
+
+    write_index_deltas(index_file, OLD_INDEX)
+    manifest = write_index_deltas(index_file, NEW_INDEX, old_index_data=OLD_INDEX)
+
+    old_version = create_index_manifest(OLD_INDEX)["version"]
+    assert manifest["history"] == [old_version]
+    assert os.path.exists(
+        os.path.join(f"{index_file}{INDEX_DELTAS_SUFFIX}", f"{old_version}.json.gz")
+    )
+    with open(f"{index_file}{INDEX_MANIFEST_SUFFIX}") as f:
+        assert json.load(f)["version"] == manifest["version"]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from bring.pkg_index.utils import diff_version_lists
+
+
+def test_diff_version_lists():
+
+    v1 = {"vars": {"version": "1.0.0", "arch": "x86_64"}, "steps": [], "metadata": {}}
+    v2 = {"vars": {"version": "1.1.0", "arch": "x86_64"}, "steps": [], "metadata": {}}
+    v3 = {"vars": {"version": "1.2.0", "arch": "x86_64"}, "steps": [], "metadata": {}}
+
+    assert diff_version_lists([v1, v2], [dict(v2), dict(v1)]) == {}
+
+    # key order doesn't matter
+    v1_reordered = {
+        "metadata": {},
+        "steps": [],
+        "vars": {"arch": "x86_64", "version": "1.0.0"},
+    }
+    assert diff_version_lists([v1], [v1_reordered]) == {}
+
+    diff = diff_version_lists([v1, v2], [v2, v3])
+    assert diff == {"added": [v3], "removed": [v1]}
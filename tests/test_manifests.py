@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import os
+
+from bring.pkg_index.manifests import ManifestCache, find_manifests
+
+
+def test_manifest_cache(tmp_path):
+
+    index_folder = tmp_path / "index"
+    (index_folder / "sub").mkdir(parents=True)
+    (index_folder / "fd.bring").write_text("source:\n  type: github-release\n")
+    (index_folder / "sub" / "bat.bring").write_text("source:\n  type: git-repo\n")
+    (index_folder / "README.md").write_text("not a package")
+
+    manifests = find_manifests(str(index_folder))
+    assert sorted(manifests.keys()) == ["bat", "fd"]
+
+    cache_file = str(tmp_path / "cache.pickle.z")
+    cache = ManifestCache(str(index_folder), cache_file=cache_file)
+    fd_hash, fd_content = cache.get_manifest(manifests["fd"])
+    assert fd_content == {"source": {"type": "github-release"}}
+    cache.get_manifest(manifests["bat"])
+    cache.save()
+    assert os.path.exists(cache_file)
+
+    copy = ManifestCache(str(index_folder), cache_file=cache_file)
+    assert copy.get_manifest(manifests["fd"]) == (fd_hash, fd_content)
+
+    (index_folder / "fd.bring").write_text("source:\n  type: template-url\n")
+    new_hash, new_content = copy.get_manifest(manifests["fd"])
+    assert new_hash != fd_hash
+    assert new_content == {"source": {"type": "template-url"}}
+
+    copy.prune([manifests["fd"]])
+    copy.save()
+    pruned = ManifestCache(str(index_folder), cache_file=cache_file)
+    assert list(pruned._get_entries().keys()) == ["fd.bring"]
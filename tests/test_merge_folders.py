@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+from bring.utils.paths import merge_folders
+
+
+def _create_tree(path, files):
+
+    for rel_path, content in files.items():
+        full_path = path / rel_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content)
+
+
+def test_merge_folders(tmp_path):
+
+    source_a = tmp_path / "a"
+    source_b = tmp_path / "b"
+    _create_tree(source_a, {"one": "a", "sub/two": "a"})
+    _create_tree(source_b, {"one": "b", "three": "b"})
+
+    target = tmp_path / "target"
+    merged = merge_folders(str(target), str(source_a), str(source_b))
+
+    # first source wins by default
+    assert (target / "one").read_text() == "a"
+    assert (target / "sub" / "two").read_text() == "a"
+    assert (target / "three").read_text() == "b"
+    assert merged == {
+        "one": str(source_a),
+        os.path.join("sub", "two"): str(source_a),
+        "three": str(source_b),
+    }
+
+    # default move method is 'move'
+    assert not (source_a / "one").exists()
+    assert (source_b / "one").exists()
+
+
+def test_merge_folders_overwrite_copy(tmp_path):
+
+    source_a = tmp_path / "a"
+    source_b = tmp_path / "b"
+    _create_tree(source_a, {"one": "a", "two": "a"})
+    _create_tree(source_b, {"one": "b"})
+
+    target = tmp_path / "target"
+    merged = merge_folders(
+        str(target), str(source_a), str(source_b), move_method="copy", overwrite=True
+    )
+
+    # last source wins when overwriting
+    assert (target / "one").read_text() == "b"
+    assert (target / "two").read_text() == "a"
+    assert merged["one"] == str(source_b)
+
+    # sources are left alone when copying
+    assert (source_a / "one").read_text() == "a"
+    assert (source_b / "one").read_text() == "b"
+
+    with pytest.raises(ValueError):
+        merge_folders(str(target), str(source_a), move_method="link")
+
+
+def test_merge_folders_overwrite_folder(tmp_path):
+
+    source_a = tmp_path / "a"
+    source_b = tmp_path / "b"
+    _create_tree(source_a, {"one/two": "a"})
+    _create_tree(source_b, {"one": "b", "three": "b"})
+
+    target = tmp_path / "target"
+    merged = merge_folders(str(target), str(source_a), str(source_b), overwrite=True)
+
+    # a folder from an earlier source is not replaced by a file
+    assert (target / "one" / "two").read_text() == "a"
+    assert (target / "three").read_text() == "b"
+    assert "one" not in merged.keys()
+
+
+class _FakeMogrifier(object):
+    def __init__(self, requires, user_input=None):
+        self._requires = requires
+        self.user_input = dict(user_input or {})
+        self.input = None
+
+    def requires(self):
+        return self._requires
+
+    def set_input(self, **input_vals):
+        self.input = input_vals
+
+
+class _FakeTransmogrificator(object):
+    def __init__(self, working_dir, first_mogrifier):
+        self.working_dir = working_dir
+        self.first_mogrifier = first_mogrifier
+
+
+@pytest.mark.anyio
+async def test_parallel_branches_get_upstream_folder(tmp_path):
+
+    from bring.mogrify.parallel_pkg_merge import ParallelPkgMergeMogrifier
+
+    upstream = tmp_path / "upstream"
+    _create_tree(upstream, {"bin/tool": "x"})
+
+    mogs = [
+        _FakeMogrifier({"folder_path": "string", "include": "list"}),
+        _FakeMogrifier({"folder_path": "string"}, user_input={"folder_path": "/x"}),
+        _FakeMogrifier({"url": "string"}),
+        _FakeMogrifier({"folder_path": "string"}),
+    ]
+    tms = []
+    for i, m in enumerate(mogs):
+        working_dir = tmp_path / f"branch_{i}"
+        working_dir.mkdir()
+        tms.append(_FakeTransmogrificator(str(working_dir), m))
+
+    merge = ParallelPkgMergeMogrifier.__new__(ParallelPkgMergeMogrifier)
+    merge._mogrificators = tms
+    await merge._connect_upstream(pipeline_id="p", folder_path=str(upstream))
+
+    # every branch but the last works on its own copy
+    folder = mogs[0].input["folder_path"]
+    assert folder != str(upstream)
+    assert os.path.isfile(os.path.join(folder, "bin", "tool"))
+
+    # explicitly configured inputs are not overwritten
+    assert mogs[1].input is None
+    # steps that don't take a folder are left alone
+    assert mogs[2].input is None
+
+    assert mogs[3].input == {"folder_path": str(upstream)}
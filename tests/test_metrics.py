@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+from bring.utils.concurrency import enable_process_pool, run_cpu_bound
+from bring.utils.metrics import METRICS, MetricsRegistry
+
+
+def _create_registry() -> MetricsRegistry:
+
+    registry = MetricsRegistry()
+    registry.describe("requests_total", "Requests, by result.")
+    registry.inc("requests_total", result="hit")
+    registry.inc("requests_total", 2, result="hit")
+    registry.inc("requests_total", result='m"iss')
+    registry.set_gauge("remaining", 42, service="github")
+    registry.observe("duration_seconds", 0.3, step_type="download")
+    registry.observe("duration_seconds", 7, step_type="download")
+
+    return registry
+
+
+def test_metrics_to_dict():
+
+    data = _create_registry().to_dict()
+
+    assert {"labels": {"result": "hit"}, "value": 3} in data["counters"][
+        "requests_total"
+    ]
+    assert data["gauges"]["remaining"] == [
+        {"labels": {"service": "github"}, "value": 42}
+    ]
+    hist = data["histograms"]["duration_seconds"][0]["value"]
+    assert hist["count"] == 2
+    assert hist["sum"] == pytest.approx(7.3)
+    assert hist["buckets"]["0.25"] == 0
+    assert hist["buckets"]["0.5"] == 1
+    assert hist["buckets"]["10.0"] == 2
+
+
+def test_metrics_to_prometheus():
+
+    lines = _create_registry().to_prometheus().splitlines()
+
+    assert "# HELP requests_total Requests, by result." in lines
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{result="hit"} 3' in lines
+    assert 'requests_total{result="m\\"iss"} 1' in lines
+    assert "# TYPE remaining gauge" in lines
+    assert 'remaining{service="github"} 42' in lines
+    assert "# TYPE duration_seconds histogram" in lines
+    assert 'duration_seconds_bucket{step_type="download",le="0.5"} 1' in lines
+    assert 'duration_seconds_bucket{step_type="download",le="+Inf"} 2' in lines
+    assert 'duration_seconds_count{step_type="download"} 2' in lines
+
+
+def test_metrics_write(tmp_path):
+
+    registry = _create_registry()
+
+    json_file = tmp_path / "metrics.json"
+    registry.write(str(json_file))
+    assert "requests_total" in json.loads(json_file.read_text())["counters"]
+
+    prom_file = tmp_path / "metrics.prom"
+    registry.write(str(prom_file))
+    assert prom_file.read_text() == registry.to_prometheus()
+
+    registry.write(str(json_file), metrics_format="prometheus")
+    assert json_file.read_text() == registry.to_prometheus()
+
+    with pytest.raises(ValueError):
+        registry.write(str(json_file), metrics_format="xml")
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "metrics.json",
+        "metrics.prom",
+    ]
+
+
+def test_metrics_merge_values():
+
+    registry = _create_registry()
+    registry.merge_values(_create_registry().export_values())
+
+    assert registry.get_counter("requests_total", result="hit") == 6
+    hist = registry.to_dict()["histograms"]["duration_seconds"][0]["value"]
+    assert hist["count"] == 4
+
+
+def _count_in_worker(amount: int) -> int:
+
+    METRICS.inc("worker_items_total", amount)
+    return amount
+
+
+@pytest.mark.anyio
+async def test_metrics_from_process_pool():
+
+    METRICS.clear()
+    enable_process_pool()
+    try:
+        assert await run_cpu_bound(_count_in_worker, 3) == 3
+        assert await run_cpu_bound(_count_in_worker, 4) == 4
+    finally:
+        enable_process_pool(False)
+
+    assert METRICS.get_counter("worker_items_total") == 7
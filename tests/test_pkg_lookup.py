@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from bring.pkg_index.lookup import PkgIndexLookup, calculate_index_fingerprint
+
+
+def test_pkg_lookup(tmp_path):
+
+    lookup_file = str(tmp_path / "index_lookup.json")
+
+    lookup = PkgIndexLookup(lookup_file=lookup_file)
+    lookup.set_index_pkgs("binaries", ["fd", "bat"], fingerprint="abc")
+    lookup.set_index_pkgs("collections", ["fd", "k3d"], fingerprint=None)
+
+    assert lookup.get_index_ids("fd") == ["binaries", "collections"]
+    assert lookup.get_index_ids("fd", index_ids=["collections", "binaries"]) == [
+        "collections",
+        "binaries",
+    ]
+    lookup.save()
+
+    # only entries with a fingerprint are persisted
+    copy = PkgIndexLookup(lookup_file=lookup_file)
+    assert copy.is_current("binaries", "abc")
+    assert not copy.is_current("binaries", "def")
+    assert copy.get_index_ids("k3d") == []
+
+    copy.invalidate_index("binaries")
+    assert copy.get_index_ids("fd") == []
+
+
+def test_pkg_lookup_aliases():
+
+    lookup = PkgIndexLookup(lookup_file=None)
+    lookup.set_index_pkgs("gitlab.bring-indexes.binaries", ["fd"], fingerprint=None)
+    lookup.set_index_pkgs("collections", ["fd"], fingerprint=None)
+
+    aliases = {"binaries": "gitlab.bring-indexes.binaries"}
+    assert lookup.get_index_ids("gitlab.bring-indexes.binaries.fd") == [
+        "gitlab.bring-indexes.binaries"
+    ]
+    assert lookup.get_index_ids("collections.fd") == ["collections"]
+    assert lookup.get_index_ids("binaries.fd") == []
+    assert lookup.get_index_ids("binaries.fd", aliases=aliases) == [
+        "gitlab.bring-indexes.binaries"
+    ]
+    assert lookup.get_index_ids("binaries.bat", aliases=aliases) == []
+
+
+def test_folder_index_fingerprint(tmp_path):
+
+    index_config = {"type": "folder", "path": str(tmp_path)}
+    fingerprint = calculate_index_fingerprint(index_config)
+    assert fingerprint == calculate_index_fingerprint(index_config)
+
+    (tmp_path / "sub").mkdir()
+    assert calculate_index_fingerprint(index_config) != fingerprint
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from bring.utils.plugins import generate_plugin_manifest, load_plugin_manifest
+
+
+def test_plugin_manifest_up_to_date():
+
+    # if this fails, re-generate the manifest with: python -m bring.utils.plugins
+    assert generate_plugin_manifest() == load_plugin_manifest()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import pytest
+from anyio import create_task_group
+from bring.utils.metrics import METRICS
+from bring.utils.profiling import (
+    ProfileSummary,
+    collect_step_profiles,
+    profile_step,
+    record_step_value,
+)
+
+
+def test_profile_step():
+
+    summary = ProfileSummary()
+
+    with collect_step_profiles(summary):
+        with profile_step("outer", "file_tree", pipeline_id="p") as outer:
+            record_step_value("files_touched", 3)
+            with profile_step("inner", "download") as inner:
+                record_step_value("network_bytes", 10)
+                record_step_value("retries")
+
+    # not collected anymore, and recording outside of a step does nothing
+    with profile_step("other", "file_tree"):
+        pass
+    record_step_value("files_touched")
+
+    assert [p.step_id for p in summary.profiles] == ["inner", "outer"]
+    assert inner.parent is outer
+    assert outer.files_touched == 3
+    assert inner.network_bytes == 10
+    assert inner.to_dict()["values"] == {"retries": 1}
+
+    totals = summary.get_totals_by_type()
+    assert list(totals.keys()) == ["file_tree"]
+    assert totals["file_tree"]["files_touched"] == 3
+
+
+@pytest.mark.anyio
+async def test_collect_step_profiles_in_tasks():
+
+    METRICS.clear()
+
+    async def step(step_id: str):
+        with profile_step(step_id, "download"):
+            record_step_value("network_bytes", 5)
+
+    summary = ProfileSummary()
+    with collect_step_profiles(summary):
+        async with create_task_group() as tg:
+            for i in range(3):
+                await tg.spawn(step, f"step_{i}")
+
+    assert sorted(p.step_id for p in summary.profiles) == [
+        "step_0",
+        "step_1",
+        "step_2",
+    ]
+    # all step profiles end up in the metrics, whether collected or not
+    assert METRICS.get_counter("bring_downloaded_bytes_total") == 15
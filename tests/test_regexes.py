@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from bring.pkg_types.github_release import DEFAULT_URL_REGEXES
+from bring.utils.regexes import get_matcher
+
+
+def test_url_matcher():
+
+    matcher = get_matcher(DEFAULT_URL_REGEXES)
+    assert get_matcher(list(DEFAULT_URL_REGEXES)) is matcher
+
+    assert matcher.match(
+        "https://github.com/sharkdp/fd/releases/download/v8.1.1/fd-v8.1.1-x86_64-unknown-linux-gnu.tar.gz"
+    ) == {"version": "8.1.1", "arch": "x86_64", "os": "unknown-linux-gnu"}
+    # matched by the last regex only
+    assert matcher.match(
+        "https://github.com/rancher/k3d/releases/download/v3.0.0/k3d-linux-amd64"
+    ) == {"version": "3.0.0", "arch": "linux", "os": "amd64"}
+    assert matcher.match("https://github.com/a/b/releases/download/v1.2/b.deb") is None
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import pytest
+from bring.pkg_index.search import PkgSearchIndex, search_pkgs
+
+
+def create_search_index() -> PkgSearchIndex:
+
+    search_index = PkgSearchIndex(index_id="binaries")
+    search_index.add_pkg(
+        "fd",
+        info={"slug": "A simple, fast and user-friendly alternative to 'find'."},
+        labels={"language": "rust"},
+        tags=["cli", "search"],
+    )
+    search_index.add_pkg(
+        "ripgrep",
+        info={"slug": "Recursively search directories for a regex pattern."},
+        labels={"language": "rust"},
+        tags=["cli", "search"],
+    )
+    search_index.add_pkg(
+        "k3d",
+        info={"slug": "Little helper to run k3s in docker."},
+        labels={"language": "go"},
+        tags=["kubernetes"],
+    )
+    return search_index
+
+
+def test_search():
+
+    search_index = create_search_index()
+
+    results = search_pkgs([search_index], "search")
+    assert sorted(r.pkg_name for r in results) == ["fd", "ripgrep"]
+    # exact package name matches come first
+    assert search_pkgs([search_index], "fd")[0].pkg_name == "fd"
+
+    # prefix
+    assert [r.pkg_name for r in search_pkgs([search_index], "kube")] == ["k3d"]
+    # fuzzy
+    assert [r.pkg_name for r in search_pkgs([search_index], "dokcer")] == ["k3d"]
+
+    # facets
+    results = search_pkgs([search_index], "search label:language=rust tag:cli")
+    assert sorted(r.pkg_name for r in results) == ["fd", "ripgrep"]
+    results = search_pkgs([search_index], "label:language=go")
+    assert [r.full_name for r in results] == ["binaries.k3d"]
+    assert search_pkgs([search_index], "fd index:other") == []
+
+
+def test_search_index_serialization():
+
+    search_index = create_search_index()
+    copy = PkgSearchIndex.from_dict(search_index.to_dict())
+
+    assert [r.pkg_name for r in search_pkgs([copy], "regex")] == ["ripgrep"]
+
+
+class _FakeIndex(object):
+    def __init__(self, content_hash: str, timestamp: str):
+
+        self.id = "fake"
+        self.content_hash = content_hash
+        self.timestamp = timestamp
+
+    async def get_content_hash(self):
+        return self.content_hash
+
+    async def get_metadata_timestamp(self):
+        return self.timestamp
+
+    async def get_pkgs(self):
+        return {"fd": None}
+
+
+@pytest.mark.anyio
+async def test_search_index_cache(tmp_path, monkeypatch):
+
+    from bring.pkg_index import search
+
+    builds = []
+
+    async def get_values_for_pkgs(pkgs, *value_names, **kwargs):
+        builds.append(sorted(pkgs.keys()))
+        return {"fd": {"info": {"slug": "find alternative"}}}
+
+    monkeypatch.setattr(search, "BRING_SEARCH_INDEX_CACHE", str(tmp_path))
+    monkeypatch.setattr(search, "get_values_for_pkgs", get_values_for_pkgs)
+
+    index = _FakeIndex(content_hash="a", timestamp="1")
+    await search.get_search_index(index)  # type: ignore
+    assert len(builds) == 1
+
+    # a new timestamp without a content change doesn't invalidate the cache
+    index.timestamp = "2"
+    cached = await search.get_search_index(index)  # type: ignore
+    assert len(builds) == 1
+    assert [r.pkg_name for r in search_pkgs([cached], "find")] == ["fd"]
+
+    index.content_hash = "b"
+    await search.get_search_index(index)  # type: ignore
+    assert len(builds) == 2
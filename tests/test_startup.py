@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import time
+
+from bring._startup import BRING_CLI_PYTHON_ARGS, parse_importtime
+
+
+# cold startup budget for 'bring --help', in seconds
+STARTUP_BUDGET = float(os.environ.get("BRING_STARTUP_BUDGET", "3.0"))
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     c
+import time:        50 |        150 |   b
+import time:        20 |         20 |   d
+import time:        10 |        180 | a
+import time:         5 |          5 | e
+"""
+
+
+def test_parse_importtime():
+
+    roots = parse_importtime(IMPORTTIME_OUTPUT)
+
+    assert [r.name for r in roots] == ["a", "e"]
+    assert [c.name for c in roots[0].children] == ["b", "d"]
+    assert roots[0].children[0].children[0].name == "c"
+    assert roots[0].cumulative_us == 180
+
+
+def test_cli_startup_budget():
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable] + BRING_CLI_PYTHON_ARGS + ["--help"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    duration = time.perf_counter() - start
+
+    assert proc.returncode == 0, proc.stderr.decode("utf-8", errors="replace")
+    # use 'bring dev startup-profile' to find out where the time goes
+    assert (
+        duration < STARTUP_BUDGET
+    ), f"'bring --help' took {duration:.2f}s (budget: {STARTUP_BUDGET}s)"
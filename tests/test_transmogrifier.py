@@ -31,3 +31,29 @@ async def test_transmogrifier():
     # rv = result.result_value
     # assert isinstance(rv, collections.abc.Mapping)
     # assert "folder_path" in rv.keys()
+
+
+def test_fuse_file_tree_steps():
+
+    from bring.mogrify import fuse_file_tree_steps
+
+    mogs = [
+        {"type": "download", "url": "https://example.com/x.tar.gz"},
+        {"type": "extract"},
+        {"type": "file_filter", "include": ["bin/*"]},
+        {"type": "flatten"},
+        {"type": "set_mode", "set_executable": True},
+    ]
+    fused = fuse_file_tree_steps(mogs)
+
+    assert len(fused) == 3
+    assert fused[2]["type"] == "file_tree"
+    assert [s["type"] for s in fused[2]["steps"]] == [
+        "file_filter",
+        "flatten",
+        "set_mode",
+    ]
+
+    # runs without a relocating step are left alone
+    mogs = [{"type": "set_mode", "set_executable": True}, {"type": "rename"}]
+    assert fuse_file_tree_steps(mogs) == mogs
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from bring.utils.url_probe import UrlProbeCache, probe_urls
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    STATUS_CODES = {"/exists": 200, "/redirect": 302, "/missing": 404}
+
+    def do_HEAD(self):
+
+        if self.path.startswith("/no_head"):
+            self.send_response(405)
+        else:
+            self.send_response(self.STATUS_CODES[self.path])
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_url():
+
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.anyio
+async def test_probe_urls(tmp_path, http_url):
+
+    cache = UrlProbeCache(cache_file=str(tmp_path / "url_probes.json"))
+    urls = [f"{http_url}/{p}" for p in ["exists", "redirect", "missing", "no_head/x"]]
+
+    result = await probe_urls(urls, cache=cache)
+
+    assert result == {
+        urls[0]: True,
+        urls[1]: True,
+        urls[2]: False,
+        # servers that don't support 'HEAD' requests don't tell us anything
+        urls[3]: True,
+    }
+    assert cache.get(urls[2]) is False
+    assert cache.get(urls[3]) is None